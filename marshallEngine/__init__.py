@@ -1,4 +1,17 @@
 from __future__ import absolute_import
-from . import cl_utils
 from .__version__ import __version__
-from . import utKit
+import importlib
+
+# THE COMMAND-LINE TOOLS AND TEST KIT ARE ONLY IMPORTED WHEN FIRST USED (PEP
+# 562), SO IMPORTING ANY marshallEngine MODULE DOES NOT PULL THEM IN
+_lazy = ("cl_utils", "utKit")
+
+
+def __getattr__(name):
+    if name in _lazy:
+        return importlib.import_module("." + name, __name__)
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_lazy))
@@ -6,7 +6,9 @@ Documentation for marshallEngine can be found here: http://marshallEngine.readth
 Usage:
     marshall init
     marshall clean [-s <pathToSettingsFile>]
-    marshall import <survey> [<withInLastDay>] [-s <pathToSettingsFile>]
+    marshall import <survey> [<withInLastDay>] [--drain] [-s <pathToSettingsFile>]
+    marshall import-all [<withInLastDay>] [--drain] [-s <pathToSettingsFile>]
+    marshall daemon [<withInLastDay>] [--drain] [-s <pathToSettingsFile>]
     marshall lightcurve <transientBucketId> [-s <pathToSettingsFile>]
     marshall refresh <transientBucketId>  [-s <pathToSettingsFile>]
     marshall skytag  [-s <pathToSettingsFile>]
@@ -14,8 +16,10 @@ Usage:
 
 Options:
     init                  setup the marshallEngine settings file for the first time
-    clean                 preform cleanup tasks like updating transient summaries table
+    clean                 preform cleanup tasks like updating transient summaries table and tidying the image stamp cache
     import                import data, images, lightcurves from a feeder survey
+    import-all            import data, images, lightcurves from all configured feeder surveys concurrently
+    daemon                keep running, importing the configured feeder surveys, caching images and updating lightcurves on a schedule
     refresh               update the cached metadata for a given transient
     lightcurve            generate a lightcurve for a transient in the marshall database
     transientBucketId     the transient ID from the database
@@ -24,6 +28,7 @@ Options:
     survey                name of survey to import [panstarrs|atlas|useradded]
     withInLastDay         import transient detections from the last N days (Default 30)
 
+    --drain                                 crossmatch the full backlog of un-ingested feeder survey rows (not just the next 500)
     -h, --help                              show this help message
     -v, --version                           show version
     -s, --settings <pathToSettingsFile>     the settings file
@@ -92,6 +97,7 @@ def main(arguments=None):
     survey = a["survey"]
     withInLastDay = a["withInLastDay"]
     settingsFlag = a["settingsFlag"]
+    drainFlag = a["drainFlag"]
     skytag = a["skytag"]
 
     # set options interactively if user requests
@@ -176,35 +182,58 @@ def main(arguments=None):
             dbConn=dbConn
         ).update()
 
+        # DEDUPLICATE OLD STAMPS AND REMOVE UNREFERENCED BLOBS FROM THE IMAGE
+        # CACHE
+        from marshallEngine.housekeeping import tidy_stamp_blobs
+        tidy_stamp_blobs(
+            log=log,
+            settings=settings
+        )
+
     if iimport:
-        if survey.lower() == "panstarrs":
-            from marshallEngine.feeders.panstarrs.data import data
-            from marshallEngine.feeders.panstarrs import images
-        if survey.lower() == "atlas":
-            from marshallEngine.feeders.atlas.data import data
-            from marshallEngine.feeders.atlas import images
-        if survey.lower() == "useradded":
-            from marshallEngine.feeders.useradded.data import data
-            from marshallEngine.feeders.useradded import images
-        if survey.lower() == "tns":
-            from marshallEngine.feeders.tns.data import data
-            from marshallEngine.feeders.tns import images
-        if survey.lower() == "ztf":
-            from marshallEngine.feeders.ztf.data import data
-            from marshallEngine.feeders.ztf import images
-        if survey.lower() == "atels" or survey.lower() == "atel":
-            from marshallEngine.feeders.atels.data import data
-            from marshallEngine.feeders.atels import images
-        ingester = data(
+        from marshallEngine.feeders.survey_feeders import get_survey_feeders
+        from marshallEngine.commonutils.run_report import run_report, stage
+        data, images = get_survey_feeders(survey)
+        # RECORD PER-STAGE TIMINGS OF THE IMPORT
+        report = run_report(
             log=log,
             settings=settings,
-            dbConn=dbConn
-        ).ingest(withinLastDays=withInLastDay)
-        cacher = images(
+            name=survey.lower()
+        ).start()
+        try:
+            with stage("ingest"):
+                ingester = data(
+                    log=log,
+                    settings=settings,
+                    dbConn=dbConn
+                )
+                ingester.drainBacklog = drainFlag
+                ingester.ingest(withinLastDays=withInLastDay)
+            with stage("image cache"):
+                cacher = images(
+                    log=log,
+                    settings=settings,
+                    dbConn=dbConn
+                ).cache(limit=3000)
+        finally:
+            report.finish()
+
+        from marshallEngine.services import panstarrs_location_stamps
+        ps_stamp = panstarrs_location_stamps(
             log=log,
             settings=settings,
             dbConn=dbConn
-        ).cache(limit=3000)
+        ).get()
+
+    if a["import-all"]:
+        from marshallEngine.services import import_all
+        importer = import_all(
+            log=log,
+            settings=settings,
+            withinLastDays=withInLastDay,
+            drainBacklog=drainFlag
+        )
+        importer.run()
 
         from marshallEngine.services import panstarrs_location_stamps
         ps_stamp = panstarrs_location_stamps(
@@ -213,6 +242,16 @@ def main(arguments=None):
             dbConn=dbConn
         ).get()
 
+    if a["daemon"]:
+        from marshallEngine.services import ingest_daemon
+        daemon = ingest_daemon(
+            log=log,
+            settings=settings,
+            withinLastDays=withInLastDay,
+            drainBacklog=drainFlag
+        )
+        daemon.run()
+
     if lightcurve:
         from marshallEngine.lightcurves import marshall_lightcurves
         lc = marshall_lightcurves(
@@ -3,3 +3,28 @@
 """
 from __future__ import absolute_import
 from .getpackagepath import getpackagepath
+from .getstatepath import getstatepath
+from .mysql_lock import mysql_lock, lock_held
+import importlib
+
+# EXPORTS WITH HEAVIER DEPENDENCIES (REQUESTS, NUMPY) ARE
+# ONLY IMPORTED WHEN FIRST USED (PEP 562). EXPORTS NAMED AFTER THEIR OWN
+# MODULE STAY EAGER - ONCE LOADED, A SUBMODULE WOULD SHADOW A LAZY NAME
+_lazy = {
+    "get_http_session": ".http_session",
+    "get_db_connection": ".db_connection",
+    "ut_datetimes_to_mjds": ".batch_time_conversions",
+    "mjds_to_ut_datetimes": ".batch_time_conversions"
+}
+
+
+def __getattr__(name):
+    if name in _lazy:
+        value = getattr(importlib.import_module(_lazy[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_lazy))
@@ -0,0 +1,142 @@
+#!/usr/local/bin/python
+# encoding: utf-8
+"""
+*Convert whole arrays of UT datetimes and MJDs in one call*
+
+:Author:
+    David Young
+"""
+import numpy as np
+import warnings
+import os
+os.environ['TERM'] = 'vt100'
+
+# MJD OF THE UNIX EPOCH (1970-01-01T00:00:00)
+_unixEpochMjd = 40587.
+
+
+def ut_datetimes_to_mjds(
+        log,
+        utDatetimes):
+    """*convert an array of UT datetime strings to MJDs*
+
+    ISO-like datetimes (``2016-04-26 14:44:44.234``, ``2016-04-26T14:44``, ``2016-04-26``) are parsed in a single vectorised step with NumPy's ``datetime64``. If any value is in a format NumPy cannot parse (e.g. ``20160426t1446``) the whole array falls back to astrocalc's per-value ``ut_datetime_to_mjd``. Empty values give a ``nan`` MJD.
+
+    **Key Arguments**
+
+    - ``log`` -- logger
+    - ``utDatetimes`` -- array or list of UT datetime strings
+
+    **Return**
+
+    - ``mjds`` -- NumPy float array of MJDs
+
+    **Usage**
+
+    ```python
+    from marshallEngine.commonutils import ut_datetimes_to_mjds
+    mjds = ut_datetimes_to_mjds(
+        log=log,
+        utDatetimes=["2016-04-26 14:44:44.234", "2016-04-27"]
+    )
+    ```
+    """
+    log.debug('starting the ``ut_datetimes_to_mjds`` function')
+
+    utDatetimes = np.asarray(utDatetimes, dtype=str)
+    try:
+        with warnings.catch_warnings():
+            # TIMEZONE SUFFIXES ARE ACCEPTED (AND CONVERTED TO UTC) WITH A
+            # DEPRECATION WARNING
+            warnings.simplefilter("ignore")
+            dt = np.char.strip(utDatetimes).astype("datetime64[us]")
+        mjds = dt.astype("int64") / 86400e6 + _unixEpochMjd
+        mjds[np.isnat(dt)] = np.nan
+    except ValueError:
+        from astrocalc.times import conversions
+        converter = conversions(
+            log=log
+        )
+        mjds = np.array([float(converter.ut_datetime_to_mjd(utDatetime=d))
+                         if d.strip() else np.nan for d in utDatetimes], dtype=float)
+
+    log.debug('completed the ``ut_datetimes_to_mjds`` function')
+    return mjds
+
+
+def mjds_to_ut_datetimes(
+        log,
+        mjds,
+        sqlDate=False):
+    """*convert an array of MJDs to UT datetime strings*
+
+    The output matches astrocalc's ``mjd_to_ut_datetime``: the precision of each datetime (day, minute or up to millisecond) is set by the number of decimal places in the MJD given. MJDs given as strings take their precision from the digits written (``"57504.6158"`` gives minute precision). Seconds are always written with two digits and round up into the next minute, where astrocalc gives ``14:46:3.033`` or ``14:46:60``.
+
+    **Key Arguments**
+
+    - ``log`` -- logger
+    - ``mjds`` -- array or list of MJDs (strings or floats)
+    - ``sqlDate`` -- add a 'T' between the date and time (as used by MySQL). Default *False*
+
+    **Return**
+
+    - ``utDatetimes`` -- list of UT datetime strings (None where the MJD is empty)
+
+    **Usage**
+
+    ```python
+    from marshallEngine.commonutils import mjds_to_ut_datetimes
+    utDatetimes = mjds_to_ut_datetimes(
+        log=log,
+        mjds=columns["earliest_mjd"],
+        sqlDate=True
+    )
+    ```
+    """
+    log.debug('starting the ``mjds_to_ut_datetimes`` function')
+
+    mjds = list(mjds)
+    if not len(mjds):
+        return []
+
+    # PRECISION IS TAKEN FROM THE DIGITS GIVEN - repr() OF FLOATS, AS IN
+    # ASTROCALC, BUT STRINGS AS WRITTEN (repr() WOULD COUNT THE QUOTE)
+    reprs = [m.strip() if isinstance(m, str) else repr(float(m))
+             if m is not None else "" for m in mjds]
+    lenDec = np.array([len(r.split(".")[-1]) if "." in r else 0 for r in reprs])
+    empty = np.array([m is None or m == "" for m in mjds])
+
+    values = np.array([np.nan if e else float(m)
+                       for m, e in zip(mjds, empty)], dtype=float)
+    unixtime = (values + 2400000.5 - 2440587.5) * 86400.0
+    us = np.round(np.where(empty, 0, unixtime) * 1e6).astype("int64")
+    dt = us.astype("datetime64[us]")
+
+    # SECONDS ARE ROUNDED TO 0-3 DECIMAL PLACES, DAYS AND MINUTES TRUNCATED
+    precision = np.clip(lenDec - 5, 0, 3)
+    utDatetimes = np.empty(len(mjds), dtype=object)
+    for p in range(4):
+        thisP = (lenDec >= 5) & (precision == p) & ~empty
+        if not thisP.any():
+            continue
+        step = 10 ** (6 - p)
+        rounded = ((us[thisP] + step // 2) // step * step).astype("datetime64[us]")
+        strings = np.datetime_as_string(
+            rounded, unit="s" if p == 0 else "ms")
+        if p in (1, 2):
+            # TRIM THE MILLISECONDS TO THE PRECISION
+            strings = [s[:p - 3] for s in strings]
+        utDatetimes[thisP] = strings
+    minutes = (lenDec >= 3) & (lenDec < 5) & ~empty
+    utDatetimes[minutes] = np.datetime_as_string(
+        dt[minutes].astype("datetime64[m]"), unit="m")
+    days = (lenDec < 3) & ~empty
+    utDatetimes[days] = np.datetime_as_string(
+        dt[days].astype("datetime64[D]"), unit="D")
+
+    utDatetimes = utDatetimes.tolist()
+    if not sqlDate:
+        utDatetimes = [u.replace("T", " ") if u else u for u in utDatetimes]
+
+    log.debug('completed the ``mjds_to_ut_datetimes`` function')
+    return utDatetimes
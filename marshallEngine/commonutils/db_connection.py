@@ -0,0 +1,78 @@
+#!/usr/local/bin/python
+# encoding: utf-8
+"""
+*Persistent, health-checked database connections for the marshall's worker processes and threads*
+
+:Author:
+    David Young
+"""
+import threading
+import time
+import os
+
+_connections = {}
+_lock = threading.Lock()
+
+
+def get_db_connection(
+        log,
+        dbSettings,
+        maxIdleSeconds=60):
+    """*get the persistent database connection of this worker (process and thread)*
+
+    The first call in a pool worker opens a connection; every later task run by the same worker reuses it. Connections are cached per process and thread, so a forked child or a new thread gets its own connection rather than sharing a socket. A connection that has been idle for more than ``maxIdleSeconds`` is pinged (and reconnected if the server has dropped it) before it is handed out.
+
+    Do not close the connection returned; commit any writes instead.
+
+    **Key Arguments**
+
+    - ``log`` -- logger
+    - ``dbSettings`` -- the database settings dictionary (``settings["database settings"]``)
+    - ``maxIdleSeconds`` -- ping connections idle for longer than this before reusing them. Default *60*
+
+
+    **Return**
+
+    - ``dbConn`` -- the database connection
+
+
+    **Usage**
+
+    ```python
+    from marshallEngine.commonutils import get_db_connection
+    dbConn = get_db_connection(
+        log=log,
+        dbSettings=settings["database settings"]
+    )
+    ```
+    """
+    key = (os.getpid(), threading.get_ident(), dbSettings.get("host"), dbSettings.get(
+        "port"), dbSettings.get("user"), dbSettings.get("db"))
+    with _lock:
+        entry = _connections.get(key)
+
+    if entry:
+        dbConn, lastUsed = entry
+        if time.time() - lastUsed > maxIdleSeconds:
+            try:
+                # RECONNECTS IN PLACE IF THE SERVER HAS CLOSED THE CONNECTION
+                dbConn.ping(reconnect=True)
+            except Exception as e:
+                log.warning(
+                    "database connection failed its health check (%(e)s) - reconnecting" % locals())
+                try:
+                    dbConn.close()
+                except Exception:
+                    pass
+                entry = None
+
+    if not entry:
+        from fundamentals.mysql import database
+        dbConn = database(
+            log=log,
+            dbSettings=dbSettings
+        ).connect()
+
+    with _lock:
+        _connections[key] = (dbConn, time.time())
+    return dbConn
@@ -0,0 +1,50 @@
+#!/usr/local/bin/python
+# encoding: utf-8
+"""
+*Get the path to the folder the marshallEngine keeps its local state in (HTTP caches, run reports etc)*
+
+:Author:
+    David Young
+"""
+import os
+
+
+def getstatepath(
+        settings=False,
+        folder=False):
+    """
+    *Get the path to the local state folder (or one of its subfolders), creating it if it does not exist yet*
+
+    The location can be set with the ``state-directory`` setting, otherwise defaults to ``~/.config/marshallEngine/state``.
+
+    **Key Arguments**
+
+    - ``settings`` -- the settings dictionary
+    - ``folder`` -- name of a subfolder of the state folder. Default *False*
+
+
+    **Return**
+
+    - ``statePath`` -- path to the state folder
+
+
+    **Usage**
+
+    ```python
+    from marshallEngine.commonutils import getstatepath
+    cacheDir = getstatepath(settings=settings, folder="http-cache")
+    ```
+    """
+    if settings and "state-directory" in settings and settings["state-directory"]:
+        statePath = os.path.expanduser(settings["state-directory"])
+    else:
+        statePath = os.path.expanduser("~/.config/marshallEngine/state")
+
+    if folder:
+        statePath = os.path.join(statePath, folder)
+
+    # RECURSIVELY CREATE MISSING DIRECTORIES
+    if not os.path.exists(statePath):
+        os.makedirs(statePath, exist_ok=True)
+
+    return statePath
@@ -0,0 +1,53 @@
+#!/usr/local/bin/python
+# encoding: utf-8
+"""
+*A shared, pooled and keep-alive HTTP session for the marshall's survey downloads*
+
+:Author:
+    David Young
+"""
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+import os
+
+_sessions = {}
+_lock = threading.Lock()
+
+
+def get_http_session(
+        poolSize=10):
+    """*get the pooled keep-alive HTTP session for this process*
+
+    Sessions are cached per process (and pool size) so repeated requests to the same survey hosts reuse their TCP/TLS connections. A forked child process gets its own session rather than sharing its parent's sockets.
+
+    **Key Arguments**
+
+    - ``poolSize`` -- the maximum number of connections to keep alive per host. Default *10*
+
+
+    **Return**
+
+    - ``session`` -- a ``requests.Session`` object
+
+
+    **Usage**
+
+    ```python
+    from marshallEngine.commonutils import get_http_session
+    session = get_http_session()
+    response = session.get(url=url, timeout=10.0)
+    ```
+    """
+    key = (os.getpid(), poolSize)
+    with _lock:
+        if key not in _sessions:
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=poolSize,
+                pool_maxsize=poolSize
+            )
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _sessions[key] = session
+        return _sessions[key]
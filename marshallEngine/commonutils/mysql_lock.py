@@ -0,0 +1,69 @@
+#!/usr/local/bin/python
+# encoding: utf-8
+"""
+*A MySQL named lock to serialise steps shared between concurrent marshallEngine processes*
+
+:Author:
+    David Young
+"""
+from contextlib import contextmanager
+from marshallEngine.commonutils.run_report import readquery
+import os
+os.environ['TERM'] = 'vt100'
+
+
+class lock_held(RuntimeError):
+    """*the named lock is held by another connection and could not be acquired within the timeout*
+    """
+
+    def __init__(self, message, lockName=None):
+        RuntimeError.__init__(self, message)
+        self.lockName = lockName
+
+
+@contextmanager
+def mysql_lock(
+        log,
+        dbConn,
+        lockName,
+        timeout=3600):
+    """*hold a MySQL named lock (``GET_LOCK``) for the duration of a ``with`` block*
+
+    The lock lives on the database server, so it serialises the block across every process (and host) using the same marshall database. It is released automatically if the connection drops.
+
+    **Key Arguments**
+
+    - ``log`` -- logger
+    - ``dbConn`` -- the marshall database connection
+    - ``lockName`` -- the name of the lock
+    - ``timeout`` -- the number of seconds to wait for the lock before giving up (raising ``lock_held``). Default *3600*
+
+
+    **Usage**
+
+    ```python
+    from marshallEngine.commonutils import mysql_lock
+    with mysql_lock(log=log, dbConn=dbConn, lockName="marshall_transientbucket_sync"):
+        ingester._feeder_survey_transientbucket_name_match_and_import()
+    ```
+    """
+    log.debug('waiting for the ``%(lockName)s`` lock' % locals())
+    rows = readquery(
+        log=log,
+        sqlQuery="""SELECT GET_LOCK('%(lockName)s', %(timeout)s) AS locked""" % locals(),
+        dbConn=dbConn
+    )
+    if not rows[0]["locked"]:
+        message = "could not acquire the `%(lockName)s` lock within %(timeout)s seconds" % locals()
+        log.info(message)
+        raise lock_held(message, lockName=lockName)
+
+    try:
+        yield
+    finally:
+        readquery(
+            log=log,
+            sqlQuery="""SELECT RELEASE_LOCK('%(lockName)s') AS released""" % locals(),
+            dbConn=dbConn
+        )
+        log.debug('released the ``%(lockName)s`` lock' % locals())
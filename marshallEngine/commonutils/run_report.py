@@ -0,0 +1,303 @@
+#!/usr/local/bin/python
+# encoding: utf-8
+"""
+*Per-stage and per-query timing and row-count reports for marshallEngine runs*
+
+:Author:
+    David Young
+"""
+from marshallEngine.commonutils.getstatepath import getstatepath
+from contextlib import contextmanager
+from fundamentals import mysql as _mysql
+from datetime import datetime
+import threading
+import glob
+import json
+import time
+import re
+import os
+os.environ['TERM'] = 'vt100'
+
+# THE REPORT BEING RECORDED IN THIS PROCESS (IF ANY)
+_active = []
+_lock = threading.Lock()
+
+
+class run_report(object):
+    """
+    *record how long each stage of a run takes, and the time, number of calls and rows affected by every database query within each stage*
+
+    Only one report is active per process at a time. Use the ``readquery`` and ``writequery`` functions from this module in place of the ``fundamentals.mysql`` ones so the queries are recorded against the current stage (they behave exactly the same when no report is active).
+
+    At the end of the run a JSON report and an OpenMetrics text file are written to the ``reports`` folder of the state directory. Set the ``run reports`` setting to False to switch reporting off.
+
+    **Key Arguments**
+
+    - ``log`` -- logger
+    - ``settings`` -- the settings dictionary
+    - ``name`` -- the name of the run (e.g. the feeder survey table), used in the report filenames and metric labels
+
+    **Usage**
+
+    ```python
+    from marshallEngine.commonutils.run_report import run_report, stage
+    report = run_report(
+        log=log,
+        settings=settings,
+        name="fs_atlas"
+    ).start()
+    with stage("crossmatch"):
+        unmatched = ingester._feeder_survey_transientbucket_crossmatch()
+    jsonPath, metricsPath = report.finish()
+    ```
+
+    """
+    # NUMBER OF JSON REPORTS TO KEEP PER RUN NAME
+    keep = 50
+
+    def __init__(
+            self,
+            log,
+            settings=False,
+            name="marshall"
+    ):
+        self.log = log
+        log.debug("instansiating a new 'run_report' object")
+        self.settings = settings
+        self.name = name
+        self.stages = []
+        self.queries = {}
+        self.stack = []
+        self.enabled = not (
+            settings and "run reports" in settings and not settings["run reports"])
+
+        return None
+
+    def start(
+            self):
+        """*make this the active report of the process*
+
+        **Return**
+
+        - ``run_report`` -- this report
+        """
+        self.startTime = time.time()
+        self.started = datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%S")
+        if not self.enabled:
+            return self
+        with _lock:
+            _active[:] = [self]
+        return self
+
+    def finish(
+            self):
+        """*stop recording and write the JSON and OpenMetrics reports*
+
+        **Return**
+
+        - ``jsonPath`` -- path to the JSON report (None if reporting is switched off)
+        - ``metricsPath`` -- path to the OpenMetrics text file (None if reporting is switched off)
+        """
+        self.log.debug('starting the ``finish`` method')
+
+        with _lock:
+            if self in _active:
+                _active.remove(self)
+        if not self.enabled:
+            return None, None
+
+        reportDir = getstatepath(settings=self.settings, folder="reports")
+        name = self.name
+        now = datetime.utcnow().strftime("%Y%m%dT%H%M%S")
+        jsonPath = os.path.join(reportDir, "%(name)s-%(now)s.json" % locals())
+        metricsPath = os.path.join(reportDir, "%(name)s.prom" % locals())
+
+        with open(jsonPath, "w") as f:
+            json.dump(self.as_dict(), f, indent=2)
+
+        # WRITE TO A TEMP FILE AND MOVE INTO PLACE SO SCRAPERS NEVER READ A
+        # HALF-WRITTEN FILE
+        with open(metricsPath + ".tmp", "w") as f:
+            f.write(self.as_openmetrics())
+        os.replace(metricsPath + ".tmp", metricsPath)
+
+        # PRUNE OLD JSON REPORTS
+        oldReports = sorted(glob.glob(os.path.join(
+            reportDir, "%(name)s-*.json" % locals())))[:-self.keep]
+        for r in oldReports:
+            os.remove(r)
+
+        self.log.debug('completed the ``finish`` method')
+        return jsonPath, metricsPath
+
+    def as_dict(
+            self):
+        """*the report as a dictionary*
+        """
+        return {
+            "run": self.name,
+            "started": self.started,
+            "seconds": round(time.time() - self.startTime, 4),
+            "stages": self.stages,
+            "queries": [{"stage": k[0], "query": k[1], "calls": v["calls"], "seconds": round(v["seconds"], 4), "rows": v["rows"]} for k, v in self.queries.items()]
+        }
+
+    def as_openmetrics(
+            self):
+        """*the report in the OpenMetrics text format*
+        """
+        run = _escape(self.name)
+        lines = [
+            "# TYPE marshall_run_seconds gauge",
+            'marshall_run_seconds{run="%s"} %0.4f' % (
+                run, time.time() - self.startTime),
+            "# TYPE marshall_stage_seconds gauge"
+        ]
+        # A STAGE CAN RUN MORE THAN ONCE PER RUN - ONE SERIES PER STAGE NAME
+        stageSeconds = {}
+        for s in self.stages:
+            stageSeconds[s["stage"]] = stageSeconds.get(
+                s["stage"], 0.) + s["seconds"]
+        for name, seconds in stageSeconds.items():
+            lines.append('marshall_stage_seconds{run="%s",stage="%s"} %0.4f' % (
+                run, _escape(name), seconds))
+        for metric, key in (("marshall_query_seconds", "seconds"), ("marshall_query_calls", "calls"), ("marshall_query_rows", "rows")):
+            lines.append("# TYPE %(metric)s gauge" % locals())
+            for k, v in self.queries.items():
+                lines.append('%s{run="%s",stage="%s",query="%s"} %s' % (
+                    metric, run, _escape(k[0]), _escape(k[1]), round(v[key], 4)))
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def _record_query(
+            self,
+            sqlQuery,
+            seconds,
+            rows):
+        """*add a query's time and row count to the current stage*
+        """
+        key = (self.stack[-1] if len(self.stack) else "-",
+               _query_label(sqlQuery))
+        with _lock:
+            if key not in self.queries:
+                self.queries[key] = {"calls": 0, "seconds": 0., "rows": 0}
+            q = self.queries[key]
+            q["calls"] += 1
+            q["seconds"] += seconds
+            q["rows"] += rows or 0
+        return None
+
+    # use the tab-trigger below for new method
+    # xt-class-method
+
+
+def active_report():
+    """*the report being recorded in this process, or None*
+    """
+    return _active[0] if len(_active) else None
+
+
+@contextmanager
+def stage(
+        name):
+    """*time a stage of the run (and attribute the queries within it) in the active report*
+
+    Does nothing if no report is active.
+
+    **Key Arguments**
+
+    - ``name`` -- the name of the stage
+
+    **Usage**
+
+    ```python
+    from marshallEngine.commonutils.run_report import stage
+    with stage("observation dates"):
+        writequery(log=log, sqlQuery="call update_transientbucket_observation_dates()", dbConn=dbConn)
+    ```
+    """
+    report = active_report()
+    if not report:
+        yield
+        return
+
+    report.stack.append(name)
+    start = time.time()
+    try:
+        yield
+    finally:
+        report.stack.pop()
+        report.stages.append({
+            "stage": name,
+            "seconds": round(time.time() - start, 4)
+        })
+
+
+def readquery(
+        log,
+        sqlQuery,
+        dbConn,
+        quiet=False):
+    """*``fundamentals.mysql.readquery``, recording the query time and number of rows returned in the active report*
+    """
+    report = active_report()
+    if not report:
+        return _mysql.readquery(log=log, sqlQuery=sqlQuery, dbConn=dbConn, quiet=quiet)
+    start = time.time()
+    rows = _mysql.readquery(log=log, sqlQuery=sqlQuery,
+                            dbConn=dbConn, quiet=quiet)
+    report._record_query(sqlQuery, time.time() - start, len(rows))
+    return rows
+
+
+def writequery(
+        log,
+        sqlQuery,
+        dbConn,
+        Force=False,
+        manyValueList=False):
+    """*``fundamentals.mysql.writequery``, recording the query time and number of rows affected in the active report*
+    """
+    report = active_report()
+    if not report:
+        return _mysql.writequery(log=log, sqlQuery=sqlQuery, dbConn=dbConn, Force=Force, manyValueList=manyValueList)
+    start = time.time()
+    message = _mysql.writequery(
+        log=log, sqlQuery=sqlQuery, dbConn=dbConn, Force=Force, manyValueList=manyValueList)
+    try:
+        rows = dbConn.affected_rows()
+    except Exception:
+        rows = 0
+    if manyValueList:
+        rows = max(rows, len(manyValueList))
+    report._record_query(sqlQuery, time.time() - start, rows)
+    return message
+
+
+def _query_label(
+        sqlQuery):
+    """*a short, stable label for a query (stored procedure name or verb and first table)*
+    """
+    sql = " ".join(sqlQuery.split())
+    match = re.match(r"(?i)call\s+`?(\w+)", sql)
+    if match:
+        return "call " + match.group(1)
+    match = re.search(r"(?i)\b(get_lock|release_lock)\('(\w+)'", sql)
+    if match:
+        return match.group(1).lower() + " " + match.group(2)
+    verb = sql.split(" ", 1)[0].lower() if sql else ""
+    match = re.search(
+        r"(?i)\b(?:into\s+table|from|into|update|table)\s+`?(\w+)", sql)
+    if match:
+        table = match.group(1)
+        # TEMPORARY TABLES HAVE A UNIQUE TIMESTAMPED NAME PER RUN
+        table = re.sub(r"^(tmp_\w*?)_?\d{8}t\d+$", r"\1", table)
+        return "%(verb)s %(table)s" % locals()
+    return verb
+
+
+def _escape(
+        value):
+    """*escape an OpenMetrics label value*
+    """
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
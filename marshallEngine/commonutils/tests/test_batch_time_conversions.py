@@ -0,0 +1,127 @@
+from __future__ import print_function
+from builtins import str
+import os
+import unittest
+import shutil
+import yaml
+from marshallEngine.utKit import utKit
+from fundamentals import tools
+from os.path import expanduser
+home = expanduser("~")
+
+packageDirectory = utKit("").get_project_root()
+# settingsFile = packageDirectory + "/test_settings.yaml"
+settingsFile = home + "/git_repos/_misc_/settings/marshall/test_settings.yaml"
+
+su = tools(
+    arguments={"settingsFile": settingsFile},
+    docString=__doc__,
+    logLevel="DEBUG",
+    options_first=False,
+    projectName=None,
+    defaultSettingsFile=False
+)
+arguments, settings, log, dbConn = su.setup()
+
+# SETUP PATHS TO COMMON DIRECTORIES FOR TEST DATA
+moduleDirectory = os.path.dirname(__file__)
+pathToInputDir = moduleDirectory + "/input/"
+pathToOutputDir = moduleDirectory + "/output/"
+
+try:
+    shutil.rmtree(pathToOutputDir)
+except:
+    pass
+# COPY INPUT TO OUTPUT DIR
+shutil.copytree(pathToInputDir, pathToOutputDir)
+
+# Recursively create missing directories
+if not os.path.exists(pathToOutputDir):
+    os.makedirs(pathToOutputDir)
+
+
+class test_batch_time_conversions(unittest.TestCase):
+
+    def test_ut_datetimes_to_mjds_function(self):
+
+        from marshallEngine.commonutils import ut_datetimes_to_mjds
+        from astrocalc.times import conversions
+        converter = conversions(
+            log=log
+        )
+        utDatetimes = ["2016-04-26 14:44:44.234", "2016-04-26T14:44",
+                       "2016-04-26", "2020-01-01 00:00:00"]
+        # THE SECOND LIST HAS A DATETIME NUMPY CANNOT PARSE, SO FALLS BACK
+        # TO ASTROCALC
+        for theseDatetimes in (utDatetimes, utDatetimes + ["20160426t1446"]):
+            mjds = ut_datetimes_to_mjds(
+                log=log,
+                utDatetimes=theseDatetimes
+            )
+            for d, mjd in zip(theseDatetimes, mjds):
+                expected = converter.ut_datetime_to_mjd(utDatetime=d)
+                decimals = len(expected.split(".")[-1])
+                assert round(mjd, decimals) == float(expected)
+
+        mjds = ut_datetimes_to_mjds(
+            log=log,
+            utDatetimes=["2016-04-26", ""]
+        )
+        assert mjds[0] == 57504.
+        assert mjds[1] != mjds[1]
+
+    def test_mjds_to_ut_datetimes_function(self):
+
+        from marshallEngine.commonutils import mjds_to_ut_datetimes
+        from astrocalc.times import conversions
+        converter = conversions(
+            log=log
+        )
+        # DAY, MINUTE AND 0-3 DECIMAL PLACE SECOND PRECISION
+        mjds = [57504.0, 57504.61, 57504.6158, 57504.61578,
+                57504.615776, 57504.6157759, 57504.61577585013]
+        utDatetimes = mjds_to_ut_datetimes(
+            log=log,
+            mjds=mjds
+        )
+        for mjd, utDatetime in zip(mjds, utDatetimes):
+            assert utDatetime == converter.mjd_to_ut_datetime(mjd=mjd)
+        assert utDatetimes[2] == "2016-04-26 14:46"
+        assert utDatetimes[-1] == "2016-04-26 14:46:43.033"
+
+        # STRINGS TAKE THEIR PRECISION FROM THE DIGITS WRITTEN, MATCHING THE
+        # SAME MJD GIVEN AS A FLOAT
+        utDatetimes = mjds_to_ut_datetimes(
+            log=log,
+            mjds=[str(m) for m in mjds] + [""],
+            sqlDate=True
+        )
+        for mjd, utDatetime in zip(mjds, utDatetimes):
+            assert utDatetime == converter.mjd_to_ut_datetime(
+                mjd=mjd, sqlDate=True)
+        assert utDatetimes[2] == "2016-04-26T14:46"
+        assert utDatetimes[-1] is None
+
+        # SECONDS ARE ALWAYS TWO DIGITS AND ROLL OVER INTO THE NEXT MINUTE
+        utDatetimes = mjds_to_ut_datetimes(
+            log=log,
+            mjds=["57504.61577585013", "59287.70833"]
+        )
+        assert utDatetimes[0] == "2016-04-26 14:46:43.033"
+        assert utDatetimes[1] == "2021-03-14 17:00:00"
+        assert mjds_to_ut_datetimes(
+            log=log, mjds=[59452.706955539])[0] == "2021-08-26 16:58:00.959"
+
+    def test_mjds_to_ut_datetimes_function_exception(self):
+
+        from marshallEngine.commonutils import mjds_to_ut_datetimes
+        try:
+            this = mjds_to_ut_datetimes(
+                log=log,
+                mjds=[57504.0],
+                fakeKey="break the code"
+            )
+            assert False
+        except Exception as e:
+            assert True
+            print(str(e))
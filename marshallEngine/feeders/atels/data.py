@@ -17,7 +17,7 @@ from fundamentals import tools
 from ..data import data as basedata
 from astrocalc.times import now
 import git
-from fundamentals.mysql import writequery
+from marshallEngine.commonutils.run_report import writequery
 
 
 class data(basedata):
@@ -14,12 +14,12 @@ import sys
 import os
 os.environ['TERM'] = 'vt100'
 from fundamentals import tools
-from fundamentals.mysql import readquery
+from marshallEngine.commonutils.run_report import readquery
 import requests
 from requests.auth import HTTPBasicAuth
 import codecs
 from fundamentals import fmultiprocess
-from fundamentals.mysql import writequery
+from marshallEngine.commonutils.run_report import writequery
 from ..images import images as baseimages
 
 
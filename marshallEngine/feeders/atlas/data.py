@@ -8,12 +8,14 @@
 """
 from datetime import datetime, date, time, timedelta
 from marshallEngine.feeders.atlas.lightcurve import generate_atlas_lightcurves
-from fundamentals.mysql import writequery
-from astrocalc.times import conversions
+from marshallEngine.commonutils.run_report import writequery
+from marshallEngine.feeders.csv_columns import csv_to_columns, stamp_image_urls, stamp_object_ids, columns_to_dict_list
+from marshallEngine.commonutils import ut_datetimes_to_mjds, mjds_to_ut_datetimes
 from astrocalc.times import now
 from ..data import data as basedata
 from fundamentals import tools
 from builtins import str
+import numpy as np
 import sys
 import os
 os.environ['TERM'] = 'vt100'
@@ -77,48 +79,73 @@ class data(basedata):
         """
         self.log.debug('starting the ``ingest`` method')
 
-        timelimit = datetime.now() - timedelta(days=int(withinLastDays))
-        timelimit = timelimit.strftime("%Y-%m-%d")
-
-        csvDicts = self.get_csv_data(
-            url=self.settings["atlas urls"]["summary csv"] + f"?followup_flag_date__gte={timelimit}"
-        )
-
-        self._clean_data_pre_ingest(
-            surveyName="ATLAS", withinLastDays=withinLastDays)
-
-        self._import_to_feeder_survey_table()
-        self.insert_into_transientBucket(updateTransientSummaries=False)
-
-        sqlQuery = """call update_fs_atlas_forced_phot()""" % locals()
-        writequery(
-            log=self.log,
-            sqlQuery=sqlQuery,
-            dbConn=self.dbConn
-        )
-
-        self.fsTableName = "fs_atlas_forced_phot"
-        self.survey = "ATLAS FP"
-
-        sqlQuery = """CALL update_transientBucket_atlas_sources()""" % locals()
-        writequery(
-            log=self.log,
-            sqlQuery=sqlQuery,
-            dbConn=self.dbConn
-        )
-
-        self.insert_into_transientBucket(importUnmatched=False)
+        # STAGES COMPLETED BY AN INTERRUPTED RUN ARE SKIPPED
+        journal = self._get_ingest_journal(withinLastDays=withinLastDays)
+
+        if not journal.done("feeder survey import"):
+            timelimit = datetime.now() - timedelta(days=int(withinLastDays))
+            timelimit = timelimit.strftime("%Y-%m-%d")
+
+            # STREAM THE CSV ROWS INTO THE FEEDER SURVEY TABLE AS THEY ARRIVE
+            csvDicts = self.get_csv_data(
+                url=self.settings["atlas urls"]["summary csv"] + f"?followup_flag_date__gte={timelimit}",
+                stream=True
+            )
+            # IF THE FEED HAS NOT CHANGED SINCE THE LAST RUN SKIP ITS IMPORT AND
+            # SYNC - FS_ATLAS_FORCED_PHOT IS FILLED INDEPENDENTLY, SO THE FORCED
+            # PHOTOMETRY AND LIGHTCURVE STAGES STILL RUN
+            if len(self.unchangedFeeds):
+                print("The ATLAS summary CSV has not changed since the last import - skipping its import")
+                journal.complete("feeder survey import", artefacts={
+                    "rows": 0, "pendingHttpCache": {}})
+                journal.complete("transientbucket sync")
+            else:
+                rowCount = self._stream_csv_into_feeder_survey_table(
+                    surveyName="ATLAS", withinLastDays=withinLastDays)
+                journal.complete("feeder survey import", artefacts={
+                    "rows": rowCount, "pendingHttpCache": self.pendingHttpCache})
+
+        if not journal.done("transientbucket sync"):
+            self.insert_into_transientBucket(updateTransientSummaries=False)
+            journal.complete("transientbucket sync")
+
+        if not journal.done("forced photometry sync"):
+            sqlQuery = """call update_fs_atlas_forced_phot()""" % locals()
+            writequery(
+                log=self.log,
+                sqlQuery=sqlQuery,
+                dbConn=self.dbConn
+            )
+
+            self.fsTableName = "fs_atlas_forced_phot"
+            self.survey = "ATLAS FP"
+
+            sqlQuery = """CALL update_transientBucket_atlas_sources()""" % locals()
+            writequery(
+                log=self.log,
+                sqlQuery=sqlQuery,
+                dbConn=self.dbConn
+            )
+
+            self.insert_into_transientBucket(importUnmatched=False)
+            journal.complete("forced photometry sync")
 
         # UPDATE THE ATLAS SPECIFIC FLUX SPACE LIGHTCURVES
-        generate_atlas_lightcurves(
-            log=self.log,
-            dbConn=self.dbConn,
-            settings=self.settings
-        )
+        if not journal.done("lightcurves"):
+            generate_atlas_lightcurves(
+                log=self.log,
+                dbConn=self.dbConn,
+                settings=self.settings
+            )
+            journal.complete("lightcurves")
 
         # CLEAN UP TASKS TO MAKE THE TICKET UPDATE
         self.clean_up()
 
+        # ONLY NOW MARK THE FEED AS INGESTED IN THE HTTP CACHE
+        self._commit_http_cache()
+        journal.clear()
+
         self.log.debug('completed the ``ingest`` method')
         return None
 
@@ -152,79 +179,60 @@ class data(basedata):
         """
         self.log.debug('starting the ``_clean_data_pre_ingest`` method')
 
-        self.dictList = []
+        # LOAD THE CSV INTO COLUMNS AND CLEAN WITH VECTORISED OPERATIONS
+        columns, rowCount = csv_to_columns(csvDicts=self.csvDicts)
+        if not rowCount:
+            self.dictList = []
+            return self.dictList
 
         # CALC MJD LIMIT
         if withinLastDays:
             mjdLimit = now(
                 log=self.log
             ).get_mjd() - float(withinLastDays)
-
-        # CONVERTER TO CONVERT MJD TO DATE
-        converter = conversions(
-            log=self.log
-        )
-
-        for row in self.csvDicts:
-            # IF NOW IN THE LAST N DAYS - SKIP
-            flagMjd = converter.ut_datetime_to_mjd(
-                utDatetime=row["followup_flag_date"])
-
-            if withinLastDays and (float(row["earliest_mjd"]) < mjdLimit and float(flagMjd) < mjdLimit):
-                continue
-
-            # MASSAGE THE DATA IN THE INPUT FORMAT TO WHAT IS NEEDED IN THE
-            # FEEDER SURVEY TABLE IN THE DATABASE
-            target = row["target"]
-            diff = row["diff"]
-            ref = row["ref"]
-            targetImageURL = None
-            refImageURL = None
-            diffImageURL = None
-
-            if target:
-                mjdStr = str(int(float(target.split("_")[1])))
-                if target:
-                    iid, mjdString, diffId, ippIdet, type = target.split('_')
-                    targetImageURL = "https://star.pst.qub.ac.uk/sne/atlas4/media/images/data/atlas4/" % locals() + '/' + \
-                        mjdStr + '/' + target + '.jpeg'
-                    objectURL = "https://star.pst.qub.ac.uk/sne/atlas4/candidate/" + iid
-
-            if ref:
-                mjdStr = str(int(float(ref.split("_")[1])))
-                if ref:
-                    iid, mjdString, diffId, ippIdet, type = ref.split('_')
-                    refImageURL = "https://star.pst.qub.ac.uk/sne/atlas4/media/images/data/atlas4/" % locals() + '/' + \
-                        mjdStr + '/' + ref + '.jpeg'
-                    objectURL = "https://star.pst.qub.ac.uk/sne/atlas4/candidate/" + iid
-
-            if diff:
-                mjdStr = str(int(float(diff.split("_")[1])))
-                if diff:
-                    iid, mjdString, diffId, ippIdet, type = diff.split('_')
-                    diffImageURL = "https://star.pst.qub.ac.uk/sne/atlas4/media/images/data/atlas4/" % locals() + '/' + \
-                        mjdStr + '/' + diff + '.jpeg'
-                    objectURL = "https://star.pst.qub.ac.uk/sne/atlas4/candidate/" + iid
-
-            discDate = converter.mjd_to_ut_datetime(
-                mjd=row["earliest_mjd"], sqlDate=True)
-
-            thisDictionary = {}
-            thisDictionary["candidateID"] = row["name"]
-            thisDictionary["ra_deg"] = row["ra"]
-            thisDictionary["dec_deg"] = row["dec"]
-            thisDictionary["mag"] = row["earliest_mag"]
-            thisDictionary["observationMJD"] = row["earliest_mjd"]
-            thisDictionary["filter"] = row["earliest_filter"]
-            thisDictionary["discDate"] = discDate
-            thisDictionary["discMag"] = row["earliest_mag"]
-            thisDictionary["suggestedType"] = row["object_classification"]
-            thisDictionary["targetImageURL"] = targetImageURL
-            thisDictionary["refImageURL"] = refImageURL
-            thisDictionary["diffImageURL"] = diffImageURL
-            thisDictionary["objectURL"] = objectURL
-
-            self.dictList.append(thisDictionary)
+            # ONLY KEEP OBJECTS DETECTED OR FLAGGED IN THE LAST N DAYS
+            flagMjd = ut_datetimes_to_mjds(
+                log=self.log, utDatetimes=columns["followup_flag_date"])
+            keep = (columns["earliest_mjd"].astype(float) >=
+                    mjdLimit) | (flagMjd >= mjdLimit)
+            columns = {k: v[keep] for k, v in columns.items()}
+
+        # MASSAGE THE DATA IN THE INPUT FORMAT TO WHAT IS NEEDED IN THE
+        # FEEDER SURVEY TABLE IN THE DATABASE
+        imageBaseUrl = "https://star.pst.qub.ac.uk/sne/atlas4/media/images/data/atlas4/"
+        imageURLs = {}
+        for stamp in ("target", "ref", "diff"):
+            imageURLs[stamp] = stamp_image_urls(
+                stamps=columns[stamp], baseUrl=imageBaseUrl)
+
+        # THE OBJECT ID IS TAKEN FROM THE DIFF, REF OR TARGET STAMP NAME
+        objectId = stamp_object_ids(stamps=columns["target"])
+        for stamp in ("ref", "diff"):
+            objectId = np.where(
+                columns[stamp] != "", stamp_object_ids(stamps=columns[stamp]), objectId)
+        objectURL = np.where(objectId != "", np.char.add(
+            "https://star.pst.qub.ac.uk/sne/atlas4/candidate/", objectId).astype(object), None)
+
+        # CONVERT ALL MJDS TO DATES IN ONE CALL
+        discDate = mjds_to_ut_datetimes(
+            log=self.log, mjds=columns["earliest_mjd"], sqlDate=True)
+
+        cleaned = {
+            "candidateID": columns["name"],
+            "ra_deg": columns["ra"],
+            "dec_deg": columns["dec"],
+            "mag": columns["earliest_mag"],
+            "observationMJD": columns["earliest_mjd"],
+            "filter": columns["earliest_filter"],
+            "discDate": np.array(discDate, dtype=object),
+            "discMag": columns["earliest_mag"],
+            "suggestedType": columns["object_classification"],
+            "targetImageURL": imageURLs["target"],
+            "refImageURL": imageURLs["ref"],
+            "diffImageURL": imageURLs["diff"],
+            "objectURL": objectURL
+        }
+        self.dictList = columns_to_dict_list(columns=cleaned)
 
         self.log.debug('completed the ``_clean_data_pre_ingest`` method')
         return self.dictList
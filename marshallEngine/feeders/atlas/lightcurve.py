@@ -8,7 +8,8 @@
 """
 from __future__ import print_function
 from __future__ import division
-from fundamentals.mysql import database, readquery, writequery
+from fundamentals.mysql import readquery, writequery
+from marshallEngine.commonutils import get_db_connection
 from fundamentals import fmultiprocess
 from astrocalc.times import conversions
 import matplotlib.ticker as mtick
@@ -209,11 +210,11 @@ def plot_single_result(
     """
     log.info('starting the ``plot_single_result`` method')
 
-    # SETUP DATABASE CONNECTION
-    dbConn = database(
+    # REUSE THIS POOL WORKER'S PERSISTENT DATABASE CONNECTION
+    dbConn = get_db_connection(
         log=log,
         dbSettings=settings["database settings"]
-    ).connect()
+    )
 
     # GET THE DATA FROM THE DATABASE
     sqlQuery = u"""
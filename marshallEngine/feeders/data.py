@@ -9,10 +9,21 @@
 from __future__ import print_function
 from __future__ import division
 from fundamentals import tools
-from fundamentals.mysql import insert_list_of_dictionaries_into_database_tables, readquery, writequery
+from fundamentals.mysql import insert_list_of_dictionaries_into_database_tables
+from marshallEngine.commonutils.run_report import readquery, writequery, stage
+from marshallEngine.commonutils import get_http_session
+from marshallEngine.feeders.fs_column_map import get_fs_column_map
+from concurrent.futures import ThreadPoolExecutor
 from requests.auth import HTTPBasicAuth
 import requests
+import threading
+import queue
+import copy
 import csv
+import io
+import hashlib
+import tempfile
+from itertools import islice
 
 from builtins import zip
 from builtins import str
@@ -42,13 +53,26 @@ class data(object):
         ....
     ```
 
+    Set ``drainBacklog`` to True on an ingester to crossmatch every un-ingested row in the feeder survey table in a single run (paging through the table), rather than only the next 500 rows:
+
+    ```python
+    ingester.drainBacklog = True
+    ingester.ingest(withinLastDays=30)
+    ```
+
     """
+    # CROSSMATCH THE FULL UN-INGESTED BACKLOG OF THE FEEDER SURVEY TABLE IN ONE
+    # RUN INSTEAD OF THE NEXT 500 ROWS
+    drainBacklog = False
+    # NUMBER OF FEEDER SURVEY ROWS READ PER PAGE WHEN DRAINING THE BACKLOG
+    backlogPageSize = 20000
 
     def get_csv_data(
             self,
             url,
             user=False,
-            pwd=False):
+            pwd=False,
+            stream=False):
         """*collect the CSV data from a URL with option to supply basic auth credentials*
 
         **Key Arguments**
@@ -56,6 +80,7 @@ class data(object):
         - ``url`` -- the url to the csv file
         - ``user`` -- basic auth username
         - ``pwd`` -- basic auth password
+        - ``stream`` -- stream the response body instead of downloading it in full before parsing. Default *False*
 
 
         **Return**
@@ -83,25 +108,46 @@ class data(object):
 
         Note you will also be able to access the data via ``ingester.csvDicts`` 
 
+        If ``stream=True`` the CSV rows are parsed lazily as the response body arrives, so ``csvDicts`` can only be iterated over once (see ``_stream_csv_into_feeder_survey_table``).
+
+        Unless the ``http cache`` setting is *False*, the request is a conditional GET against the on-disk cache of ETag/Last-Modified validators (or a content hash if the server sends neither). If the feed has not changed since it was last ingested an empty list is returned and the URL is added to ``ingester.unchangedFeeds``. New validators are only written to the cache by ``_commit_http_cache``.
+
         """
         self.log.debug('starting the ``get_csv_data`` method')
 
-        # DOWNLOAD THE CSV FILE DATA
+        # SEND CONDITIONAL-GET HEADERS IF WE HAVE SEEN THIS FEED BEFORE
+        cache = self._get_http_cache()
+        headers = {}
+        if cache:
+            headers = cache.conditional_headers(url=url)
+
+        # DOWNLOAD THE CSV FILE DATA OVER THE POOLED KEEP-ALIVE SESSION
+        session = get_http_session()
         try:
             if user:
-                response = requests.get(
+                response = session.get(
                     url=url,
-                    auth=HTTPBasicAuth(user, pwd)
+                    auth=HTTPBasicAuth(user, pwd),
+                    headers=headers,
+                    stream=stream
                 )
             else:
-                response = requests.get(
-                    url=url
+                response = session.get(
+                    url=url,
+                    headers=headers,
+                    stream=stream
                 )
             status_code = response.status_code
         except requests.exceptions.RequestException:
             print('HTTP Request failed')
             sys.exit(0)
 
+        if status_code == 304:
+            self.log.info('%(url)s has not changed since it was last ingested' % locals())
+            self.unchangedFeeds.append(url)
+            self.csvDicts = []
+            return self.csvDicts
+
         if status_code == 502:
             print('HTTP Request failed - status %(status_code)s' % locals())
             print(url)
@@ -113,17 +159,197 @@ class data(object):
             raise ConnectionError(
                 'HTTP Request failed - status %(status_code)s. URL: %(url)s' % locals())
 
+        lines = response.iter_lines(decode_unicode='utf-8')
+        if cache:
+            etag = response.headers.get("ETag")
+            lastModified = response.headers.get("Last-Modified")
+            if etag or lastModified:
+                entry = {"etag": etag, "lastModified": lastModified}
+                cached = cache.get(url=url)
+                if (etag and etag == cached.get("etag")) or (not etag and lastModified == cached.get("lastModified")):
+                    # SERVER IGNORED THE CONDITIONAL HEADERS BUT THE FEED IS
+                    # UNCHANGED
+                    self.log.info('%(url)s has not changed since it was last ingested' % locals())
+                    response.close()
+                    self.unchangedFeeds.append(url)
+                    self.csvDicts = []
+                    return self.csvDicts
+            else:
+                # NO VALIDATORS FROM THE SERVER - FALL BACK TO A HASH OF THE
+                # CONTENT (SPOOLED TO DISK SO MEMORY STAYS FLAT)
+                spool = tempfile.SpooledTemporaryFile(
+                    max_size=10 * 1024 * 1024)
+                sha = hashlib.sha256()
+                for block in response.iter_content(chunk_size=1024 * 1024):
+                    sha.update(block)
+                    spool.write(block)
+                spool.seek(0)
+                entry = {"sha256": sha.hexdigest()}
+                if entry["sha256"] == cache.get(url=url).get("sha256"):
+                    self.log.info('%(url)s has not changed since it was last ingested' % locals())
+                    spool.close()
+                    self.unchangedFeeds.append(url)
+                    self.csvDicts = []
+                    return self.csvDicts
+                lines = io.TextIOWrapper(spool, encoding='utf-8', newline='')
+            # ONLY COMMITTED TO THE CACHE ONCE THE INGEST HAS COMPLETED
+            self.pendingHttpCache[url] = entry
+
         # CONVERT THE RESPONSE TO CSV LIST OF DICTIONARIES
         self.csvDicts = csv.DictReader(
-            response.iter_lines(decode_unicode='utf-8'), dialect='excel', delimiter='|', quotechar='"')
+            lines, dialect='excel', delimiter='|', quotechar='"')
 
         self.log.debug('completed the ``get_csv_data`` method')
         return self.csvDicts
 
+    def _get_http_cache(
+            self):
+        """*get the conditional-GET cache for the survey CSV feeds (False if disabled with the ``http cache`` setting)*
+
+        Also initialises the lists of unchanged feeds and of cache entries waiting to be committed, if they do not exist yet.
+
+        **Return**
+
+        - ``cache`` -- an ``http_cache`` object or *False*
+
+        """
+        if not hasattr(self, "unchangedFeeds"):
+            self.unchangedFeeds = []
+            self.pendingHttpCache = {}
+
+        if self.settings and "http cache" in self.settings and not self.settings["http cache"]:
+            return False
+        if not hasattr(self, "httpCache"):
+            from marshallEngine.feeders.http_cache import http_cache
+            self.httpCache = http_cache(
+                log=self.log,
+                settings=self.settings
+            )
+        return self.httpCache
+
+    def _commit_http_cache(
+            self):
+        """*write the validators of every feed downloaded by this ingester to the conditional-GET cache*
+
+        Call at the very end of a successful ``ingest`` so a feed is only ever marked as seen once its data is in the marshall.
+
+        **Usage**
+
+        ```python
+        self._commit_http_cache()
+        ```
+
+        """
+        self.log.debug('starting the ``_commit_http_cache`` method')
+
+        cache = self._get_http_cache()
+        if cache:
+            for url, entry in list(self.pendingHttpCache.items()):
+                cache.set(url=url, entry=entry)
+        self.pendingHttpCache = {}
+        self.unchangedFeeds = []
+
+        self.log.debug('completed the ``_commit_http_cache`` method')
+        return None
+
+    def _fetch_csv_feeds_concurrently(
+            self,
+            feeds,
+            withinLastDays=False,
+            chunkSize=10000):
+        """*download, parse and clean several CSV feeds in parallel, yielding chunks of cleaned rows as soon as they are ready*
+
+        Each feed is streamed in its own thread over the shared keep-alive HTTP session. Threads only download and clean; the caller consumes the yielded chunks (and so does all database writes) in the main thread. The chunk queue is bounded so memory stays flat when the database is the bottleneck.
+
+        **Key Arguments**
+
+        - ``feeds`` -- a list of dictionaries, one per CSV feed, with ``url``, ``surveyName`` and optional ``user`` and ``pwd`` keys
+        - ``withinLastDays`` -- the lower limit of observations to include (within the last N days from now). Default *False*, i.e. no limit
+        - ``chunkSize`` -- the number of CSV rows to clean at a time. Default *10000*
+
+
+        **Return**
+
+        - a generator of cleaned ``dictList`` chunks (merged from all feeds in the order they arrive)
+
+
+        **Usage**
+
+        ```python
+        feeds = [
+            {"url": summaryUrl, "user": user, "pwd": pwd, "surveyName": "ps13pi"},
+            {"url": recurrenceUrl, "user": user, "pwd": pwd, "surveyName": "ps13pi"}
+        ]
+        for dictList in ingester._fetch_csv_feeds_concurrently(feeds=feeds, withinLastDays=3):
+            ingester.dictList = dictList
+            ingester._import_to_feeder_survey_table()
+        ```
+
+        """
+        self.log.debug(
+            'starting the ``_fetch_csv_feeds_concurrently`` method')
+
+        # INITIALISE THE HTTP CACHE STATE SO IT IS SHARED BY THE THREAD
+        # COPIES BELOW
+        self._get_http_cache()
+
+        chunks = queue.Queue(maxsize=2 * len(feeds))
+        cancelled = threading.Event()
+        feedComplete = object()
+
+        def fetch_one_feed(feed):
+            # EACH THREAD GETS ITS OWN SHALLOW COPY OF THE INGESTER SO THE
+            # csvDicts AND dictList ATTRIBUTES ARE NOT SHARED BETWEEN FEEDS
+            worker = copy.copy(self)
+            try:
+                worker.get_csv_data(
+                    url=feed["url"],
+                    user=feed.get("user", False),
+                    pwd=feed.get("pwd", False),
+                    stream=True
+                )
+                csvReader = worker.csvDicts
+                while not cancelled.is_set():
+                    chunk = list(islice(csvReader, chunkSize))
+                    if not len(chunk):
+                        break
+                    worker.csvDicts = chunk
+                    chunks.put(worker._clean_data_pre_ingest(
+                        surveyName=feed["surveyName"], withinLastDays=withinLastDays))
+            finally:
+                chunks.put(feedComplete)
+
+        executor = ThreadPoolExecutor(max_workers=len(feeds))
+        futures = [executor.submit(fetch_one_feed, f) for f in feeds]
+        remaining = len(feeds)
+        try:
+            while remaining:
+                dictList = chunks.get()
+                if dictList is feedComplete:
+                    remaining -= 1
+                    continue
+                yield dictList
+        finally:
+            # UNBLOCK ANY THREADS STILL WAITING ON A FULL QUEUE
+            cancelled.set()
+            while remaining:
+                if chunks.get() is feedComplete:
+                    remaining -= 1
+            executor.shutdown(wait=True)
+
+        # RE-RAISE ANY DOWNLOAD/PARSING ERRORS IN THE MAIN THREAD
+        for f in futures:
+            f.result()
+
+        self.log.debug(
+            'completed the ``_fetch_csv_feeds_concurrently`` method')
+
     def _import_to_feeder_survey_table(
             self):
         """*import the list of dictionaries (self.dictList) into the marshall feeder survey table*
 
+        With the ``delta ingest`` setting switched on, only rows that are new or have changed since they were last written are sent to the database (see ``row_fingerprints``). Otherwise every row is upserted.
+
         **Return**
 
         - None
@@ -142,23 +368,151 @@ class data(object):
         if not len(self.dictList):
             return
 
-        # USE dbSettings TO ACTIVATE MULTIPROCESSING
-        insert_list_of_dictionaries_into_database_tables(
-            dbConn=self.dbConn,
-            log=self.log,
-            dictList=self.dictList,
-            dbTableName=self.fsTableName,
-            dateModified=True,
-            dateCreated=True,
-            batchSize=2500,
-            replace=True,
-            dbSettings=self.settings["database settings"]
-        )
+        # ONLY WRITE NEW OR CHANGED ROWS IN DELTA MODE
+        dictList = self.dictList
+        fingerprints = self._get_row_fingerprints()
+        if fingerprints:
+            dictList, hashes = fingerprints.filter(dictList=dictList)
+            skipped = len(self.dictList) - len(dictList)
+            fsTableName = self.fsTableName
+            self.log.info(
+                "%(skipped)s unchanged rows skipped for the %(fsTableName)s table" % locals())
+
+        if len(dictList):
+            # USE dbSettings TO ACTIVATE MULTIPROCESSING (EACH BATCH IS LOADED
+            # WITH LOAD DATA LOCAL INFILE)
+            with stage("feeder survey import"):
+                insert_list_of_dictionaries_into_database_tables(
+                    dbConn=self.dbConn,
+                    log=self.log,
+                    dictList=dictList,
+                    dbTableName=self.fsTableName,
+                    dateModified=True,
+                    dateCreated=True,
+                    batchSize=2500,
+                    replace=True,
+                    dbSettings=self.settings["database settings"]
+                )
+
+        # ONLY REMEMBER THE ROWS ONCE THEY ARE SAFELY IN THE DATABASE
+        if fingerprints:
+            fingerprints.record(hashes=hashes)
 
         self.log.debug(
             'completed the ``_import_to_feeder_survey_table`` method')
         return None
 
+    def _get_ingest_journal(
+            self,
+            withinLastDays=False):
+        """*get the checkpoint journal of this ingest (see ``ingest_journal``)*
+
+        If an interrupted run had already imported the feeder survey rows, the HTTP cache entries of the feeds it downloaded are restored so they are still committed when the resumed ingest completes.
+
+        **Key Arguments**
+
+        - ``withinLastDays`` -- the ``withinLastDays`` of the ingest (a journal is only resumed by a run with the same parameters). Default *False*
+
+        **Return**
+
+        - ``journal`` -- an ``ingest_journal`` object
+
+        """
+        from marshallEngine.feeders.ingest_journal import ingest_journal
+        self.ingestJournal = ingest_journal(
+            log=self.log,
+            settings=self.settings,
+            name=self.fsTableName,
+            params={"withinLastDays": withinLastDays,
+                    "drainBacklog": self.drainBacklog}
+        )
+        self._get_http_cache()
+        self.pendingHttpCache.update(self.ingestJournal.artefacts(
+            "feeder survey import").get("pendingHttpCache", {}))
+        return self.ingestJournal
+
+    def _get_row_fingerprints(
+            self):
+        """*get the fingerprint index of the rows already written to the feeder survey table (False unless the ``delta ingest`` setting is switched on)*
+
+        **Return**
+
+        - ``fingerprints`` -- a ``row_fingerprints`` object or *False*
+
+        """
+        if not (self.settings and "delta ingest" in self.settings and self.settings["delta ingest"]):
+            return False
+        if not hasattr(self, "rowFingerprints") or self.rowFingerprints.fsTableName != self.fsTableName:
+            from marshallEngine.feeders.row_fingerprints import row_fingerprints
+            self.rowFingerprints = row_fingerprints(
+                log=self.log,
+                settings=self.settings,
+                fsTableName=self.fsTableName
+            )
+        return self.rowFingerprints
+
+    def _stream_csv_into_feeder_survey_table(
+            self,
+            surveyName,
+            withinLastDays=False,
+            chunkSize=10000):
+        """*clean and import the rows of ``self.csvDicts`` into the marshall feeder survey table in bounded chunks*
+
+        Used with ``get_csv_data(stream=True)`` so memory stays flat and the first rows are upserted into the feeder survey table before the download has finished.
+
+        **Key Arguments**
+
+        - ``surveyName`` -- the survey name passed on to ``_clean_data_pre_ingest``
+        - ``withinLastDays`` -- the lower limit of observations to include (within the last N days from now). Default *False*, i.e. no limit
+        - ``chunkSize`` -- the number of CSV rows to clean and import at a time. Default *10000*
+
+
+        **Return**
+
+        - ``rowCount`` -- the total number of cleaned rows imported into the feeder survey table
+
+
+        **Usage**
+
+        ```python
+        ingester.get_csv_data(
+            url=settings["panstarrs urls"]["ps13pi"]["recurrence csv"],
+            user=settings["credentials"]["ps13pi"]["username"],
+            pwd=settings["credentials"]["ps13pi"]["password"],
+            stream=True
+        )
+        rowCount = ingester._stream_csv_into_feeder_survey_table(
+            surveyName="ps13pi", withinLastDays=3)
+        ```
+
+        """
+        self.log.debug(
+            'starting the ``_stream_csv_into_feeder_survey_table`` method')
+
+        csvReader = self.csvDicts
+        fsTableName = self.fsTableName
+        rowCount = 0
+        while True:
+            chunk = list(islice(csvReader, chunkSize))
+            if not len(chunk):
+                break
+            # THE SURVEY CLEANERS READ FROM self.csvDicts AND WRITE TO
+            # self.dictList
+            self.csvDicts = chunk
+            self._clean_data_pre_ingest(
+                surveyName=surveyName, withinLastDays=withinLastDays)
+            self._import_to_feeder_survey_table()
+            rowCount += len(self.dictList)
+            self.log.info(
+                "%(rowCount)s rows streamed into the %(fsTableName)s table so far" % locals())
+
+        self.csvDicts = []
+        self.dictList = []
+
+        self.log.debug(
+            'completed the ``_stream_csv_into_feeder_survey_table`` method')
+        return rowCount
+
     def insert_into_transientBucket(
             self,
             importUnmatched=True,
@@ -194,42 +548,51 @@ class data(object):
 
         fsTableName = self.fsTableName
 
-        # 1. automatically assign the transientbucket id to feeder survey
-        # detections where the object name is found in the transientbukcet (no
-        # spatial crossmatch required). Copy matched feeder survey rows to the
-        # transientbucket.
-        self._feeder_survey_transientbucket_name_match_and_import()
-
-        # 2. crossmatch remaining unique, unmatched sources in feeder survey
-        # with sources in the transientbucket. Add associated
-        # transientBucketIds to matched feeder survey sources. Copy matched
-        # feeder survey rows to the transientbucket.
-        from HMpTy.mysql import add_htm_ids_to_mysql_database_table
-        add_htm_ids_to_mysql_database_table(
-            raColName="raDeg",
-            declColName="decDeg",
-            tableName="transientBucket",
-            dbConn=self.dbConn,
-            log=self.log,
-            primaryIdColumnName="primaryKeyId",
-            dbSettings=self.settings["database settings"]
-        )
-        unmatched = self._feeder_survey_transientbucket_crossmatch()
-
-        # 3. assign a new transientbucketid to any feeder survey source not
-        # matched in steps 1 & 2. Copy these unmatched feeder survey rows to
-        # the transientbucket as new transient detections.
-        if importUnmatched:
-            self._import_unmatched_feeder_survey_sources_to_transientbucket(
-                unmatched)
-
-        # UPDATE OBSERVATION DATES FROM MJDs
-        sqlQuery = "call update_transientbucket_observation_dates()"
-        writequery(
-            log=self.log,
-            sqlQuery=sqlQuery,
-            dbConn=self.dbConn
-        )
+        # THE TRANSIENTBUCKET SYNC AND SUMMARY UPDATES ARE SHARED BETWEEN ALL
+        # SURVEYS - ONLY ONE INGESTER AT A TIME (ACROSS ALL PROCESSES)
+        from marshallEngine.commonutils import mysql_lock
+        with stage("transientbucket sync"), mysql_lock(log=self.log, dbConn=self.dbConn, lockName="marshall_transientbucket_sync"):
+
+            # 1. automatically assign the transientbucket id to feeder survey
+            # detections where the object name is found in the transientbukcet (no
+            # spatial crossmatch required). Copy matched feeder survey rows to the
+            # transientbucket.
+            with stage("name match"):
+                self._feeder_survey_transientbucket_name_match_and_import()
+
+            # 2. crossmatch remaining unique, unmatched sources in feeder survey
+            # with sources in the transientbucket. Add associated
+            # transientBucketIds to matched feeder survey sources. Copy matched
+            # feeder survey rows to the transientbucket.
+            # ONLY THE TRANSIENTBUCKET ROWS ADDED SINCE THE LAST RUN NEED HTM IDs
+            from marshallEngine.housekeeping.add_new_htm_ids import add_new_htm_ids
+            with stage("htm ids"):
+                add_new_htm_ids(
+                    log=self.log,
+                    dbConn=self.dbConn,
+                    tableName="transientBucket",
+                    primaryIdColumnName="primaryKeyId"
+                )
+            with stage("crossmatch"):
+                unmatched = self._feeder_survey_transientbucket_crossmatch(
+                    importUnmatched=importUnmatched)
+
+            # 3. assign a new transientbucketid to any feeder survey source not
+            # matched in steps 1 & 2. Copy these unmatched feeder survey rows to
+            # the transientbucket as new transient detections.
+            if importUnmatched:
+                with stage("unmatched import"):
+                    self._import_unmatched_feeder_survey_sources_to_transientbucket(
+                        unmatched)
+
+            # UPDATE OBSERVATION DATES FROM MJDs
+            with stage("observation dates"):
+                sqlQuery = "call update_transientbucket_observation_dates()"
+                writequery(
+                    log=self.log,
+                    sqlQuery=sqlQuery,
+                    dbConn=self.dbConn
+                )
 
         # UPDATE THE TRANSIENT BUCKET SUMMARY TABLE IN THE MARSHALL DATABASE
         if updateTransientSummaries:
@@ -238,22 +601,28 @@ class data(object):
             else:
                 transientBucketId = False
             from marshallEngine.housekeeping import update_transient_summaries
-            updater = update_transient_summaries(
-                log=self.log,
-                settings=self.settings,
-                dbConn=self.dbConn,
-                transientBucketId=transientBucketId
-            )
-            updater.update()
+            with stage("transient summaries"), mysql_lock(log=self.log, dbConn=self.dbConn, lockName="marshall_transient_summaries"):
+                updater = update_transient_summaries(
+                    log=self.log,
+                    settings=self.settings,
+                    dbConn=self.dbConn,
+                    transientBucketId=transientBucketId
+                )
+                updater.update()
 
         self.log.debug(
             'completed the ``crossmatch_with_transientBucket`` method')
         return None
 
     def _feeder_survey_transientbucket_name_match_and_import(
-            self):
+            self,
+            fsTableName=False):
         """*automatically assign the transientbucket id to feeder survey detections where the object name is found in the transientbukcet (no spatial crossmatch required). Copy feeder survey rows to the transientbucket.*
 
+        **Key Arguments**
+
+        - ``fsTableName`` -- the feeder survey table to match. Default *False* (``self.fsTableName``)
+
         **Return**
 
         - None
@@ -269,27 +638,79 @@ class data(object):
         self.log.debug(
             'starting the ``_feeder_survey_transientbucket_name_match_and_import`` method')
 
-        fsTableName = self.fsTableName
+        if not fsTableName:
+            fsTableName = self.fsTableName
 
-        # MATCH TRANSIENT BUCKET IDS WITH NAMES FOUND IN FEEDER TABLE, THEN
-        # COPY ROWS TO TRANSIENTBUCKET USING COLUMN MATCH TABLE IN DATABASE
-        sqlQuery = """CALL `sync_marshall_feeder_survey_transientBucketId`('%(fsTableName)s');""" % locals(
-        )
-
-        writequery(
+        columnMap = get_fs_column_map(
             log=self.log,
-            sqlQuery=sqlQuery,
-            dbConn=self.dbConn
+            dbConn=self.dbConn,
+            settings=self.settings
         )
 
+        # ONLY THE UN-INGESTED ROWS WITHOUT A TRANSIENTBUCKETID ARE NAME
+        # MATCHED, AGAINST THE IN-MEMORY INDEX OF KNOWN NAMES AND AKAS - SO
+        # THE COST SCALES WITH THE NEW DETECTIONS, NOT THE SIZE OF THE TABLES
+        if fsTableName == "fs_atlas_forced_phot":
+            nameColumns = ["atlas_designation"]
+            prefix = "ATLAS"
+        else:
+            columns = columnMap.columns(fsTableName=fsTableName)
+            nameColumns = [columns[k]
+                           for k in ("name", "name_alt") if k in columns]
+            prefix = False
+        if len(nameColumns):
+            from marshallEngine.feeders.name_match_index import get_name_match_index
+            index = get_name_match_index(
+                log=self.log,
+                dbConn=self.dbConn,
+                settings=self.settings
+            )
+        for fs_name in nameColumns:
+            sqlQuery = u"""
+                select distinct `%(fs_name)s` as name from `%(fsTableName)s` where ingested = 0 and transientBucketId is null and `%(fs_name)s` is not null
+            """ % locals()
+            rows = readquery(
+                log=self.log,
+                sqlQuery=sqlQuery,
+                dbConn=self.dbConn,
+                quiet=False
+            )
+            nameIds = index.lookup(
+                names=[r["name"] for r in rows],
+                prefix=prefix
+            )
+            self._bulk_update_fs_transientbucket_ids(
+                nameIds=nameIds,
+                onlyWhereNull=True,
+                fsTableName=fsTableName,
+                fs_name=fs_name
+            )
+
+        # COPY THE MATCHED ROWS TO THE TRANSIENTBUCKET IN BULK (AS THE
+        # sync_marshall_feeder_survey_transientBucketId PROCEDURE DOES AFTER
+        # ITS NAME MATCH)
+        for sqlQuery in columnMap.copy_sql(fsTableName=fsTableName):
+            writequery(
+                log=self.log,
+                sqlQuery=sqlQuery,
+                dbConn=self.dbConn
+            )
+
         self.log.debug(
             'completed the ``_feeder_survey_transientbucket_name_match_and_import`` method')
         return None
 
     def _feeder_survey_transientbucket_crossmatch(
-            self):
+            self,
+            importUnmatched=True):
         """*crossmatch remaining unique, unmatched sources in feeder survey with sources in the transientbucket & copy matched feeder survey rows to the transientbucket*
 
+        Only the next 500 un-ingested rows are matched, unless ``self.drainBacklog`` is True, in which case all un-ingested rows are paged through (see ``_drain_feeder_survey_backlog``).
+
+        **Key Arguments**
+
+        - ``importUnmatched`` -- when draining the backlog, import the unmatched sources of each page before matching the next. Default *True*
+
         **Return**
 
         - ``unmatched`` -- a list of the unmatched (i.e. new to the marshall) feeder survey surveys
@@ -301,19 +722,11 @@ class data(object):
         fsTableName = self.fsTableName
 
         # GET THE COLUMN MAP FOR THE FEEDER SURVEY TABLE
-        sqlQuery = u"""
-            SELECT * FROM marshall_fs_column_map where fs_table_name = '%(fsTableName)s' and transientBucket_column in ('name','raDeg','decDeg','limitingMag')
-        """ % locals()
-        rows = readquery(
+        columns = get_fs_column_map(
             log=self.log,
-            sqlQuery=sqlQuery,
             dbConn=self.dbConn,
-            quiet=False
-        )
-
-        columns = {}
-        for row in rows:
-            columns[row["transientBucket_column"]] = row["fs_table_column"]
+            settings=self.settings
+        ).columns(fsTableName=fsTableName)
 
         if "raDeg" not in columns:
             print(f"No coordinates to match in the {fsTableName} table")
@@ -329,94 +742,239 @@ class data(object):
             limitClause = " and %(fs_lim)s = 0 " % locals()
         else:
             limitClause = ""
+
+        if self.drainBacklog:
+            unmatched = self._drain_feeder_survey_backlog(
+                fs_name=fs_name,
+                fs_ra=fs_ra,
+                fs_dec=fs_dec,
+                limitClause=limitClause,
+                importUnmatched=importUnmatched
+            )
+        else:
+            sqlQuery = u"""
+                select %(fs_name)s,  avg(%(fs_ra)s) as %(fs_ra)s, avg(%(fs_dec)s) as %(fs_dec)s from (select * from %(fsTableName)s where ingested = 0   %(limitClause)s  limit 500) as a where %(fs_ra)s is not null and %(fs_dec)s is not null group by %(fs_name)s ;
+            """ % locals()
+
+            rows = readquery(
+                log=self.log,
+                sqlQuery=sqlQuery,
+                dbConn=self.dbConn,
+                quiet=False
+            )
+
+            # STOP IF NO MATCHES
+            if not len(rows):
+                return []
+
+            fs_name_list = [row[fs_name] for row in rows if row[fs_ra]]
+            fs_ra_list = [row[fs_ra] for row in rows if row[fs_ra]]
+            fs_dec_list = [row[fs_dec] for row in rows if row[fs_ra]]
+            unmatched = self._match_feeder_survey_sources(
+                fs_name_list=fs_name_list,
+                fs_ra_list=fs_ra_list,
+                fs_dec_list=fs_dec_list
+            )
+
+        # COPY MATCHED ROWS TO TRANSIENTBUCKET
+        self._feeder_survey_transientbucket_name_match_and_import()
+
+        # THE SYNC PROCEDURE COPIES A LIMITED NUMBER OF ROWS PER CALL - KEEP
+        # CALLING WHILE IT IS STILL MAKING PROGRESS ON THE BACKLOG
+        if self.drainBacklog:
+            remaining = self._count_matched_uningested_rows()
+            while remaining:
+                self._feeder_survey_transientbucket_name_match_and_import()
+                previous = remaining
+                remaining = self._count_matched_uningested_rows()
+                if remaining >= previous:
+                    break
+
+        self.log.debug(
+            'completed the ``_feeder_survey_transientbucket_crossmatch`` method')
+        return unmatched
+
+    def _match_feeder_survey_sources(
+            self,
+            fs_name_list,
+            fs_ra_list,
+            fs_dec_list):
+        """*spatially match unique feeder survey sources against the transientbucket and add the matched transientBucketIds to the feeder survey table*
+
+        **Key Arguments**
+
+        - ``fs_name_list`` -- the feeder survey source names
+        - ``fs_ra_list`` -- the feeder survey source RAs
+        - ``fs_dec_list`` -- the feeder survey source declinations
+
+
+        **Return**
+
+        - ``unmatched`` -- the names of the sources with no match in the transientbucket
+
+        """
+        self.log.debug('starting the ``_match_feeder_survey_sources`` method')
+
+        fsTableName = self.fsTableName
+        fs_name = self.fs_name
+        total = len(fs_name_list)
+
+        print("Matching %(total)s sources in the %(fsTableName)s against the transientBucket table" % locals())
+
+        # MATCH AGAINST THE IN-MEMORY INDEX OF TRANSIENT BUCKET SOURCES (FROM
+        # ALL SURVEYS) - BUILT ONCE PER PROCESS AND TOPPED UP ON LATER CALLS
+        from marshallEngine.feeders.transientbucket_index import get_transientbucket_index
+        index = get_transientbucket_index(
+            log=self.log,
+            dbConn=self.dbConn,
+            settings=self.settings
+        )
+        matchIndies, matches = index.match(
+            ra=fs_ra_list,
+            dec=fs_dec_list,
+            radiusArcsec=3.5
+        )
+
+        # UPDATE MATCHES IN FS TABLE WITH MATCHED TRANSIENTBUCKET IDs
+        originalList = matches.list
+        originalTotal = len(originalList)
+
+        print("Adding %(originalTotal)s new %(fsTableName)s transient detections to the transientBucket table" % locals())
+        if originalTotal:
+            self._bulk_update_fs_transientbucket_ids(
+                nameIds=[(fs_name_list[m], o['transientBucketId'])
+                         for m, o in zip(matchIndies, originalList)],
+                onlyWhereNull=True
+            )
+
+        # RETURN UNMATCHED TRANSIENTS
+        matched = set(matchIndies)
+        unmatched = [v for i, v in enumerate(
+            fs_name_list) if i not in matched]
+
+        self.log.debug('completed the ``_match_feeder_survey_sources`` method')
+        return unmatched
+
+    def _count_matched_uningested_rows(
+            self):
+        """*count the feeder survey rows with a transientBucketId that have not yet been copied to the transientbucket*
+        """
+        fsTableName = self.fsTableName
         sqlQuery = u"""
-            select %(fs_name)s,  avg(%(fs_ra)s) as %(fs_ra)s, avg(%(fs_dec)s) as %(fs_dec)s from (select * from %(fsTableName)s where ingested = 0   %(limitClause)s  limit 500) as a where %(fs_ra)s is not null and %(fs_dec)s is not null group by %(fs_name)s ;
+            select count(*) as count from %(fsTableName)s where ingested = 0 and transientBucketId is not null
         """ % locals()
-
         rows = readquery(
             log=self.log,
             sqlQuery=sqlQuery,
             dbConn=self.dbConn,
             quiet=False
         )
+        return rows[0]["count"]
+
+    def _drain_feeder_survey_backlog(
+            self,
+            fs_name,
+            fs_ra,
+            fs_dec,
+            limitClause="",
+            importUnmatched=True):
+        """*page through every un-ingested, unmatched row of the feeder survey table (keyset pagination on the primary key) and match the unique sources of each page against the transientbucket*
+
+        With ``importUnmatched`` the new sources of each page are imported into the transientbucket before the next page is read, so a later detection of the same transient under another name (or the same name on a later page) is matched to them rather than given a second transientBucketId.
+
+        **Key Arguments**
+
+        - ``fs_name`` -- the feeder survey name column
+        - ``fs_ra`` -- the feeder survey RA column
+        - ``fs_dec`` -- the feeder survey declination column
+        - ``limitClause`` -- extra SQL clause to exclude non-detections. Default *""*
+        - ``importUnmatched`` -- import the unmatched sources of each page as new transients. Default *True*
 
-        # STOP IF NO MATCHES
-        if not len(rows):
-            return []
 
-        # SPLIT INTO BATCHES SO NOT TO OVERWHELM MEMORY
-        batchSize = 200
-        total = len(rows)
-        batches = int(old_div(total, batchSize))
-        start = 0
-        end = 0
-        theseBatches = []
-        for i in range(batches + 1):
-            end = end + batchSize
-            start = i * batchSize
-            thisBatch = rows[start:end]
-            theseBatches.append(thisBatch)
+        **Return**
+
+        - ``unmatched`` -- the names of the sources with no match in the transientbucket that have not been imported (empty with ``importUnmatched``)
+
+        """
+        self.log.debug('starting the ``_drain_feeder_survey_backlog`` method')
+
+        import time
+        fsTableName = self.fsTableName
+        pageSize = self.backlogPageSize
+
+        # THE PRIMARY KEY COLUMN NAME DIFFERS BETWEEN THE FEEDER SURVEY TABLES
+        sqlQuery = u"""
+            SELECT COLUMN_NAME FROM information_schema.KEY_COLUMN_USAGE WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = '%(fsTableName)s' AND CONSTRAINT_NAME = 'PRIMARY'
+        """ % locals()
+        rows = readquery(
+            log=self.log,
+            sqlQuery=sqlQuery,
+            dbConn=self.dbConn,
+            quiet=False
+        )
+        pk = rows[0]["COLUMN_NAME"]
 
+        # SOURCES ALREADY MATCHED OR FOUND TO BE NEW ARE ONLY MATCHED ONCE,
+        # EVEN WHEN THEIR DETECTIONS SPAN PAGES
+        seen = set()
         unmatched = []
-        ticker = 0
-        for batch in theseBatches:
-
-            fs_name_list = []
-            fs_ra_list = []
-            fs_dec_list = []
-            fs_name_list = [row[fs_name] for row in batch if row[fs_ra]]
-            fs_ra_list = [row[fs_ra] for row in batch if row[fs_ra]]
-            fs_dec_list = [row[fs_dec] for row in batch if row[fs_ra]]
-
-            ticker += len(fs_name_list)
-            print("Matching %(ticker)s/%(total)s sources in the %(fsTableName)s against the transientBucket table" % locals())
-
-            # CONESEARCH TRANSIENT BUCKET FOR PRE-KNOWN SOURCES FROM OTHER
-            # SURVEYS
-            from HMpTy.mysql import conesearch
-            cs = conesearch(
+        lastId = 0
+        rowCount = 0
+        startTime = time.time()
+        while True:
+            sqlQuery = u"""
+                select %(pk)s as pk, %(fs_name)s as name, %(fs_ra)s as ra, %(fs_dec)s as decl from %(fsTableName)s where %(pk)s > %(lastId)s and ingested = 0 and transientBucketId is null %(limitClause)s order by %(pk)s limit %(pageSize)s
+            """ % locals()
+            rows = readquery(
                 log=self.log,
+                sqlQuery=sqlQuery,
                 dbConn=self.dbConn,
-                tableName="transientBucket",
-                columns="transientBucketId, name",
-                ra=fs_ra_list,
-                dec=fs_dec_list,
-                radiusArcsec=3.5,
-                separations=True,
-                distinct=True,
-                sqlWhere="masterIDFlag=1",
-                closest=True
+                quiet=False
             )
-            matchIndies, matches = cs.search()
-
-            # CREATE SQL QUERY TO UPDATE MATCHES IN FS TABLE WITH MATCHED
-            # TRANSIENTBUCKET IDs
-            updates = []
-            originalList = matches.list
-            originalTotal = len(originalList)
-
-            print("Adding %(originalTotal)s new %(fsTableName)s transient detections to the transientBucket table" % locals())
-            if originalTotal:
-                updates = []
-                updates[:] = ["update " + fsTableName + " set transientBucketId = " + str(o['transientBucketId']) +
-                              " where " + fs_name + " = '" + str(fs_name_list[m]) + "' and transientBucketId is null;" for m, o in zip(matchIndies, originalList)]
-                updates = ("\n").join(updates)
-                writequery(
-                    log=self.log,
-                    sqlQuery=updates,
-                    dbConn=self.dbConn
+            if not len(rows):
+                break
+            lastId = rows[-1]["pk"]
+            rowCount += len(rows)
+
+            # AVERAGE THE POSITIONS OF EACH NEW SOURCE IN THIS PAGE
+            sources = {}
+            for r in rows:
+                if r["name"] in seen or r["ra"] is None or r["decl"] is None:
+                    continue
+                if r["name"] not in sources:
+                    sources[r["name"]] = [0., 0., 0]
+                s = sources[r["name"]]
+                s[0] += r["ra"]
+                s[1] += r["decl"]
+                s[2] += 1
+            seen.update(sources.keys())
+
+            if len(sources):
+                fs_name_list = list(sources.keys())
+                fs_ra_list = [sources[n][0] / sources[n][2]
+                              for n in fs_name_list]
+                fs_dec_list = [sources[n][1] / sources[n][2]
+                               for n in fs_name_list]
+                pageUnmatched = self._match_feeder_survey_sources(
+                    fs_name_list=fs_name_list,
+                    fs_ra_list=fs_ra_list,
+                    fs_dec_list=fs_dec_list
                 )
+                # NEW TRANSIENTS MUST BE IN THE TRANSIENTBUCKET (AND SO THE
+                # SPATIAL INDEX) BEFORE THE NEXT PAGE IS MATCHED
+                if importUnmatched:
+                    self._import_unmatched_feeder_survey_sources_to_transientbucket(
+                        pageUnmatched)
+                else:
+                    unmatched += pageUnmatched
 
-            # RETURN UNMATCHED TRANSIENTS
-            for i, v in enumerate(fs_name_list):
-                if i not in matchIndies:
-                    unmatched.append(v)
+            rate = rowCount / max(time.time() - startTime, 1e-6)
+            print("%(rowCount)s backlog rows of the %(fsTableName)s table crossmatched (%(rate)0.0f rows/s)" % locals())
 
-        # COPY MATCHED ROWS TO TRANSIENTBUCKET
-        self._feeder_survey_transientbucket_name_match_and_import()
+            if len(rows) < pageSize:
+                break
 
-        self.log.debug(
-            'completed the ``_feeder_survey_transientbucket_crossmatch`` method')
+        self.log.debug('completed the ``_drain_feeder_survey_backlog`` method')
         return unmatched
 
     def _import_unmatched_feeder_survey_sources_to_transientbucket(
@@ -435,38 +993,22 @@ class data(object):
         if not len(unmatched):
             return None
 
-        fsTableName = self.fsTableName
-        fs_name = self.fs_name
-
-        # READ MAX TRANSIENTBUCKET ID FROM TRANSIENTBUCKET
-        sqlQuery = u"""
-            select max(transientBucketId) as maxId from transientBucket
-        """ % locals()
-        rows = readquery(
+        # RESERVE A BLOCK OF NEW TRANSIENTBUCKETIDS (SAFE WITH OTHER INGESTERS
+        # RUNNING AT THE SAME TIME)
+        unmatched = list(dict.fromkeys(unmatched))
+        from marshallEngine.feeders.transientbucket_ids import reserve_transientbucket_ids
+        newIds = reserve_transientbucket_ids(
             log=self.log,
-            sqlQuery=sqlQuery,
-            dbConn=self.dbConn
+            dbConn=self.dbConn,
+            count=len(unmatched)
         )
 
-        if not len(rows) or not rows[0]["maxId"]:
-            maxId = 1
-        else:
-            maxId = rows[0]["maxId"] + 1
-
         # ADD NEW TRANSIENTBUCKETIDS TO FEEDER SURVEY TABLE
-        updates = []
-        newTransientBucketIds = []
-        for u in unmatched:
-            update = "update " + fsTableName + " set transientBucketId = " + \
-                str(maxId) + " where " + fs_name + " = '" + str(u) + "';"
-            updates.append(update)
-            newTransientBucketIds.append(str(maxId))
-            maxId += 1
-        updates = ("\n").join(updates)
-        writequery(
-            log=self.log,
-            sqlQuery=updates,
-            dbConn=self.dbConn
+        nameIds = list(zip(unmatched, newIds))
+        newTransientBucketIds = [str(i) for i in newIds]
+        self._bulk_update_fs_transientbucket_ids(
+            nameIds=nameIds,
+            onlyWhereNull=False
         )
 
         # COPY FEEDER SURVEY ROWS TO TRANSIENTBUCKET
@@ -495,6 +1037,94 @@ class data(object):
             'completed the ``_import_unmatched_feeder_survey_sources_to_transientbucket`` method')
         return None
 
+    def _bulk_update_fs_transientbucket_ids(
+            self,
+            nameIds,
+            onlyWhereNull=True,
+            fsTableName=False,
+            fs_name=False):
+        """*set the transientBucketIds of feeder survey sources with a single JOIN-based UPDATE via a temporary staging table*
+
+        **Key Arguments**
+
+        - ``nameIds`` -- list of (feeder survey source name, transientBucketId) tuples
+        - ``onlyWhereNull`` -- only set the transientBucketId of rows that do not have one yet. Default *True*
+        - ``fsTableName`` -- the feeder survey table to update. Default *False* (``self.fsTableName``)
+        - ``fs_name`` -- the feeder survey name column to join on. Default *False* (``self.fs_name``)
+
+
+        **Usage**
+
+        ```python
+        self._bulk_update_fs_transientbucket_ids(
+            nameIds=[("ATLAS20abc", 12345), ("ATLAS20abd", 12346)],
+            onlyWhereNull=True
+        )
+        ```
+
+        """
+        self.log.debug(
+            'starting the ``_bulk_update_fs_transientbucket_ids`` method')
+
+        if not len(nameIds):
+            return None
+
+        if not fsTableName:
+            fsTableName = self.fsTableName
+        if not fs_name:
+            fs_name = self.fs_name
+
+        # ONE ID PER NAME (FIRST WINS)
+        uniqueIds = {}
+        for n, i in nameIds:
+            if n not in uniqueIds:
+                uniqueIds[n] = i
+        nameIds = list(uniqueIds.items())
+
+        # CREATE A TEMPORY STAGING TABLE WITH THE SAME NAME COLUMN TYPE (AND
+        # COLLATION) AS THE FEEDER SURVEY TABLE
+        import random
+        from datetime import datetime
+        rand = random.randint(0, 10000)
+        tmpTable = datetime.now().strftime(f"tmp_ids_%Y%m%dt%H%M%S%f{rand}")
+        sqlQueries = [
+            """CREATE TEMPORARY TABLE %(tmpTable)s SELECT %(fs_name)s AS name, transientBucketId FROM %(fsTableName)s WHERE 1=0;""" % locals(),
+            """ALTER TABLE %(tmpTable)s ADD INDEX (name);""" % locals()
+        ]
+        for sqlQuery in sqlQueries:
+            writequery(
+                log=self.log,
+                sqlQuery=sqlQuery,
+                dbConn=self.dbConn
+            )
+
+        sqlQuery = """INSERT INTO %(tmpTable)s (name, transientBucketId) VALUES (%%s, %%s)""" % locals()
+        writequery(
+            log=self.log,
+            sqlQuery=sqlQuery,
+            dbConn=self.dbConn,
+            manyValueList=nameIds
+        )
+
+        if onlyWhereNull:
+            nullClause = "WHERE f.transientBucketId IS NULL"
+        else:
+            nullClause = ""
+        sqlQueries = [
+            """UPDATE %(fsTableName)s f JOIN %(tmpTable)s t ON f.%(fs_name)s = t.name SET f.transientBucketId = t.transientBucketId %(nullClause)s;""" % locals(),
+            """DROP TEMPORARY TABLE %(tmpTable)s;""" % locals()
+        ]
+        for sqlQuery in sqlQueries:
+            writequery(
+                log=self.log,
+                sqlQuery=sqlQuery,
+                dbConn=self.dbConn
+            )
+
+        self.log.debug(
+            'completed the ``_bulk_update_fs_transientbucket_ids`` method')
+        return None
+
     # use the tab-trigger below for new method
     def clean_up(
             self):
@@ -530,12 +1160,13 @@ class data(object):
             "CALL update_transient_akas(1); "
         ]
 
-        for sqlQuery in sqlQueries:
-            writequery(
-                log=self.log,
-                sqlQuery=sqlQuery,
-                dbConn=self.dbConn
-            )
+        with stage("clean up"):
+            for sqlQuery in sqlQueries:
+                writequery(
+                    log=self.log,
+                    sqlQuery=sqlQuery,
+                    dbConn=self.dbConn
+                )
 
         self.log.debug('completed the ``clean_up`` method')
         return None
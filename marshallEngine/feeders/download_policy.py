@@ -0,0 +1,346 @@
+#!/usr/local/bin/python
+# encoding: utf-8
+"""
+*Adaptive timeouts, retries with backoff and a persistent failure count for image stamp downloads*
+
+:Author:
+    David Young
+"""
+from marshallEngine.commonutils.getstatepath import getstatepath
+from collections import deque
+from urllib.parse import urlparse
+from builtins import object
+import requests
+import threading
+import random
+import json
+import time
+import os
+os.environ['TERM'] = 'vt100'
+
+# RECENT RESPONSE TIMES AND CIRCUIT-BREAKER STATE OF EACH HOST, SHARED BY
+# EVERY DOWNLOAD IN THE PROCESS (SO A LONG-RUNNING DAEMON KEEPS LEARNING)
+_latencies = {}
+_breakers = {}
+_lock = threading.Lock()
+
+
+class host_unavailable(requests.exceptions.ConnectionError):
+    """*the host's circuit breaker is open - the url was not requested*
+    """
+    pass
+
+
+class download_policy(object):
+    """
+    *the retry policy for image stamp downloads*
+
+    - **adaptive timeouts** -- each host's timeout is ``timeoutMultiplier`` times the 95th percentile of its recent response times (kept between ``minTimeout`` and ``maxTimeout``). Only completed responses are counted, so timeouts never push a host's timeout up.
+    - **backoff** -- timeouts, connection errors and 429/5xx responses are retried up to ``maxAttempts`` times within the run, after a jittered exponential backoff. No more than ``maxConnectionsPerHost`` requests are in flight to a host at once, and a host's slot is released while backing off.
+    - **circuit breaker** -- once ``breakerThreshold`` requests in a row to a host have failed, the host is not requested again for ``breakerSeconds``. Its stamps fail straight away (status 0, not counted as url failures) so a dead server cannot stall the run.
+    - **failure counts** -- URLs that still fail are counted in ``<state-directory>/stamps/failures.json`` (merged under a file lock when saved, so parallel survey imports keep each other's counts). Once a URL has failed in ``stamp max failures`` runs (setting, default 5) it is reported as not existing (status 2) without being requested again, so the stamp drops out of the backlog.
+
+    **Key Arguments**
+
+    - ``log`` -- logger
+    - ``settings`` -- the settings dictionary
+    - ``maxConnectionsPerHost`` -- the most concurrent requests to a single host. Default *4*
+
+    **Usage**
+
+    ```python
+    from marshallEngine.feeders.download_policy import download_policy
+    policy = download_policy(
+        log=log,
+        settings=settings
+    )
+    status = download_stamp(
+        log=log,
+        url=url,
+        pathToWriteFile=pathToWriteFile,
+        session=session,
+        policy=policy
+    )
+    policy.save()
+    ```
+
+    """
+    # TIMEOUT LIMITS (SEC), AND THE TIMEOUT OF A HOST WITH NO HISTORY
+    minTimeout = 1.0
+    maxTimeout = 30.0
+    initialTimeout = 3.0
+    timeoutMultiplier = 3.0
+    # NUMBER OF RECENT RESPONSE TIMES KEPT PER HOST
+    latencyWindow = 200
+    # ATTEMPTS PER URL WITHIN A RUN AND THE BACKOFF BETWEEN THEM (SEC)
+    maxAttempts = 3
+    baseDelay = 0.5
+    maxDelay = 10.0
+    # CONSECUTIVE FAILURES THAT OPEN A HOST'S CIRCUIT BREAKER, AND HOW LONG IT
+    # STAYS OPEN (SEC)
+    breakerThreshold = 5
+    breakerSeconds = 300
+    # RESPONSE CODES WORTH RETRYING
+    retryStatusCodes = (429, 500, 502, 503, 504)
+    # FORGET FAILURES OF URLS NOT TRIED FOR THIS MANY DAYS
+    forgetAfterDays = 30
+
+    def __init__(
+            self,
+            log,
+            settings=False,
+            maxConnectionsPerHost=4
+    ):
+        self.log = log
+        log.debug("instansiating a new 'download_policy' object")
+        self.settings = settings
+        self.maxConnectionsPerHost = maxConnectionsPerHost
+        self.hostSlots = {}
+
+        if settings and "stamp max failures" in settings and settings["stamp max failures"]:
+            self.maxFailures = int(settings["stamp max failures"])
+        else:
+            self.maxFailures = 5
+
+        self.path = os.path.join(getstatepath(
+            settings=settings, folder="stamps"), "failures.json")
+        self.failures = {}
+        # URL -> FAILURE ENTRY (OR None IF IT HAS SINCE DOWNLOADED) CHANGED
+        # IN THIS RUN
+        self.changed = {}
+        self.failureLock = threading.Lock()
+        self._load()
+
+        return None
+
+    def timeout(
+            self,
+            url):
+        """*the current timeout (sec) for the url's host*
+        """
+        host = urlparse(url).netloc
+        with _lock:
+            latencies = list(_latencies.get(host, []))
+        if not len(latencies):
+            return self.initialTimeout
+        latencies.sort()
+        p95 = latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))]
+        return min(self.maxTimeout, max(self.minTimeout, self.timeoutMultiplier * p95))
+
+    def get(
+            self,
+            url,
+            session=None):
+        """*GET a url with the adaptive timeout, retrying timeouts, connection errors and 429/5xx responses with jittered exponential backoff*
+
+        **Key Arguments**
+
+        - ``url`` -- the url to get
+        - ``session`` -- a ``requests.Session`` to download with. Default *None*
+
+        **Return**
+
+        - ``response`` -- the final response (raises the final ``requests`` exception if every attempt failed, or ``host_unavailable`` if the host's circuit breaker is open)
+        """
+        host = urlparse(url).netloc
+        with _lock:
+            if host not in self.hostSlots:
+                self.hostSlots[host] = threading.BoundedSemaphore(
+                    self.maxConnectionsPerHost)
+        for attempt in range(self.maxAttempts):
+            if self._breaker_open(host):
+                raise host_unavailable(
+                    "%(host)s has failed too often - not requesting %(url)s" % locals())
+            timeout = self.timeout(url)
+            # ONLY HOLD THE HOST'S SLOT FOR THE REQUEST ITSELF, NOT THE BACKOFF
+            with self.hostSlots[host]:
+                start = time.time()
+                try:
+                    response = (session or requests).get(
+                        url=url,
+                        timeout=timeout
+                    )
+                except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
+                    response = None
+                    error = e
+
+            if response is None:
+                self._record_host_failure(host)
+                if attempt + 1 == self.maxAttempts:
+                    raise error
+                self._backoff(attempt)
+                continue
+
+            self._record_latency(host, time.time() - start)
+            if response.status_code in self.retryStatusCodes:
+                self._record_host_failure(host)
+                if attempt + 1 < self.maxAttempts:
+                    self._backoff(attempt)
+                    continue
+            else:
+                self._record_host_success(host)
+            return response
+        return response
+
+    def given_up(
+            self,
+            url):
+        """*has the url failed in too many runs to be worth requesting?*
+        """
+        with self.failureLock:
+            entry = self.failures.get(url)
+        return bool(entry) and entry["failures"] >= self.maxFailures
+
+    def record_failure(
+            self,
+            url):
+        """*count a failed download of the url*
+
+        **Return**
+
+        - ``status`` -- the stamp status to report: 0 (try again next run) or, once the url has failed ``maxFailures`` times, 2 (does not exist)
+        """
+        with self.failureLock:
+            entry = self.failures.setdefault(url, {"failures": 0})
+            entry["failures"] += 1
+            entry["last"] = time.time()
+            self.changed[url] = dict(entry)
+            failures = entry["failures"]
+        if failures >= self.maxFailures:
+            self.log.info(
+                "giving up on %(url)s after %(failures)s failed downloads" % locals())
+            return 2
+        return 0
+
+    def record_success(
+            self,
+            url):
+        """*forget the failures of a url that has now downloaded*
+        """
+        with self.failureLock:
+            if self.failures.pop(url, None) is not None:
+                self.changed[url] = None
+        return None
+
+    def save(
+            self):
+        """*merge this run's changes into the failure counts in the state directory*
+
+        The file is re-read and updated under an exclusive lock, so policies saving from parallel processes (e.g. ``import-all`` running the surveys side by side) keep each other's counts.
+        """
+        self.log.debug('starting the ``save`` method')
+
+        import fcntl
+        with self.failureLock:
+            if not len(self.changed):
+                return None
+            with open(self.path + ".lock", "w") as lockFile:
+                fcntl.flock(lockFile, fcntl.LOCK_EX)
+                try:
+                    failures = self._read()
+                    for url, entry in self.changed.items():
+                        if entry is None:
+                            failures.pop(url, None)
+                        elif url in failures:
+                            # ANOTHER PROCESS COUNTED FAILURES OF THE SAME URL
+                            failures[url] = {"failures": max(entry["failures"], failures[url].get(
+                                "failures", 0)), "last": max(entry["last"], failures[url].get("last", 0))}
+                        else:
+                            failures[url] = entry
+                    cutoff = time.time() - self.forgetAfterDays * 86400.
+                    failures = {u: e for u, e in failures.items()
+                                if e.get("last", 0) > cutoff}
+                    # WRITE TO A TEMP FILE AND MOVE INTO PLACE SO A CRASH NEVER
+                    # LEAVES A HALF-WRITTEN FILE
+                    tmpPath = "%s.%s.tmp" % (self.path, os.getpid())
+                    with open(tmpPath, "w") as f:
+                        json.dump(failures, f)
+                    os.replace(tmpPath, self.path)
+                finally:
+                    fcntl.flock(lockFile, fcntl.LOCK_UN)
+            self.failures = failures
+            self.changed = {}
+
+        self.log.debug('completed the ``save`` method')
+        return None
+
+    def _load(
+            self):
+        """*read the failure counts of previous runs*
+        """
+        self.failures = self._read()
+        return None
+
+    def _read(
+            self):
+        """*the failure counts currently in the state directory*
+        """
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except Exception as e:
+            self.log.warning(
+                "could not read the stamp failure counts %s (%s) - starting afresh" % (self.path, e))
+            return {}
+
+    def _record_latency(
+            self,
+            host,
+            seconds):
+        """*add a response time to the host's history*
+        """
+        with _lock:
+            if host not in _latencies:
+                _latencies[host] = deque(maxlen=self.latencyWindow)
+            _latencies[host].append(seconds)
+        return None
+
+    def _breaker_open(
+            self,
+            host):
+        """*is the host's circuit breaker open?*
+        """
+        with _lock:
+            breaker = _breakers.get(host)
+            return bool(breaker) and breaker["openUntil"] > time.time()
+
+    def _record_host_failure(
+            self,
+            host):
+        """*count a failed request to the host, opening its circuit breaker after too many in a row*
+        """
+        with _lock:
+            breaker = _breakers.setdefault(
+                host, {"failures": 0, "openUntil": 0})
+            breaker["failures"] += 1
+            # AFTER THE BREAKER CLOSES A SINGLE FURTHER FAILURE REOPENS IT
+            if breaker["failures"] >= self.breakerThreshold and breaker["openUntil"] <= time.time():
+                breaker["openUntil"] = time.time() + self.breakerSeconds
+                failures = breaker["failures"]
+                breakerSeconds = self.breakerSeconds
+                self.log.warning(
+                    "%(host)s has failed %(failures)s times in a row - not requesting it for %(breakerSeconds)s sec" % locals())
+        return None
+
+    def _record_host_success(
+            self,
+            host):
+        """*close the host's circuit breaker*
+        """
+        with _lock:
+            _breakers.pop(host, None)
+        return None
+
+    def _backoff(
+            self,
+            attempt):
+        """*sleep for a jittered, exponentially growing delay before the next attempt*
+        """
+        delay = min(self.maxDelay, self.baseDelay * 2 ** attempt)
+        time.sleep(delay * random.uniform(0.5, 1.5))
+        return None
+
+    # use the tab-trigger below for new method
+    # xt-class-method
@@ -0,0 +1,260 @@
+#!/usr/local/bin/python
+# encoding: utf-8
+"""
+*An in-memory registry of the feeder survey table to transientBucket column map (``marshall_fs_column_map``)*
+
+:Author:
+    David Young
+"""
+from marshallEngine.commonutils.run_report import readquery
+from builtins import object
+import threading
+import os
+os.environ['TERM'] = 'vt100'
+
+# ONE REGISTRY PER PROCESS AND DATABASE
+_registries = {}
+_lock = threading.Lock()
+
+
+def get_fs_column_map(
+        log,
+        dbConn,
+        settings=False):
+    """*get the column-map registry for this process, loading it on first use*
+
+    **Key Arguments**
+
+    - ``log`` -- logger
+    - ``dbConn`` -- the marshall database connection
+    - ``settings`` -- the settings dictionary
+
+
+    **Return**
+
+    - ``registry`` -- a ``fs_column_map`` object
+
+
+    **Usage**
+
+    ```python
+    from marshallEngine.feeders.fs_column_map import get_fs_column_map
+    columnMap = get_fs_column_map(
+        log=log,
+        dbConn=dbConn,
+        settings=settings
+    )
+    columns = columnMap.columns(fsTableName="fs_atlas")
+    ```
+    """
+    dbSettings = settings and "database settings" in settings and settings[
+        "database settings"] or {}
+    key = (os.getpid(), dbSettings.get("host"), dbSettings.get("db"))
+    with _lock:
+        if key not in _registries:
+            _registries[key] = fs_column_map(
+                log=log,
+                dbConn=dbConn
+            )
+        registry = _registries[key]
+        registry.dbConn = dbConn
+    return registry
+
+
+def invalidate_fs_column_maps():
+    """*force every column-map registry in this process to reload from the database on next use (call after changing ``marshall_fs_column_map`` or an fs table's columns)*
+    """
+    with _lock:
+        for registry in _registries.values():
+            registry.invalidate()
+    return None
+
+
+class fs_column_map(object):
+    """
+    *The whole ``marshall_fs_column_map`` table, loaded once, validated against the database schema and served from memory*
+
+    Mappings to columns that do not exist in the feeder survey table or the transientBucket are logged and left out. The registry also generates the SQL that copies name-matched feeder survey rows into the transientBucket (the part of the ``sync_marshall_feeder_survey_transientBucketId`` stored procedure after its name match, which is done in memory by the ``name_match_index``), so the procedure's column-map lookups are not repeated on every call.
+
+    **Key Arguments**
+
+    - ``log`` -- logger
+    - ``dbConn`` -- the marshall database connection
+
+    **Usage**
+
+    Use ``get_fs_column_map`` to share one registry per process.
+
+    ```python
+    from marshallEngine.feeders.fs_column_map import fs_column_map
+    columnMap = fs_column_map(
+        log=log,
+        dbConn=dbConn
+    )
+    for sqlQuery in columnMap.copy_sql(fsTableName="fs_atlas"):
+        writequery(log=log, sqlQuery=sqlQuery, dbConn=dbConn)
+    ```
+
+    """
+    # THE SHERLOCK LOOKBACK WINDOW USED BY THE
+    # sync_marshall_feeder_survey_transientBucketId PROCEDURE
+    sherlockInterval = "3 DAY"
+
+    def __init__(
+            self,
+            log,
+            dbConn
+    ):
+        self.log = log
+        log.debug("instansiating a new 'fs_column_map' object")
+        self.dbConn = dbConn
+        self.maps = None
+
+        return None
+
+    def invalidate(
+            self):
+        """*drop the cached map so it is reloaded on next use*
+        """
+        self.maps = None
+        return None
+
+    def load(
+            self):
+        """*load and validate the whole column map (two queries)*
+        """
+        self.log.debug('starting the ``load`` method')
+
+        rows = readquery(
+            log=self.log,
+            sqlQuery="""SELECT primaryId, fs_table_name, fs_survey_name, transientBucket_column, fs_table_column FROM marshall_fs_column_map ORDER BY primaryId""",
+            dbConn=self.dbConn
+        )
+        tableNames = set([r["fs_table_name"] for r in rows])
+        tableNames.add("transientBucket")
+        tableList = "','".join(tableNames)
+        schema = readquery(
+            log=self.log,
+            sqlQuery="""SELECT TABLE_NAME, COLUMN_NAME FROM information_schema.COLUMNS WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME IN ('%(tableList)s')""" % locals(),
+            dbConn=self.dbConn
+        )
+        tableColumns = {}
+        for s in schema:
+            tableColumns.setdefault(s["TABLE_NAME"].lower(), set()).add(
+                s["COLUMN_NAME"].lower())
+        tbColumns = tableColumns.get("transientbucket", set())
+
+        maps = {}
+        for r in rows:
+            fsTableName = r["fs_table_name"]
+            if fsTableName not in maps:
+                # THE PROCEDURE TAKES THE SURVEY NAME FROM THE FIRST ROW
+                maps[fsTableName] = {
+                    "survey": r["fs_survey_name"], "rows": []}
+            fsColumns = tableColumns.get(fsTableName.lower())
+            fsColumn = r["fs_table_column"]
+            tbColumn = r["transientBucket_column"]
+            if fsColumns is None:
+                continue
+            if fsColumn.lower() not in fsColumns:
+                self.log.warning(
+                    "marshall_fs_column_map: %(fsTableName)s has no `%(fsColumn)s` column - mapping ignored" % locals())
+                continue
+            if tbColumn and tbColumn != "name_alt" and tbColumn.lower() not in tbColumns:
+                self.log.warning(
+                    "marshall_fs_column_map: transientBucket has no `%(tbColumn)s` column (mapped from %(fsTableName)s.%(fsColumn)s) - mapping ignored" % locals())
+                continue
+            maps[fsTableName]["rows"].append(r)
+
+        self.maps = maps
+
+        self.log.debug('completed the ``load`` method')
+        return None
+
+    def columns(
+            self,
+            fsTableName):
+        """*the map of transientBucket column to feeder survey table column for a table*
+
+        **Key Arguments**
+
+        - ``fsTableName`` -- the feeder survey table
+
+        **Return**
+
+        - ``columns`` -- dictionary of transientBucket column name to fs table column name (empty if the table is not in the map)
+        """
+        if self.maps is None:
+            self.load()
+        if fsTableName not in self.maps:
+            return {}
+        return {r["transientBucket_column"]: r["fs_table_column"] for r in self.maps[fsTableName]["rows"] if r["transientBucket_column"]}
+
+    def survey(
+            self,
+            fsTableName):
+        """*the survey name written to the transientBucket for a feeder survey table (or None)*
+        """
+        if self.maps is None:
+            self.load()
+        if fsTableName not in self.maps:
+            return None
+        return self.maps[fsTableName]["survey"]
+
+    def copy_sql(
+            self,
+            fsTableName):
+        """*the queries that copy the matched feeder survey rows into the transientBucket, flag them as ingested and queue recently updated transients for sherlock classification (the procedure after its name match)*
+
+        **Key Arguments**
+
+        - ``fsTableName`` -- the feeder survey table
+
+        **Return**
+
+        - ``sqlQueries`` -- list of SQL queries (empty for ``astronotes_transients``, which is only name matched)
+        """
+        if fsTableName == "astronotes_transients":
+            return []
+
+        sqlQueries = []
+        importQuery = self._import_sql(fsTableName=fsTableName)
+        if importQuery:
+            sqlQueries.append(importQuery)
+        sherlockInterval = self.sherlockInterval
+        sqlQueries += [
+            """update `%(fsTableName)s` set ingested = 1 where transientBucketId is not null and ingested = 0  limit 50000""" % locals(),
+            """insert into sherlock_classifications (transient_object_id) select distinct transientBucketId from transientBucketSummaries where dateLastModified > NOW() - INTERVAL %(sherlockInterval)s ON DUPLICATE KEY UPDATE  transient_object_id = transientBucketId;""" % locals()
+        ]
+        return sqlQueries
+
+    def _import_sql(
+            self,
+            fsTableName):
+        """*the INSERT query that copies matched, un-ingested feeder survey rows into the transientBucket (None if the table has no column map)*
+
+        **Key Arguments**
+
+        - ``fsTableName`` -- the feeder survey table
+
+        **Return**
+
+        - ``sqlQuery`` -- the SQL query
+        """
+        if self.maps is None:
+            self.load()
+        if fsTableName not in self.maps:
+            return None
+        rows = [r for r in self.maps[fsTableName]["rows"]
+                if r["transientBucket_column"] and r["transientBucket_column"] != "name_alt"]
+        if not len(rows):
+            return None
+        tbColumns = ", ".join(["`%s`" % r["transientBucket_column"]
+                               for r in rows])
+        fsColumns = ", ".join(["`%s`" % r["fs_table_column"] for r in rows])
+        survey = self.survey(fsTableName=fsTableName)
+        if survey is not None:
+            survey = survey.replace('"', '\\"')
+            tbColumns += ", survey"
+            fsColumns += ', "%(survey)s"' % locals()
+        return """insert ignore into transientBucket (transientBucketId, %(tbColumns)s) select transientBucketId, %(fsColumns)s from `%(fsTableName)s` where ingested = 0 and transientBucketId is not null limit 100000;""" % locals()
@@ -0,0 +1,135 @@
+#!/usr/local/bin/python
+# encoding: utf-8
+"""
+*An on-disk conditional-GET cache for the survey CSV endpoints*
+
+:Author:
+    David Young
+"""
+from marshallEngine.commonutils import getstatepath
+from datetime import datetime
+import hashlib
+import json
+import os
+os.environ['TERM'] = 'vt100'
+
+
+class http_cache(object):
+    """
+    *An on-disk cache of the HTTP validators (ETag/Last-Modified, or a content hash as fallback) last seen for each survey CSV URL*
+
+    **Key Arguments**
+
+    - ``log`` -- logger
+    - ``settings`` -- the settings dictionary
+
+    **Usage**
+
+    ```python
+    from marshallEngine.feeders.http_cache import http_cache
+    cache = http_cache(
+        log=log,
+        settings=settings
+    )
+    headers = cache.conditional_headers(url=url)
+    response = session.get(url=url, headers=headers)
+    if response.status_code == 304:
+        print("the feed has not changed since it was last ingested")
+    ```
+
+    """
+
+    def __init__(
+            self,
+            log,
+            settings=False
+    ):
+        self.log = log
+        log.debug("instansiating a new 'http_cache' object")
+        self.settings = settings
+        self.cacheDirectory = getstatepath(
+            settings=settings, folder="http-cache")
+
+        return None
+
+    def get(
+            self,
+            url):
+        """*get the cached validators for a URL*
+
+        **Key Arguments**
+
+        - ``url`` -- the URL of the feed
+
+
+        **Return**
+
+        - ``entry`` -- dictionary of cached validators (``etag``, ``lastModified`` and/or ``sha256``). Empty if the URL has not been cached.
+
+        """
+        try:
+            with open(self._path(url)) as f:
+                return json.load(f)
+        except (IOError, ValueError):
+            return {}
+
+    def set(
+            self,
+            url,
+            entry):
+        """*write the validators for a URL to the cache*
+
+        Only call this once the data from the URL has been successfully ingested, otherwise a crashed run could mark an un-ingested feed as seen.
+
+        **Key Arguments**
+
+        - ``url`` -- the URL of the feed
+        - ``entry`` -- dictionary of validators to cache
+
+        """
+        entry = dict(entry)
+        entry["url"] = url
+        entry["dateCached"] = datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%S")
+
+        # WRITE TO A TEMP FILE AND MOVE INTO PLACE SO A CRASH NEVER LEAVES A
+        # HALF-WRITTEN ENTRY
+        path = self._path(url)
+        tmpPath = path + ".tmp%s" % (os.getpid(),)
+        with open(tmpPath, "w") as f:
+            json.dump(entry, f)
+        os.replace(tmpPath, path)
+        return None
+
+    def conditional_headers(
+            self,
+            url):
+        """*get the ``If-None-Match``/``If-Modified-Since`` request headers for a URL*
+
+        **Key Arguments**
+
+        - ``url`` -- the URL of the feed
+
+
+        **Return**
+
+        - ``headers`` -- dictionary of conditional request headers (empty if nothing is cached)
+
+        """
+        entry = self.get(url)
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("lastModified"):
+            headers["If-Modified-Since"] = entry["lastModified"]
+        return headers
+
+    def _path(
+            self,
+            url):
+        """*the path to the cache file for a URL*
+        """
+        key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.cacheDirectory, key + ".json")
+
+    # use the tab-trigger below for new method
+    # xt-class-method
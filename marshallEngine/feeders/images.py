@@ -8,13 +8,14 @@
 """
 from __future__ import print_function
 from __future__ import division
-from fundamentals.mysql import writequery
+from marshallEngine.commonutils.run_report import writequery
 from fundamentals import fmultiprocess
-import codecs
 from requests.auth import HTTPBasicAuth
 import requests
-from fundamentals.mysql import readquery
+from marshallEngine.commonutils.run_report import readquery
 from fundamentals import tools
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from marshallEngine.feeders.stamp_store import store_stamp
 from builtins import str
 from builtins import zip
 from builtins import object
@@ -38,7 +39,16 @@ class images(object):
         ....
     ```
 
+    Stamps are downloaded concurrently by a pool of ``downloadThreads`` threads over the shared keep-alive HTTP session, with no more than ``maxConnectionsPerHost`` requests in flight to any one host. Timeouts, retries and give-ups follow the ``download_policy``. The outcome of each stamp is written back to its pesstoObjects flag column by a ``stamp_status_writer`` as the downloads complete (every ``statusBatchSize`` transients or ``statusFlushSeconds`` seconds).
+
     """
+    # NUMBER OF STAMPS DOWNLOADED AT ONCE
+    downloadThreads = 16
+    # MAXIMUM CONCURRENT REQUESTS TO A SINGLE IMAGE SERVER
+    maxConnectionsPerHost = 4
+    # WRITE DOWNLOAD OUTCOMES TO THE DATABASE EVERY N TRANSIENTS OR N SECONDS
+    statusBatchSize = 200
+    statusFlushSeconds = 30
 
     def cache(
             self,
@@ -118,6 +128,8 @@ class images(object):
             failedImage=False):
         """*get lists of the transientBucketIds and images needing cached for those transients*
 
+        A single query returns a manifest of every transient with at least one stamp needing cached, with all four image urls aligned by transientBucketId (the url is NULL for image types the survey does not have, or that do not need caching for that transient).
+
         **Key Arguments**
 
         - ``failedImage`` -- second pass attempt to download alternative image for transients
@@ -130,99 +142,106 @@ class images(object):
         """
         self.log.debug('starting the ``_list_images_needing_cached`` method')
 
-        subtractedUrls, targetUrls, referenceUrls, tripletUrls = [], [], [], []
-        for imageType, v in list(self.stampFlagColumns.items()):
-            if not v:
-                continue
-            imageUrl = imageType + "ImageUrl"
-            # CREATE THE STAMP WHERE CLAUSE
-            if not failedImage:
-                stampWhere = v + " IS NULL "
-            else:
-                stampWhere = v + " = 2 "
+        imageTypes = ["subtracted", "target", "reference", "triplet"]
+        flagColumns = [(t, self.stampFlagColumns.get(t))
+                       for t in imageTypes if self.stampFlagColumns.get(t)]
+        if not len(flagColumns):
+            self.transientBucketIds = []
+            return [], [], [], [], []
 
-            # CREATE THE SURVEY WHERE CLAUSE
-            dbSurveyNames = "t.survey LIKE '%%" + \
-                ("%%' OR t.survey LIKE '%%").join(self.dbSurveyNames) + "%%'"
+        # CREATE THE STAMP WHERE CLAUSE
+        if not failedImage:
+            stampWhere = " IS NULL "
+        else:
+            stampWhere = " = 2 "
 
-            # NOW GENERATE SQL TO GET THE URLS OF STAMPS NEEDING DOWNLOADED
-            if self.survey == "useradded":
-                sqlQuery = u"""
+        # CREATE THE SURVEY WHERE CLAUSE
+        dbSurveyNames = "t.survey LIKE '%%" + \
+            ("%%' OR t.survey LIKE '%%").join(self.dbSurveyNames) + "%%'"
+
+        # ONE URL COLUMN PER IMAGE TYPE - THE URL IF THE STAMP NEEDS CACHED,
+        # OTHERWISE NULL
+        if self.survey == "useradded":
+            alias = "a"
+        else:
+            alias = "t"
+        urlColumns = []
+        for imageType in imageTypes:
+            column = self.stampFlagColumns.get(imageType)
+            imageUrl = imageType + "ImageUrl"
+            if column:
+                urlColumns.append(
+                    "MAX(IF(p.%(column)s %(stampWhere)s, %(alias)s.%(imageUrl)s, NULL)) AS %(imageUrl)s" % locals())
+            else:
+                urlColumns.append("NULL AS %(imageUrl)s" % locals())
+        urlColumns = ", ".join(urlColumns)
+        # A TRANSIENT IS LISTED IF ANY OF ITS STAMPS NEEDS CACHED
+        needed, neededDetections = [], []
+        for imageType, column in flagColumns:
+            imageUrl = imageType + "ImageUrl"
+            needed.append(
+                "(p.%(column)s %(stampWhere)s AND %(alias)s.%(imageUrl)s IS NOT NULL)" % locals())
+            neededDetections.append(
+                "(p.%(column)s %(stampWhere)s AND t.%(imageUrl)s IS NOT NULL)" % locals())
+        needed = " OR ".join(needed)
+        neededDetections = " OR ".join(neededDetections)
+
+        # NOW GENERATE SQL TO GET THE URLS OF STAMPS NEEDING DOWNLOADED
+        if self.survey == "useradded":
+            # URLS OF THE BRIGHTEST DETECTION OF EACH TRANSIENT
+            magnitudeJoin = "AND a.magnitude = b.mag"
+            if failedImage:
+                magnitudeJoin = ""
+            sqlQuery = u"""
                 SELECT 
-        a.transientBucketId, a.%(imageUrl)s 
+        a.transientBucketId, %(urlColumns)s
     FROM
         transientBucket a
             JOIN
         (SELECT 
-            MIN(magnitude) AS mag, transientBucketId
+            MIN(t.magnitude) AS mag, t.transientBucketId
         FROM
-            transientBucket
+            transientBucket t, pesstoObjects p
         WHERE
-            magnitude IS NOT NULL
-                AND %(imageUrl)s IS NOT NULL
-                AND transientBucketId in (select transientBucketId from fs_user_added)
-                AND transientBucketId IN (SELECT 
-                    transientBucketId
-                FROM
-                    pesstoObjects
-                WHERE
-                    %(stampWhere)s and limitingMag = 0)
-        GROUP BY transientBucketId
-        ORDER BY transientBucketId) AS b ON a.transientBucketId = b.transientBucketId
-            AND a.magnitude = b.mag
-            WHERE limitingMag = 0
-        GROUP BY transientBucketId;
+            t.magnitude IS NOT NULL
+                AND t.transientBucketId = p.transientBucketId
+                AND t.transientBucketId in (select transientBucketId from fs_user_added)
+                AND t.limitingMag = 0
+                AND (%(neededDetections)s)
+        GROUP BY t.transientBucketId) AS b ON a.transientBucketId = b.transientBucketId
+            %(magnitudeJoin)s
+            JOIN
+        pesstoObjects p ON p.transientBucketId = a.transientBucketId
+    WHERE a.limitingMag = 0 AND (%(needed)s)
+    GROUP BY a.transientBucketId
+    ORDER BY a.transientBucketId;
             """ % locals()
-            else:
-                sqlQuery = u"""
-                    SELECT 
-    MIN(magnitude) AS mag, t.transientBucketId, %(imageUrl)s
+        else:
+            sqlQuery = u"""
+                SELECT 
+    t.transientBucketId, %(urlColumns)s
 FROM
     transientBucket t,
     pesstoObjects p
 WHERE
     t.magnitude IS NOT NULL
-        AND t.%(imageUrl)s IS NOT NULL
-        AND p.%(stampWhere)s
+        AND (%(needed)s)
         AND p.dateLastModified > NOW() - INTERVAL 45 DAY 
         AND t.transientbucketId = p.transientbucketId
         AND (%(dbSurveyNames)s)
         AND t.limitingMag = 0 group by t.transientBucketId;""" % locals()
 
-            if failedImage:
-                sqlQuery = sqlQuery.replace("AND a.magnitude = b.mag", "").replace(
-                    "GROUP BY a.transientBucketId;", "")
+        rows = readquery(
+            log=self.log,
+            sqlQuery=sqlQuery,
+            dbConn=self.dbConn,
+        )
 
-            rows = readquery(
-                log=self.log,
-                sqlQuery=sqlQuery,
-                dbConn=self.dbConn,
-            )
-
-            # SPLIT URLS INTO STAMP TYPES AND ORDER ALONGSIDE
-            # TRANSIENTBUKCETIDs
-            transientBucketIds = []
-            for row in rows:
-                transientBucketIds.append(row["transientBucketId"])
-                if imageType == "subtracted":
-                    subtractedUrls.append(row["subtractedImageUrl"])
-                if imageType == "target":
-                    targetUrls.append(row["targetImageUrl"])
-                if imageType == "reference":
-                    referenceUrls.append(row["referenceImageUrl"])
-                if imageType == "triplet":
-                    tripletUrls.append(row["tripletImageUrl"])
-
-        for imageType, v in list(self.stampFlagColumns.items()):
-            if not v:
-                if imageType == "subtracted":
-                    subtractedUrls = [None] * len(transientBucketIds)
-                if imageType == "target":
-                    targetUrls = [None] * len(transientBucketIds)
-                if imageType == "reference":
-                    referenceUrls = [None] * len(transientBucketIds)
-                if imageType == "triplet":
-                    tripletUrls = [None] * len(transientBucketIds)
+        transientBucketIds = [r["transientBucketId"] for r in rows]
+        subtractedUrls = [r["subtractedImageUrl"] for r in rows]
+        targetUrls = [r["targetImageUrl"] for r in rows]
+        referenceUrls = [r["referenceImageUrl"] for r in rows]
+        tripletUrls = [r["tripletImageUrl"] for r in rows]
 
         self.log.debug('completed the ``_list_images_needing_cached`` method')
         self.transientBucketIds = transientBucketIds
@@ -256,34 +275,94 @@ WHERE
         """
         self.log.debug('starting the ``_download`` method')
 
+        from marshallEngine.commonutils import get_http_session
+
         downloadDirectoryPath = self.downloadDirectoryPath
-        self.subtractedStatus = []
-        self.targetStatus = []
-        self.referenceStatus = []
-        self.tripletStatus = []
-        index = 1
         survey = self.survey.lower()
+        stamps = ["subtracted", "target", "reference", "triplet"]
 
         # TOTAL TO DOWNLOAD
         count = len(transientBucketIds)
 
-        # DOWNLOAD THE IMAGE SETS FOR EACH TRANSIENT AND ADD STATUS TO OUTPUT
-        # ARRAYS. (0 = fail, 1 = success, 2 = does not exist)
-        for tid, surl, turl, rurl, purl in zip(transientBucketIds, subtractedUrls, targetUrls, referenceUrls, tripletUrls):
-            if index > 1:
-                # Cursor up one line and clear line
-                sys.stdout.write("\x1b[1A\x1b[2K")
-
-            percent = (old_div(float(index), float(count))) * 100.
-            print('%(index)s/%(count)s (%(percent)1.1f%% done): downloading %(survey)s stamps for transientBucketId: %(tid)s' % locals())
+        # ONE STATUS ARRAY PER STAMP TYPE. (0 = fail, 1 = success, 2 = does not
+        # exist) - STAMPS WITH NO URL STAY AT 0
+        statusArrays = [[0] * count for s in stamps]
+
+        # ONE JOB PER STAMP, SO THE SLOW STAMPS OF ONE TRANSIENT DON'T HOLD UP
+        # THE OTHERS
+        jobs = []
+        for i, (tid, surl, turl, rurl, purl) in enumerate(zip(transientBucketIds, subtractedUrls, targetUrls, referenceUrls, tripletUrls)):
+            # RECURSIVELY CREATE MISSING TRANSIENT DIRECTORIES
+            downloadPath = "%(downloadDirectoryPath)s/%(tid)s/" % locals()
+            if not os.path.exists(downloadPath):
+                os.makedirs(downloadPath)
+            for j, (url, stamp) in enumerate(zip([surl, turl, rurl, purl], stamps)):
+                if url:
+                    pathToWriteFile = "%(downloadPath)s%(survey)s_%(stamp)s_stamp.jpeg" % locals(
+                    )
+                    jobs.append((i, j, url, pathToWriteFile))
+
+        session = get_http_session(poolSize=self.downloadThreads)
+        # ADAPTIVE TIMEOUTS, RETRIES AND PERSISTENT FAILURE COUNTS
+        from marshallEngine.feeders.download_policy import download_policy
+        policy = download_policy(
+            log=self.log,
+            settings=self.settings,
+            maxConnectionsPerHost=self.maxConnectionsPerHost
+        )
+
+        # IDENTICAL STAMPS ARE STORED ONCE IN A CONTENT-ADDRESSED BLOB STORE
+        # AND HARD-LINKED INTO THE TRANSIENT FOLDERS
+        blobDirectory = None
+        if not (self.settings and "stamp blob store" in self.settings and not self.settings["stamp blob store"]):
+            blobDirectory = self.settings["cache-directory"] + "/blobs"
+
+        def download_one(url, pathToWriteFile):
+            # THE POLICY LIMITS THE REQUESTS IN FLIGHT TO EACH HOST
+            return download_stamp(
+                log=self.log,
+                url=url,
+                pathToWriteFile=pathToWriteFile,
+                session=session,
+                policy=policy,
+                blobDirectory=blobDirectory
+            )
 
-            statusArray = download_image_array(imageArray=[
-                                               tid, surl, turl, rurl, purl], log=self.log, survey=self.survey, downloadPath=downloadDirectoryPath)
-            self.subtractedStatus.append(statusArray[1])
-            self.targetStatus.append(statusArray[2])
-            self.referenceStatus.append(statusArray[3])
-            self.tripletStatus.append(statusArray[4])
-            index += 1
+        # OUTCOMES ARE WRITTEN BACK TO PESSTOOBJECTS IN BATCHES AS THEY
+        # ARRIVE, SO A CRASH DOESN'T LOSE THE WHOLE RUN
+        from marshallEngine.feeders.stamp_status_writer import stamp_status_writer
+        writer = stamp_status_writer(
+            log=self.log,
+            dbConn=self.dbConn,
+            stampFlagColumns=self.stampFlagColumns,
+            batchSize=self.statusBatchSize,
+            flushSeconds=self.statusFlushSeconds
+        )
+
+        total = len(jobs)
+        index = 1
+        with ThreadPoolExecutor(max_workers=self.downloadThreads) as executor:
+            futures = {executor.submit(
+                download_one, url, pathToWriteFile): (i, j) for i, j, url, pathToWriteFile in jobs}
+            for f in as_completed(futures):
+                i, j = futures[f]
+                statusArrays[j][i] = f.result()
+                writer.add(
+                    transientBucketId=transientBucketIds[i],
+                    imageType=stamps[j],
+                    status=statusArrays[j][i]
+                )
+                if index > 1:
+                    # Cursor up one line and clear line
+                    sys.stdout.write("\x1b[1A\x1b[2K")
+                percent = (old_div(float(index), float(total))) * 100.
+                print('%(index)s/%(total)s (%(percent)1.1f%% done): downloaded %(survey)s stamps for %(count)s transients' % locals())
+                index += 1
+        writer.close()
+        policy.save()
+        self.statusWritten = True
+
+        self.subtractedStatus, self.targetStatus, self.referenceStatus, self.tripletStatus = statusArrays
 
         self.log.debug('completed the ``_download`` method')
         return self.subtractedStatus, self.targetStatus, self.referenceStatus, self.tripletStatus
@@ -291,57 +370,32 @@ WHERE
     def _update_database(
             self):
         """*update the database to show which images have been cached on the server*
+
+        ``_download`` streams its outcomes to the database as it goes, so this only writes status arrays that have not already been written.
         """
         self.log.debug('starting the ``_update_database`` method')
 
-        if not len(self.tripletStatus):
+        if not len(self.tripletStatus) or getattr(self, "statusWritten", False):
             self.log.debug('completed the ``_update_database`` method')
             return None
 
-        # ITERATE OVER 4 STAMP COLUMNS
-        for imageType, column in list(self.stampFlagColumns.items()):
-            if column:
-                if imageType == "subtracted":
-                    status = self.subtractedStatus
-                if imageType == "target":
-                    status = self.targetStatus
-                if imageType == "reference":
-                    status = self.referenceStatus
-                if imageType == "triplet":
-                    status = self.tripletStatus
-
-                nonexist = []
-                exist = []
-                # NON-EXISTANT == STATUS 2
-                nonexist[:] = [str(t) for t, s in zip(
-                    self.transientBucketIds, status) if s == 2]
-                nonexist = (",").join(nonexist)
-                # EXISTANT == STATUS 1 (i.e. these are downloaded)
-                exist[:] = [str(t) for t, s in zip(
-                    self.transientBucketIds, status) if s == 1]
-                exist = (",").join(exist)
-                # GENERATE THE SQL TO UPDATE DATABASE
-                sqlQuery = ""
-                if len(nonexist):
-                    sqlQuery += """update pesstoObjects set %(column)s = 3 where transientBucketId in (%(nonexist)s) and %(column)s = 2;""" % locals(
-                    )
-                    sqlQuery += """update pesstoObjects set %(column)s = 2 where transientBucketId in (%(nonexist)s) and (%(column)s is null or %(column)s = 0);""" % locals(
-                    )
-
-                    writequery(
-                        log=self.log,
-                        sqlQuery=sqlQuery,
-                        dbConn=self.dbConn
-                    )
-                if len(exist):
-                    sqlQuery = """update pesstoObjects set %(column)s = 1 where transientBucketId in (%(exist)s) and (%(column)s != 1 or %(column)s is null);""" % locals(
-                    )
-
-                    writequery(
-                        log=self.log,
-                        sqlQuery=sqlQuery,
-                        dbConn=self.dbConn
-                    )
+        from marshallEngine.feeders.stamp_status_writer import stamp_status_writer
+        writer = stamp_status_writer(
+            log=self.log,
+            dbConn=self.dbConn,
+            stampFlagColumns=self.stampFlagColumns,
+            batchSize=self.statusBatchSize,
+            flushSeconds=self.statusFlushSeconds
+        )
+        for imageType, status in zip(["subtracted", "target", "reference", "triplet"], [self.subtractedStatus, self.targetStatus, self.referenceStatus, self.tripletStatus]):
+            for t, s in zip(self.transientBucketIds, status):
+                writer.add(
+                    transientBucketId=t,
+                    imageType=imageType,
+                    status=s
+                )
+        writer.close()
+        self.statusWritten = True
 
         self.log.debug('completed the ``_update_database`` method')
         return None
@@ -388,39 +442,89 @@ def download_image_array(
             statusArray.append(0)
             continue
 
-        try:
-            response = requests.get(
+        statusArray.append(download_stamp(
+            log=log,
+            url=url,
+            pathToWriteFile=pathToWriteFile
+        ))
+
+    return statusArray
+
+
+def download_stamp(
+        log,
+        url,
+        pathToWriteFile,
+        session=None,
+        policy=None,
+        blobDirectory=None):
+    """*download a single image stamp*
+
+    **Key Arguments**
+
+    - ``log`` -- logger
+    - ``url`` -- the url of the stamp
+    - ``pathToWriteFile`` -- the path to write the stamp to
+    - ``session`` -- a ``requests.Session`` to download with (reusing its keep-alive connections). Default *None*
+    - ``policy`` -- a ``download_policy`` giving adaptive timeouts, retries and persistent failure counts. Default *None* (a single attempt with a 1 sec timeout)
+    - ``blobDirectory`` -- the root of the content-addressed stamp store to hard-link the stamp into. Default *None* (write the stamp file directly)
+
+
+    **Return**
+
+    - ``status`` -- 0 = fail, 1 = success, 2 = does not exist
+
+    """
+    # URLS THAT HAVE FAILED TOO MANY RUNS ARE NOT REQUESTED AGAIN
+    if policy and policy.given_up(url):
+        return 2
+
+    try:
+        if policy:
+            response = policy.get(
+                url=url,
+                session=session
+            )
+        else:
+            response = (session or requests).get(
                 url=url,
                 timeout=1.0
                 # params={},
                 # auth=HTTPBasicAuth('user', 'pwd')
             )
-            content = response.content
-            status_code = response.status_code
-        except requests.exceptions.RequestException as e:
-            if 'timed out' in str(e):
-                print('timed out - try again next time' % locals())
-                statusArray.append(0)
-            else:
-                print('HTTP Request failed - %(e)s' % locals())
-                print("")
-                statusArray.append(2)
-            continue
-
-        if status_code == 404:
-            print('image not found' % locals())
-            statusArray.append(2)
-            continue
-
-        # WRITE STAMP TO FILE
-        try:
-            writeFile = codecs.open(
-                pathToWriteFile, mode='wb')
-        except IOError as e:
-            message = 'could not open the file %s' % (pathToWriteFile,)
-            raise IOError(message)
-        writeFile.write(content)
-        writeFile.close()
-        statusArray.append(1)
-
-    return statusArray
+        content = response.content
+        status_code = response.status_code
+    except requests.exceptions.RequestException as e:
+        from marshallEngine.feeders.download_policy import host_unavailable
+        if isinstance(e, host_unavailable):
+            # THE SERVER IS DOWN, NOT THE STAMP - TRY AGAIN NEXT TIME
+            return 0
+        if policy and isinstance(e, (requests.exceptions.Timeout, requests.exceptions.ConnectionError)):
+            print('%(url)s failed after retries (%(e)s) - try again next time' % locals())
+            return policy.record_failure(url)
+        if 'timed out' in str(e):
+            print('timed out - try again next time' % locals())
+            return 0
+        else:
+            print('HTTP Request failed - %(e)s' % locals())
+            print("")
+            return 2
+
+    if status_code == 404:
+        print('image not found' % locals())
+        return 2
+
+    if policy and status_code in policy.retryStatusCodes:
+        print('%(url)s returned %(status_code)s after retries - try again next time' % locals())
+        return policy.record_failure(url)
+
+    # WRITE STAMP TO FILE (HARD-LINKED INTO THE BLOB STORE IF GIVEN)
+    store_stamp(
+        log=log,
+        content=content,
+        pathToWriteFile=pathToWriteFile,
+        blobDirectory=blobDirectory
+    )
+    if policy:
+        policy.record_success(url)
+    return 1
@@ -0,0 +1,179 @@
+#!/usr/local/bin/python
+# encoding: utf-8
+"""
+*A checkpoint journal of the completed stages of a feeder survey ingest, so a crashed ingest can resume where it stopped*
+
+:Author:
+    David Young
+"""
+from marshallEngine.commonutils.getstatepath import getstatepath
+from datetime import datetime
+from builtins import object
+import json
+import time
+import os
+os.environ['TERM'] = 'vt100'
+
+
+class ingest_journal(object):
+    """
+    *a checkpoint journal of the completed stages of a feeder survey ingest*
+
+    Each completed stage is written to ``<state-directory>/journals/<name>.json`` along with any artefacts it produced (e.g. row counts or pending HTTP cache entries). When an ingest dies part way through, the next run with the same parameters skips the stages already completed and resumes at the first incomplete one. The journal is cleared once the ingest completes. Journals older than ``maxAgeHours``, or written by a run with different parameters, are discarded.
+
+    Set the ``resume ingests`` setting to False to switch journalling off (every stage then always runs).
+
+    **Key Arguments**
+
+    - ``log`` -- logger
+    - ``settings`` -- the settings dictionary
+    - ``name`` -- the name of the ingest (e.g. the feeder survey table)
+    - ``params`` -- dictionary of the ingest parameters (a journal is only resumed by a run with the same parameters). Default *{}*
+
+    **Usage**
+
+    ```python
+    from marshallEngine.feeders.ingest_journal import ingest_journal
+    journal = ingest_journal(
+        log=log,
+        settings=settings,
+        name="fs_atlas",
+        params={"withinLastDays": 3}
+    )
+    if not journal.done("transientbucket sync"):
+        ingester.insert_into_transientBucket()
+        journal.complete("transientbucket sync")
+    ...
+    journal.clear()
+    ```
+
+    """
+    # DISCARD JOURNALS OLDER THAN THIS
+    maxAgeHours = 24
+
+    def __init__(
+            self,
+            log,
+            settings=False,
+            name="ingest",
+            params={}
+    ):
+        self.log = log
+        log.debug("instansiating a new 'ingest_journal' object")
+        self.settings = settings
+        self.name = name
+        self.params = json.loads(json.dumps(params, default=str))
+        self.enabled = not (
+            settings and "resume ingests" in settings and not settings["resume ingests"])
+
+        self.path = None
+        self.stages = {}
+        if self.enabled:
+            self.path = os.path.join(getstatepath(
+                settings=settings, folder="journals"), "%(name)s.json" % locals())
+            self._load()
+
+        return None
+
+    def done(
+            self,
+            stage):
+        """*has the stage already been completed by this (or the interrupted) run?*
+
+        **Key Arguments**
+
+        - ``stage`` -- the name of the stage
+
+        **Return**
+
+        - ``done`` -- True or False
+        """
+        return stage in self.stages
+
+    def artefacts(
+            self,
+            stage):
+        """*the artefacts recorded when the stage completed*
+
+        **Key Arguments**
+
+        - ``stage`` -- the name of the stage
+
+        **Return**
+
+        - ``artefacts`` -- dictionary of artefacts (empty if the stage has not completed)
+        """
+        return self.stages.get(stage, {}).get("artefacts", {})
+
+    def complete(
+            self,
+            stage,
+            artefacts={}):
+        """*record a stage as completed*
+
+        **Key Arguments**
+
+        - ``stage`` -- the name of the stage
+        - ``artefacts`` -- dictionary of (JSON-serialisable) artefacts produced by the stage. Default *{}*
+        """
+        self.log.debug('starting the ``complete`` method')
+
+        self.stages[stage] = {
+            "completed": datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%S"),
+            "artefacts": artefacts
+        }
+        if not self.enabled:
+            return None
+
+        journal = {
+            "name": self.name,
+            "params": self.params,
+            "updated": time.time(),
+            "stages": self.stages
+        }
+        # WRITE TO A TEMP FILE AND MOVE INTO PLACE SO A CRASH NEVER LEAVES A
+        # HALF-WRITTEN JOURNAL
+        with open(self.path + ".tmp", "w") as f:
+            json.dump(journal, f, indent=2, default=str)
+        os.replace(self.path + ".tmp", self.path)
+
+        self.log.debug('completed the ``complete`` method')
+        return None
+
+    def clear(
+            self):
+        """*delete the journal (call once the whole ingest has completed)*
+        """
+        self.stages = {}
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+        return None
+
+    def _load(
+            self):
+        """*load the journal of an interrupted run, discarding it if it is stale or was written with different parameters*
+        """
+        if not os.path.exists(self.path):
+            return None
+        try:
+            with open(self.path) as f:
+                journal = json.load(f)
+        except Exception as e:
+            self.log.warning(
+                "could not read the ingest journal %s (%s) - starting from scratch" % (self.path, e))
+            self.clear()
+            return None
+
+        name = self.name
+        ageHours = (time.time() - journal.get("updated", 0)) / 3600.
+        if ageHours > self.maxAgeHours or journal.get("params") != self.params:
+            self.log.info(
+                "discarding the stale %(name)s ingest journal" % locals())
+            self.clear()
+            return None
+
+        self.stages = journal.get("stages", {})
+        if len(self.stages):
+            completed = ", ".join(self.stages.keys())
+            print("Resuming the interrupted %(name)s ingest - skipping the completed stages: %(completed)s" % locals())
+        return None
@@ -0,0 +1,244 @@
+#!/usr/local/bin/python
+# encoding: utf-8
+"""
+*An in-memory hash index of the known transient names (transientBucket names and akas) for name-matching feeder survey sources*
+
+:Author:
+    David Young
+"""
+from marshallEngine.commonutils.run_report import readquery
+from builtins import object
+import threading
+import time
+import os
+os.environ['TERM'] = 'vt100'
+
+# ONE INDEX PER PROCESS AND DATABASE
+_indexes = {}
+_lock = threading.Lock()
+
+
+def get_name_match_index(
+        log,
+        dbConn,
+        settings=False):
+    """*get the in-memory transient name index for this process, building it on first use and topping it up with new transientBucket names on every later call*
+
+    **Key Arguments**
+
+    - ``log`` -- logger
+    - ``dbConn`` -- the marshall database connection
+    - ``settings`` -- the settings dictionary
+
+
+    **Return**
+
+    - ``index`` -- a ``name_match_index`` object
+
+
+    **Usage**
+
+    ```python
+    from marshallEngine.feeders.name_match_index import get_name_match_index
+    index = get_name_match_index(
+        log=log,
+        dbConn=dbConn,
+        settings=settings
+    )
+    nameIds = index.lookup(names=["ATLAS20abc", "PS20xyz"])
+    ```
+    """
+    dbSettings = settings and "database settings" in settings and settings[
+        "database settings"] or {}
+    key = (os.getpid(), dbSettings.get("host"), dbSettings.get("db"))
+    with _lock:
+        if key not in _indexes:
+            _indexes[key] = name_match_index(
+                log=log,
+                dbConn=dbConn
+            )
+        index = _indexes[key]
+        index.dbConn = dbConn
+        index.refresh()
+    return index
+
+
+class name_match_index(object):
+    """
+    *An in-memory dictionary of transient name to transientBucketId*
+
+    The index is built from the ``marshall_transient_akas`` table plus the names of the transientBucket rows added since the akas were last updated (``recentInterval``). Names of transientBucket rows added after that are pulled in incrementally (by ``primaryKeyId``). Older transientBucket names that are not akas (e.g. ``atel_`` names) are looked up on the transientBucket's name index the first time they are asked for and then cached, so a lookup never needs to scan the transientBucket. The whole index is rebuilt from scratch after ``maxAgeSeconds`` so merged transients pick up their new transientBucketIds.
+
+    **Key Arguments**
+
+    - ``log`` -- logger
+    - ``dbConn`` -- the marshall database connection
+    - ``maxAgeSeconds`` -- rebuild the whole index once it is this old. Default *3600*
+
+    **Usage**
+
+    Use ``get_name_match_index`` rather than creating the index directly so it is only built once per process.
+
+    ```python
+    from marshallEngine.feeders.name_match_index import name_match_index
+    index = name_match_index(
+        log=log,
+        dbConn=dbConn
+    )
+    index.refresh()
+    nameIds = index.lookup(names=["ATLAS20abc", "PS20xyz"])
+    ```
+
+    """
+    # THE AKAS ARE UPDATED AT THE END OF EVERY INGEST WITH A 1 WEEK LOOKBACK
+    # (``CALL update_transient_akas(1)``) - READ THE TRANSIENTBUCKET NAMES
+    # ADDED OVER A LONGER WINDOW SO NONE FALL BETWEEN THE TWO
+    recentInterval = "2 WEEK"
+    # THE MOST NAMES PER TRANSIENTBUCKET LOOKUP OF NAMES MISSING FROM THE INDEX
+    batchSize = 1000
+
+    def __init__(
+            self,
+            log,
+            dbConn,
+            maxAgeSeconds=3600
+    ):
+        self.log = log
+        log.debug("instansiating a new 'name_match_index' object")
+        self.dbConn = dbConn
+        self.maxAgeSeconds = maxAgeSeconds
+        self.builtAt = 0
+
+        return None
+
+    def refresh(
+            self):
+        """*build the index if it is missing or stale, otherwise add the names of any new transientBucket rows*
+        """
+        self.log.debug('starting the ``refresh`` method')
+
+        if not self.builtAt or time.time() - self.builtAt > self.maxAgeSeconds:
+            self._build()
+            return None
+
+        highWater = self.highWater
+        self._add_rows(self._read_names(
+            sqlWhere="primaryKeyId > %(highWater)s" % locals()))
+
+        self.log.debug('completed the ``refresh`` method')
+        return None
+
+    def lookup(
+            self,
+            names,
+            prefix=False):
+        """*find the transientBucketIds of a list of transient names*
+
+        **Key Arguments**
+
+        - ``names`` -- list of transient names
+        - ``prefix`` -- only match names starting with this prefix (e.g. "ATLAS"). Default *False*
+
+
+        **Return**
+
+        - ``nameIds`` -- list of (name, transientBucketId) tuples for the names found in the index
+
+        """
+        self.log.debug('starting the ``lookup`` method')
+
+        names = [n for n in names if n is not None and (
+            not prefix or n.lower().startswith(prefix.lower()))]
+
+        # NAMES NOT IN THE INDEX (OLDER TRANSIENTBUCKET NAMES THAT NEVER
+        # MADE IT INTO THE AKAS) ARE LOOKED UP IN THE TRANSIENTBUCKET AND
+        # CACHED
+        ids = self.ids
+        missing = list(set([n for n in names if n.lower() not in ids]))
+        for i in range(0, len(missing), self.batchSize):
+            self._add_rows(self._read_names(
+                names=missing[i:i + self.batchSize]))
+
+        nameIds = []
+        for n in names:
+            i = ids.get(n.lower())
+            if i is not None:
+                nameIds.append((n, i))
+
+        self.log.debug('completed the ``lookup`` method')
+        return nameIds
+
+    def _build(
+            self):
+        """*load all the akas and recent transientBucket names*
+        """
+        self.log.debug('starting the ``_build`` method')
+
+        self.ids = {}
+        self.highWater = 0
+        akas = readquery(
+            log=self.log,
+            sqlQuery=u"""select name, transientBucketId from marshall_transient_akas order by primaryId""",
+            dbConn=self.dbConn,
+            quiet=False
+        )
+        self._add_rows(akas)
+        # START THE HIGH-WATER MARK AT THE NEWEST ROW SO A QUIET WINDOW NEVER
+        # MEANS A FULL-TABLE TOP-UP
+        rows = readquery(
+            log=self.log,
+            sqlQuery=u"""select ifnull(max(primaryKeyId), 0) as highWater from transientBucket""",
+            dbConn=self.dbConn,
+            quiet=False
+        )
+        self.highWater = rows[0]["highWater"]
+        recentInterval = self.recentInterval
+        self._add_rows(self._read_names(
+            sqlWhere="dateCreated > NOW() - INTERVAL %(recentInterval)s" % locals()))
+        self.builtAt = time.time()
+
+        self.log.debug('completed the ``_build`` method')
+        return None
+
+    def _add_rows(
+            self,
+            rows):
+        """*add name/transientBucketId rows to the index (later rows win, so the transientBucket takes precedence over the akas)*
+        """
+        ids = self.ids
+        for r in rows:
+            if r["name"]:
+                # MYSQL NAME MATCHES ARE CASE-INSENSITIVE
+                ids[r["name"].lower()] = r["transientBucketId"]
+            if "primaryKeyId" in r and r["primaryKeyId"] > self.highWater:
+                self.highWater = r["primaryKeyId"]
+        return None
+
+    def _read_names(
+            self,
+            sqlWhere=False,
+            names=False):
+        """*read transientBucket names from the database, either the rows matching ``sqlWhere`` or every row with one of the given ``names``*
+        """
+        if names:
+            # NAMES ARE MATCHED ON THE (INDEXED) NAME COLUMN. NO primaryKeyId
+            # IS RETURNED, SO THE HIGH-WATER MARK IS LEFT ALONE
+            names = '","'.join([n.replace("\\", "\\\\").replace(
+                '"', '\\"') for n in names])
+            sqlQuery = u"""
+                select distinct name, transientBucketId from transientBucket where name in ("%(names)s")
+            """ % locals()
+        else:
+            sqlQuery = u"""
+                select primaryKeyId, name, transientBucketId from transientBucket where %(sqlWhere)s order by primaryKeyId
+            """ % locals()
+        rows = readquery(
+            log=self.log,
+            sqlQuery=sqlQuery,
+            dbConn=self.dbConn,
+            quiet=False
+        )
+        return rows
+
+    # use the tab-trigger below for new method
+    # xt-class-method
@@ -6,7 +6,7 @@
 :Author:
     David Young
 """
-from fundamentals.mysql import writequery
+from marshallEngine.commonutils.run_report import writequery
 from astrocalc.times import now
 from ..data import data as basedata
 from fundamentals import tools
@@ -75,42 +75,41 @@ class data(basedata):
         """
         self.log.debug('starting the ``ingest`` method')
 
-        allLists = []
-        csvDicts = self.get_csv_data(
-            url=self.settings["panstarrs urls"]["ps13pi"]["summary csv"],
-            user=self.settings["credentials"]["ps13pi"]["username"],
-            pwd=self.settings["credentials"]["ps13pi"]["password"]
-        )
-        allLists.extend(self._clean_data_pre_ingest(
-            surveyName="ps13pi", withinLastDays=withinLastDays))
-
-        csvDicts = self.get_csv_data(
-            url=self.settings["panstarrs urls"]["ps13pi"]["recurrence csv"],
-            user=self.settings["credentials"]["ps13pi"]["username"],
-            pwd=self.settings["credentials"]["ps13pi"]["password"]
-        )
-        allLists.extend(self._clean_data_pre_ingest(
-            surveyName="ps13pi", withinLastDays=withinLastDays))
-
-        csvDicts = self.get_csv_data(
-            url=self.settings["panstarrs urls"]["pso4"]["summary csv"],
-            user=self.settings["credentials"]["pso4"]["username"],
-            pwd=self.settings["credentials"]["pso4"]["password"]
-        )
-        allLists.extend(self._clean_data_pre_ingest(
-            surveyName="pso4", withinLastDays=withinLastDays))
-        csvDicts = self.get_csv_data(
-            url=self.settings["panstarrs urls"]["pso4"]["recurrence csv"],
-            user=self.settings["credentials"]["pso4"]["username"],
-            pwd=self.settings["credentials"]["pso4"]["password"]
-        )
-        allLists.extend(self._clean_data_pre_ingest(
-            surveyName="pso4", withinLastDays=withinLastDays))
-
-        self.dictList = allLists
-        self._import_to_feeder_survey_table()
-
-        self.insert_into_transientBucket()
+        # STAGES COMPLETED BY AN INTERRUPTED RUN ARE SKIPPED
+        journal = self._get_ingest_journal(withinLastDays=withinLastDays)
+
+        if not journal.done("feeder survey import"):
+            # DOWNLOAD AND CLEAN THE 4 SUMMARY/RECURRENCE FEEDS CONCURRENTLY,
+            # IMPORTING THE MERGED CHUNKS INTO THE FEEDER SURVEY TABLE AS THEY
+            # ARRIVE
+            feeds = []
+            for surveyName in ["ps13pi", "pso4"]:
+                for csvType in ["summary csv", "recurrence csv"]:
+                    feeds.append({
+                        "url": self.settings["panstarrs urls"][surveyName][csvType],
+                        "user": self.settings["credentials"][surveyName]["username"],
+                        "pwd": self.settings["credentials"][surveyName]["password"],
+                        "surveyName": surveyName
+                    })
+            rowCount = 0
+            for allLists in self._fetch_csv_feeds_concurrently(
+                    feeds=feeds, withinLastDays=withinLastDays):
+                self.dictList = allLists
+                self._import_to_feeder_survey_table()
+                rowCount += len(allLists)
+
+            # SKIP THE REST OF THE INGEST IF NONE OF THE FEEDS HAVE CHANGED SINCE
+            # THE LAST RUN
+            if len(self.unchangedFeeds) == len(feeds):
+                print("None of the Pan-STARRS CSV feeds have changed since the last import - nothing to ingest")
+                journal.clear()
+                return None
+            journal.complete("feeder survey import", artefacts={
+                "rows": rowCount, "pendingHttpCache": self.pendingHttpCache})
+
+        if not journal.done("transientbucket sync"):
+            self.insert_into_transientBucket()
+            journal.complete("transientbucket sync")
 
         # FIX ODD PANSTARRS COORDINATES
         sqlQuery = """update transientBucket FORCE INDEX (idx_dateCreated) set raDeg = raDeg+360.0 where raDeg  < 0 and dateCreated > NOW() - INTERVAL 3 DAY """ % locals()
@@ -123,6 +122,10 @@ class data(basedata):
         # CLEAN UP TASKS TO MAKE THE TICKET UPDATE
         self.clean_up()
 
+        # ONLY NOW MARK THE FEEDS AS INGESTED IN THE HTTP CACHE
+        self._commit_http_cache()
+        journal.clear()
+
         self.log.debug('completed the ``ingest`` method')
         return None
 
@@ -70,6 +70,84 @@ class test_data(unittest.TestCase):
         ingester._import_to_feeder_survey_table()
         ingester.insert_into_transientBucket()
 
+    def test_stream_csv_into_feeder_survey_table_function(self):
+
+        from marshallEngine.feeders.panstarrs.data import data
+        ingester = data(
+            log=log,
+            settings=settings,
+            dbConn=dbConn
+        )
+        ingester.get_csv_data(
+            url=settings["panstarrs urls"]["ps13pi"]["recurrence csv"],
+            user=settings["credentials"]["ps13pi"]["username"],
+            pwd=settings["credentials"]["ps13pi"]["password"],
+            stream=True
+        )
+        rowCount = ingester._stream_csv_into_feeder_survey_table(
+            surveyName="ps13pi", withinLastDays=1, chunkSize=500)
+        print(rowCount)
+
+    def test_fetch_csv_feeds_concurrently_function(self):
+
+        from marshallEngine.feeders.panstarrs.data import data
+        ingester = data(
+            log=log,
+            settings=settings,
+            dbConn=dbConn
+        )
+        feeds = []
+        for csvType in ["summary csv", "recurrence csv"]:
+            feeds.append({
+                "url": settings["panstarrs urls"]["ps13pi"][csvType],
+                "user": settings["credentials"]["ps13pi"]["username"],
+                "pwd": settings["credentials"]["ps13pi"]["password"],
+                "surveyName": "ps13pi"
+            })
+        allLists = []
+        for dictList in ingester._fetch_csv_feeds_concurrently(feeds=feeds, withinLastDays=1):
+            allLists.extend(dictList)
+        print(len(allLists))
+
+    def test_drain_backlog_function(self):
+
+        from marshallEngine.feeders.panstarrs.data import data
+        ingester = data(
+            log=log,
+            settings=settings,
+            dbConn=dbConn
+        )
+        ingester.drainBacklog = True
+        ingester.backlogPageSize = 1000
+        ingester.insert_into_transientBucket(updateTransientSummaries=False)
+
+    def test_drain_backlog_same_position_function(self):
+
+        from marshallEngine.feeders.panstarrs.data import data
+        from fundamentals.mysql import readquery, writequery
+        # TWO NAMES FOR ONE NEW TRANSIENT, READ ON DIFFERENT PAGES, SHARE A
+        # SINGLE TRANSIENTBUCKETID
+        writequery(
+            log=log,
+            sqlQuery=u"""insert ignore into fs_panstarrs (candidateID, ra_deg, dec_deg, mag, observationMJD) values ("drain_test_a", 213.412345, -61.987654, 19.1, 59000.1), ("drain_test_b", 213.412346, -61.987654, 19.2, 59000.2)""",
+            dbConn=dbConn
+        )
+        ingester = data(
+            log=log,
+            settings=settings,
+            dbConn=dbConn
+        )
+        ingester.drainBacklog = True
+        ingester.backlogPageSize = 1
+        ingester.insert_into_transientBucket(updateTransientSummaries=False)
+        rows = readquery(
+            log=log,
+            sqlQuery=u"""select distinct transientBucketId from fs_panstarrs where candidateID in ("drain_test_a", "drain_test_b")""",
+            dbConn=dbConn
+        )
+        assert len(rows) == 1
+        assert rows[0]["transientBucketId"]
+
     def test_data_function3(self):
 
         from marshallEngine.feeders.panstarrs.data import data
@@ -59,6 +59,21 @@ class test_images(unittest.TestCase):
         )
         cacher._update_database()
 
+    def test_images_manifest_aligned(self):
+
+        from marshallEngine.feeders.panstarrs import images
+        cacher = images(
+            log=log,
+            settings=settings,
+            dbConn=dbConn
+        )
+        for failedImage in (False, True):
+            transientBucketIds, subtractedUrls, targetUrls, referenceUrls, tripletUrls = cacher._list_images_needing_cached(
+                failedImage=failedImage)
+            assert len(set(transientBucketIds)) == len(transientBucketIds)
+            for urls in (subtractedUrls, targetUrls, referenceUrls, tripletUrls):
+                assert len(urls) == len(transientBucketIds)
+
     def test_images_function2(self):
 
         from marshallEngine.feeders.panstarrs import images
@@ -0,0 +1,155 @@
+#!/usr/local/bin/python
+# encoding: utf-8
+"""
+*A persistent index of the fingerprints of the rows already written to a feeder survey table*
+
+:Author:
+    David Young
+"""
+from marshallEngine.commonutils import getstatepath
+import sqlite3
+import hashlib
+import json
+import time
+import os
+os.environ['TERM'] = 'vt100'
+
+
+class row_fingerprints(object):
+    """
+    *A persistent index of the fingerprints (hashes of the cleaned rows) already written to a feeder survey table, used to only write new or changed rows*
+
+    One small sqlite database is kept per feeder survey table in the local state folder. Fingerprints not seen for ``maxAgeDays`` are pruned so the index stays about the size of the survey feeds themselves.
+
+    **Key Arguments**
+
+    - ``log`` -- logger
+    - ``settings`` -- the settings dictionary
+    - ``fsTableName`` -- the name of the feeder survey table
+    - ``maxAgeDays`` -- drop fingerprints that have not been seen in this many days. Default *30*
+
+    **Usage**
+
+    ```python
+    from marshallEngine.feeders.row_fingerprints import row_fingerprints
+    index = row_fingerprints(
+        log=log,
+        settings=settings,
+        fsTableName="fs_atlas"
+    )
+    newRows, hashes = index.filter(dictList=dictList)
+    # ... WRITE newRows TO THE DATABASE ...
+    index.record(hashes=hashes)
+    ```
+
+    """
+
+    def __init__(
+            self,
+            log,
+            settings=False,
+            fsTableName=False,
+            maxAgeDays=30
+    ):
+        self.log = log
+        log.debug("instansiating a new 'row_fingerprints' object")
+        self.settings = settings
+        self.fsTableName = fsTableName
+
+        dbPath = os.path.join(getstatepath(
+            settings=settings, folder="fingerprints"), fsTableName + ".sqlite")
+        self.conn = sqlite3.connect(dbPath, timeout=60)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS fingerprints (hash TEXT PRIMARY KEY, lastSeen INTEGER)")
+        self.conn.execute(
+            "DELETE FROM fingerprints WHERE lastSeen < ?", (int(time.time() - maxAgeDays * 86400),))
+        self.conn.commit()
+
+        return None
+
+    @staticmethod
+    def fingerprint(
+            row):
+        """*the fingerprint of a single cleaned row (independent of key order)*
+
+        **Key Arguments**
+
+        - ``row`` -- dictionary of column names and values
+
+        **Return**
+
+        - ``hash`` -- sha1 hexdigest of the row
+
+        """
+        return hashlib.sha1(json.dumps(row, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+    def filter(
+            self,
+            dictList):
+        """*split out the rows that are new or have changed since they were last written*
+
+        **Key Arguments**
+
+        - ``dictList`` -- the list of cleaned row dictionaries
+
+        **Return**
+
+        - ``newRows`` -- the rows whose fingerprints are not in the index (duplicate rows are only returned once)
+        - ``hashes`` -- the fingerprints of all rows in ``dictList``. Pass these to ``record`` once ``newRows`` have been written
+
+        """
+        self.log.debug('starting the ``filter`` method')
+
+        hashes = [self.fingerprint(r) for r in dictList]
+
+        known = set()
+        uniqueHashes = list(set(hashes))
+        # SQLITE LIMITS THE NUMBER OF BOUND PARAMETERS PER STATEMENT
+        batchSize = 500
+        for i in range(0, len(uniqueHashes), batchSize):
+            batch = uniqueHashes[i:i + batchSize]
+            placeholders = ",".join("?" * len(batch))
+            rows = self.conn.execute(
+                "SELECT hash FROM fingerprints WHERE hash IN (%(placeholders)s)" % locals(), batch)
+            known.update(r[0] for r in rows)
+
+        newRows = []
+        for h, r in zip(hashes, dictList):
+            if h not in known:
+                newRows.append(r)
+                known.add(h)
+
+        self.log.debug('completed the ``filter`` method')
+        return newRows, hashes
+
+    def record(
+            self,
+            hashes):
+        """*add fingerprints to the index (or refresh when they were last seen)*
+
+        Only call this once the rows have been successfully written to the feeder survey table.
+
+        **Key Arguments**
+
+        - ``hashes`` -- list of row fingerprints
+
+        """
+        self.log.debug('starting the ``record`` method')
+
+        now = int(time.time())
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO fingerprints (hash, lastSeen) VALUES (?, ?)", ((h, now) for h in set(hashes)))
+        self.conn.commit()
+
+        self.log.debug('completed the ``record`` method')
+        return None
+
+    def close(
+            self):
+        """*close the fingerprint index*
+        """
+        self.conn.close()
+        return None
+
+    # use the tab-trigger below for new method
+    # xt-class-method
@@ -0,0 +1,189 @@
+#!/usr/local/bin/python
+# encoding: utf-8
+"""
+*Stream the outcomes of image stamp downloads back to the pesstoObjects stamp flag columns in periodic set-based batches*
+
+:Author:
+    David Young
+"""
+from marshallEngine.commonutils.run_report import writequery
+from builtins import object
+import threading
+import time
+import os
+os.environ['TERM'] = 'vt100'
+
+# THE IMAGE TYPES, IN THE ORDER OF THE STAGING TABLE COLUMNS
+imageTypes = ["subtracted", "target", "reference", "triplet"]
+
+
+class stamp_status_writer(object):
+    """
+    *collect per-stamp download outcomes and write them to pesstoObjects in batches*
+
+    Outcomes are held in memory until ``batchSize`` transients have an outcome or ``flushSeconds`` have passed since the last write, then loaded into a temporary staging table and applied to every stamp flag column with a single multi-column UPDATE. A crash part way through a long download run therefore only loses the outcomes of the batch in hand.
+
+    The flag columns are updated as before:
+
+    - status 1 (downloaded) -- the flag is set to 1
+    - status 2 (does not exist) -- a NULL or 0 flag is set to 2; a flag that is already 2 (the alternative image also failed) is set to 3
+    - status 0 (failed, try again) -- the flag is left alone
+
+    **Key Arguments**
+
+    - ``log`` -- logger
+    - ``dbConn`` -- the marshall database connection
+    - ``stampFlagColumns`` -- dictionary of image type to pesstoObjects stamp flag column (None for image types the survey does not have)
+    - ``batchSize`` -- write once this many transients have outcomes waiting. Default *200*
+    - ``flushSeconds`` -- write once the oldest waiting outcome is this old (sec). Default *30*
+
+    **Usage**
+
+    ```python
+    from marshallEngine.feeders.stamp_status_writer import stamp_status_writer
+    writer = stamp_status_writer(
+        log=log,
+        dbConn=dbConn,
+        stampFlagColumns={"subtracted": None, "target": "ps1_target_stamp",
+                          "reference": None, "triplet": None}
+    )
+    writer.add(transientBucketId=12345, imageType="target", status=1)
+    writer.close()
+    ```
+
+    """
+
+    def __init__(
+            self,
+            log,
+            dbConn,
+            stampFlagColumns,
+            batchSize=200,
+            flushSeconds=30
+    ):
+        self.log = log
+        log.debug("instansiating a new 'stamp_status_writer' object")
+        self.dbConn = dbConn
+        self.stampFlagColumns = stampFlagColumns
+        self.batchSize = batchSize
+        self.flushSeconds = flushSeconds
+
+        # TRANSIENTBUCKETID -> [subtracted, target, reference, triplet]
+        # STATUSES WAITING TO BE WRITTEN (None = NOTHING TO WRITE)
+        self.pending = {}
+        self.lastFlush = time.time()
+        self.tmpTable = None
+        self.lock = threading.Lock()
+
+        return None
+
+    def add(
+            self,
+            transientBucketId,
+            imageType,
+            status):
+        """*record the outcome of a single stamp download, writing the batch if it is due*
+
+        **Key Arguments**
+
+        - ``transientBucketId`` -- the transient the stamp belongs to
+        - ``imageType`` -- subtracted, target, reference or triplet
+        - ``status`` -- 0 = fail, 1 = success, 2 = does not exist
+        """
+        if status not in (1, 2) or not self.stampFlagColumns.get(imageType):
+            due = False
+        else:
+            with self.lock:
+                row = self.pending.setdefault(
+                    transientBucketId, [None] * len(imageTypes))
+                row[imageTypes.index(imageType)] = status
+                due = len(self.pending) >= self.batchSize
+        if due or time.time() - self.lastFlush > self.flushSeconds:
+            self.flush()
+        return None
+
+    def flush(
+            self):
+        """*write the waiting outcomes to the database*
+        """
+        self.log.debug('starting the ``flush`` method')
+
+        with self.lock:
+            pending = self.pending
+            self.pending = {}
+            self.lastFlush = time.time()
+            if not len(pending):
+                return None
+
+            if not self.tmpTable:
+                self._create_staging_table()
+            tmpTable = self.tmpTable
+
+            writequery(
+                log=self.log,
+                sqlQuery="""INSERT INTO %(tmpTable)s (transientBucketId, subtracted, target, reference, triplet) VALUES (%%s, %%s, %%s, %%s, %%s)""" % locals(),
+                dbConn=self.dbConn,
+                manyValueList=[tuple([t] + s) for t, s in pending.items()]
+            )
+
+            setClauses = []
+            for imageType in imageTypes:
+                column = self.stampFlagColumns.get(imageType)
+                if not column:
+                    continue
+                setClauses.append("""p.%(column)s = CASE WHEN s.%(imageType)s = 1 THEN 1 WHEN s.%(imageType)s = 2 AND p.%(column)s = 2 THEN 3 WHEN s.%(imageType)s = 2 AND (p.%(column)s IS NULL OR p.%(column)s = 0) THEN 2 ELSE p.%(column)s END""" % locals())
+            setClauses = ", ".join(setClauses)
+
+            sqlQueries = [
+                """UPDATE pesstoObjects p JOIN %(tmpTable)s s ON p.transientBucketId = s.transientBucketId SET %(setClauses)s;""" % locals(),
+                """DELETE FROM %(tmpTable)s;""" % locals()
+            ]
+            for sqlQuery in sqlQueries:
+                writequery(
+                    log=self.log,
+                    sqlQuery=sqlQuery,
+                    dbConn=self.dbConn
+                )
+
+        self.log.debug('completed the ``flush`` method')
+        return None
+
+    def close(
+            self):
+        """*write any waiting outcomes and drop the staging table*
+        """
+        self.log.debug('starting the ``close`` method')
+
+        self.flush()
+        with self.lock:
+            if self.tmpTable:
+                tmpTable = self.tmpTable
+                writequery(
+                    log=self.log,
+                    sqlQuery="""DROP TEMPORARY TABLE IF EXISTS %(tmpTable)s;""" % locals(),
+                    dbConn=self.dbConn
+                )
+                self.tmpTable = None
+
+        self.log.debug('completed the ``close`` method')
+        return None
+
+    def _create_staging_table(
+            self):
+        """*create the temporary table the outcomes are loaded into (kept for the life of the writer)*
+        """
+        import random
+        from datetime import datetime
+        rand = random.randint(0, 10000)
+        tmpTable = datetime.now().strftime(
+            f"tmp_stamps_%Y%m%dt%H%M%S%f{rand}")
+        writequery(
+            log=self.log,
+            sqlQuery="""CREATE TEMPORARY TABLE %(tmpTable)s (transientBucketId BIGINT NOT NULL PRIMARY KEY, subtracted TINYINT NULL, target TINYINT NULL, reference TINYINT NULL, triplet TINYINT NULL);""" % locals(),
+            dbConn=self.dbConn
+        )
+        self.tmpTable = tmpTable
+        return None
+
+    # use the tab-trigger below for new method
+    # xt-class-method
@@ -0,0 +1,104 @@
+#!/usr/local/bin/python
+# encoding: utf-8
+"""
+*A content-addressed store for image stamps, so identical stamps are only kept on disk once*
+
+:Author:
+    David Young
+"""
+import threading
+import hashlib
+import errno
+import os
+os.environ['TERM'] = 'vt100'
+
+
+def store_stamp(
+        log,
+        content,
+        pathToWriteFile,
+        blobDirectory=None):
+    """*write a stamp's bytes to its transient folder, hard-linked to a shared, content-addressed blob*
+
+    The bytes are stored once under ``<blobDirectory>/<aa>/<bb>/<sha256>.jpeg`` and ``pathToWriteFile`` is made a hard link to that blob, so transients sharing an identical stamp (e.g. the same reference image) share one inode. Where a hard link cannot be made (no ``blobDirectory``, a different filesystem or the filesystem's link limit) the bytes are written to ``pathToWriteFile`` directly.
+
+    The file is always swapped into place atomically, never rewritten in place, so re-downloading a stamp can never change the contents of a blob shared with other transients. Blobs no stamp links to any more, and stamps cached before the blob store existed, are dealt with by the ``tidy_stamp_blobs`` housekeeping step (run by ``marshall clean``).
+
+    **Key Arguments**
+
+    - ``log`` -- logger
+    - ``content`` -- the stamp bytes
+    - ``pathToWriteFile`` -- the path of the stamp in the transient's cache folder
+    - ``blobDirectory`` -- the root of the blob store. Default *None* (no blob store, write the file directly)
+
+
+    **Return**
+
+    - ``blobPath`` -- the path of the blob the stamp is linked to (None if written directly)
+
+
+    **Usage**
+
+    ```python
+    from marshallEngine.feeders.stamp_store import store_stamp
+    store_stamp(
+        log=log,
+        content=response.content,
+        pathToWriteFile=cacheDir + "/transients/123/ps1_reference_stamp.jpeg",
+        blobDirectory=cacheDir + "/blobs"
+    )
+    ```
+    """
+    tmpPath = _tmp_path(pathToWriteFile)
+
+    if blobDirectory:
+        digest = hashlib.sha256(content).hexdigest()
+        blobFolder = os.path.join(blobDirectory, digest[:2], digest[2:4])
+        blobPath = os.path.join(blobFolder, digest + ".jpeg")
+        try:
+            if not os.path.exists(blobPath):
+                # RECURSIVELY CREATE MISSING DIRECTORIES
+                os.makedirs(blobFolder, exist_ok=True)
+                _write_atomically(content, blobPath)
+            if os.path.exists(tmpPath):
+                os.remove(tmpPath)
+            try:
+                os.link(blobPath, tmpPath)
+            except FileNotFoundError:
+                # THE BLOB WAS PRUNED BY ``tidy_stamp_blobs`` SINCE IT WAS
+                # CHECKED - WRITE IT AGAIN
+                _write_atomically(content, blobPath)
+                os.link(blobPath, tmpPath)
+            os.replace(tmpPath, pathToWriteFile)
+            return blobPath
+        except OSError as e:
+            if e.errno not in (errno.EXDEV, errno.EMLINK, errno.EPERM, errno.ENOTSUP):
+                raise
+            log.debug(
+                "could not hard-link %(pathToWriteFile)s into the stamp store (%(e)s) - writing it directly" % locals())
+
+    try:
+        _write_atomically(content, pathToWriteFile)
+    except IOError as e:
+        message = 'could not open the file %s' % (pathToWriteFile,)
+        raise IOError(message)
+    return None
+
+
+def _write_atomically(
+        content,
+        path):
+    """*write bytes to a temporary file and move it into place*
+    """
+    tmpPath = _tmp_path(path)
+    with open(tmpPath, "wb") as f:
+        f.write(content)
+    os.replace(tmpPath, path)
+    return None
+
+
+def _tmp_path(
+        path):
+    """*a temporary path next to ``path`` unique to this process and thread*
+    """
+    return "%s.%s.%s.tmp" % (path, os.getpid(), threading.get_ident())
@@ -0,0 +1,60 @@
+#!/usr/local/bin/python
+# encoding: utf-8
+"""
+*Look up the data and image ingester classes for a feeder survey*
+
+:Author:
+    David Young
+"""
+import importlib
+import os
+os.environ['TERM'] = 'vt100'
+
+# SURVEY NAME -> FEEDER PACKAGE
+surveyFeeders = {
+    "panstarrs": "panstarrs",
+    "atlas": "atlas",
+    "useradded": "useradded",
+    "tns": "tns",
+    "ztf": "ztf",
+    "atels": "atels",
+    "atel": "atels"
+}
+
+
+def get_survey_feeders(
+        survey):
+    """*get the data and images ingester classes for a feeder survey*
+
+    **Key Arguments**
+
+    - ``survey`` -- name of the survey (panstarrs, atlas, useradded, tns, ztf or atels)
+
+
+    **Return**
+
+    - ``data`` -- the survey's data ingester class
+    - ``images`` -- the survey's image cacher class
+
+
+    **Usage**
+
+    ```python
+    from marshallEngine.feeders.survey_feeders import get_survey_feeders
+    data, images = get_survey_feeders("atlas")
+    ingester = data(
+        log=log,
+        settings=settings,
+        dbConn=dbConn
+    ).ingest(withinLastDays=30)
+    ```
+    """
+    try:
+        package = surveyFeeders[survey.lower()]
+    except KeyError:
+        raise ValueError("unknown survey `%(survey)s`" % locals())
+    dataModule = importlib.import_module(
+        "marshallEngine.feeders.%(package)s.data" % locals())
+    imagesModule = importlib.import_module(
+        "marshallEngine.feeders.%(package)s.images" % locals())
+    return dataModule.data, imagesModule.images
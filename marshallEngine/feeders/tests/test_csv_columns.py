@@ -0,0 +1,72 @@
+from __future__ import print_function
+from builtins import str
+import os
+import unittest
+import shutil
+import yaml
+from marshallEngine.utKit import utKit
+from fundamentals import tools
+from os.path import expanduser
+home = expanduser("~")
+
+packageDirectory = utKit("").get_project_root()
+# settingsFile = packageDirectory + "/test_settings.yaml"
+settingsFile = home + "/git_repos/_misc_/settings/marshall/test_settings.yaml"
+
+su = tools(
+    arguments={"settingsFile": settingsFile},
+    docString=__doc__,
+    logLevel="DEBUG",
+    options_first=False,
+    projectName=None,
+    defaultSettingsFile=False
+)
+arguments, settings, log, dbConn = su.setup()
+
+# SETUP PATHS TO COMMON DIRECTORIES FOR TEST DATA
+moduleDirectory = os.path.dirname(__file__)
+pathToInputDir = moduleDirectory + "/input/"
+pathToOutputDir = moduleDirectory + "/output/"
+
+try:
+    shutil.rmtree(pathToOutputDir)
+except:
+    pass
+# COPY INPUT TO OUTPUT DIR
+shutil.copytree(pathToInputDir, pathToOutputDir)
+
+# Recursively create missing directories
+if not os.path.exists(pathToOutputDir):
+    os.makedirs(pathToOutputDir)
+
+
+class test_csv_columns(unittest.TestCase):
+
+    def test_csv_columns_function(self):
+
+        from marshallEngine.feeders.csv_columns import csv_to_columns, stamp_image_urls, columns_to_dict_list
+        csvDicts = [
+            {"name": "ATLAS20abc", "target": "1121_58900.1234_5_6_target"},
+            {"name": "ATLAS20abd", "target": ""}
+        ]
+        columns, rowCount = csv_to_columns(csvDicts=csvDicts)
+        assert rowCount == 2
+        urls = stamp_image_urls(
+            stamps=columns["target"], baseUrl="https://star.pst.qub.ac.uk/images")
+        assert urls[0] == "https://star.pst.qub.ac.uk/images/58900/1121_58900.1234_5_6_target.jpeg"
+        assert urls[1] is None
+        dictList = columns_to_dict_list(
+            columns={"candidateID": columns["name"], "targetImageURL": urls})
+        assert dictList[1] == {"candidateID": "ATLAS20abd", "targetImageURL": None}
+
+    def test_csv_columns_function_exception(self):
+
+        from marshallEngine.feeders.csv_columns import csv_to_columns
+        try:
+            this = csv_to_columns(
+                fakeKey="break the code"
+            )
+            assert False
+        except Exception as e:
+            assert True
+            print(str(e))
@@ -0,0 +1,108 @@
+from __future__ import print_function
+from builtins import str
+import os
+import unittest
+import shutil
+import yaml
+from marshallEngine.utKit import utKit
+from fundamentals import tools
+from os.path import expanduser
+home = expanduser("~")
+
+packageDirectory = utKit("").get_project_root()
+# settingsFile = packageDirectory + "/test_settings.yaml"
+settingsFile = home + "/git_repos/_misc_/settings/marshall/test_settings.yaml"
+
+su = tools(
+    arguments={"settingsFile": settingsFile},
+    docString=__doc__,
+    logLevel="DEBUG",
+    options_first=False,
+    projectName=None,
+    defaultSettingsFile=False
+)
+arguments, settings, log, dbConn = su.setup()
+
+# SETUP PATHS TO COMMON DIRECTORIES FOR TEST DATA
+moduleDirectory = os.path.dirname(__file__)
+pathToInputDir = moduleDirectory + "/input/"
+pathToOutputDir = moduleDirectory + "/output/"
+
+try:
+    shutil.rmtree(pathToOutputDir)
+except:
+    pass
+# COPY INPUT TO OUTPUT DIR
+shutil.copytree(pathToInputDir, pathToOutputDir)
+
+# Recursively create missing directories
+if not os.path.exists(pathToOutputDir):
+    os.makedirs(pathToOutputDir)
+
+
+class test_download_policy(unittest.TestCase):
+
+    def test_download_policy_function(self):
+
+        from marshallEngine.feeders.download_policy import download_policy
+        testSettings = dict(settings)
+        testSettings["state-directory"] = pathToOutputDir + "/state"
+        testSettings["stamp max failures"] = 2
+        policy = download_policy(
+            log=log,
+            settings=testSettings
+        )
+        url = "https://example.com/missing_stamp.jpeg"
+        assert policy.record_failure(url) == 0
+        assert not policy.given_up(url)
+        assert policy.record_failure(url) == 2
+        policy.save()
+
+        # FAILURE COUNTS PERSIST BETWEEN RUNS
+        policy = download_policy(
+            log=log,
+            settings=testSettings
+        )
+        assert policy.given_up(url)
+        policy.record_success(url)
+        assert not policy.given_up(url)
+        assert policy.minTimeout <= policy.timeout(url) <= policy.maxTimeout
+
+    def test_download_policy_parallel_saves(self):
+
+        from marshallEngine.feeders.download_policy import download_policy
+        import json
+        testSettings = dict(settings)
+        testSettings["state-directory"] = pathToOutputDir + "/state_parallel"
+        # TWO SURVEYS IMPORTED SIDE BY SIDE
+        first = download_policy(
+            log=log,
+            settings=testSettings
+        )
+        second = download_policy(
+            log=log,
+            settings=testSettings
+        )
+        first.record_failure("https://example.com/first.jpeg")
+        second.record_failure("https://example.com/second.jpeg")
+        first.save()
+        second.save()
+        with open(second.path) as f:
+            failures = json.load(f)
+        assert "https://example.com/first.jpeg" in failures
+        assert "https://example.com/second.jpeg" in failures
+
+    def test_download_policy_function_exception(self):
+
+        from marshallEngine.feeders.download_policy import download_policy
+        try:
+            this = download_policy(
+                log=log,
+                settings=settings,
+                fakeKey="break the code"
+            )
+            this.save()
+            assert False
+        except Exception as e:
+            assert True
+            print(str(e))
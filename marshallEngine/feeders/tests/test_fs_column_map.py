@@ -0,0 +1,74 @@
+from __future__ import print_function
+from builtins import str
+import os
+import unittest
+import shutil
+import yaml
+from marshallEngine.utKit import utKit
+from fundamentals import tools
+from os.path import expanduser
+home = expanduser("~")
+
+packageDirectory = utKit("").get_project_root()
+# settingsFile = packageDirectory + "/test_settings.yaml"
+settingsFile = home + "/git_repos/_misc_/settings/marshall/test_settings.yaml"
+
+su = tools(
+    arguments={"settingsFile": settingsFile},
+    docString=__doc__,
+    logLevel="DEBUG",
+    options_first=False,
+    projectName=None,
+    defaultSettingsFile=False
+)
+arguments, settings, log, dbConn = su.setup()
+
+# SETUP PATHS TO COMMON DIRECTORIES FOR TEST DATA
+moduleDirectory = os.path.dirname(__file__)
+pathToInputDir = moduleDirectory + "/input/"
+pathToOutputDir = moduleDirectory + "/output/"
+
+try:
+    shutil.rmtree(pathToOutputDir)
+except:
+    pass
+# COPY INPUT TO OUTPUT DIR
+shutil.copytree(pathToInputDir, pathToOutputDir)
+
+# Recursively create missing directories
+if not os.path.exists(pathToOutputDir):
+    os.makedirs(pathToOutputDir)
+
+
+class test_fs_column_map(unittest.TestCase):
+
+    def test_fs_column_map_function(self):
+
+        from marshallEngine.feeders.fs_column_map import get_fs_column_map
+        columnMap = get_fs_column_map(
+            log=log,
+            dbConn=dbConn,
+            settings=settings
+        )
+        columns = columnMap.columns(fsTableName="fs_atlas")
+        assert "raDeg" in columns
+        sqlQueries = columnMap.copy_sql(fsTableName="fs_atlas")
+        assert "insert ignore into transientBucket" in sqlQueries[0]
+        assert columnMap.copy_sql(fsTableName="astronotes_transients") == []
+        columnMap.invalidate()
+        assert columnMap.columns(fsTableName="fs_atlas") == columns
+
+    def test_fs_column_map_function_exception(self):
+
+        from marshallEngine.feeders.fs_column_map import fs_column_map
+        try:
+            this = fs_column_map(
+                log=log,
+                dbConn=dbConn,
+                fakeKey="break the code"
+            )
+            this.load()
+            assert False
+        except Exception as e:
+            assert True
+            print(str(e))
@@ -0,0 +1,71 @@
+from __future__ import print_function
+from builtins import str
+import os
+import unittest
+import shutil
+import yaml
+from marshallEngine.utKit import utKit
+from fundamentals import tools
+from os.path import expanduser
+home = expanduser("~")
+
+packageDirectory = utKit("").get_project_root()
+# settingsFile = packageDirectory + "/test_settings.yaml"
+settingsFile = home + "/git_repos/_misc_/settings/marshall/test_settings.yaml"
+
+su = tools(
+    arguments={"settingsFile": settingsFile},
+    docString=__doc__,
+    logLevel="DEBUG",
+    options_first=False,
+    projectName=None,
+    defaultSettingsFile=False
+)
+arguments, settings, log, dbConn = su.setup()
+
+# SETUP PATHS TO COMMON DIRECTORIES FOR TEST DATA
+moduleDirectory = os.path.dirname(__file__)
+pathToInputDir = moduleDirectory + "/input/"
+pathToOutputDir = moduleDirectory + "/output/"
+
+try:
+    shutil.rmtree(pathToOutputDir)
+except:
+    pass
+# COPY INPUT TO OUTPUT DIR
+shutil.copytree(pathToInputDir, pathToOutputDir)
+
+# Recursively create missing directories
+if not os.path.exists(pathToOutputDir):
+    os.makedirs(pathToOutputDir)
+
+
+class test_http_cache(unittest.TestCase):
+
+    def test_http_cache_function(self):
+
+        from marshallEngine.feeders.http_cache import http_cache
+        cache = http_cache(
+            log=log,
+            settings=settings
+        )
+        url = "https://example.com/summary.csv"
+        cache.set(url=url, entry={"etag": '"abc123"', "lastModified": None})
+        headers = cache.conditional_headers(url=url)
+        assert headers == {"If-None-Match": '"abc123"'}
+        assert cache.get(url="https://example.com/not-cached.csv") == {}
+
+    def test_http_cache_function_exception(self):
+
+        from marshallEngine.feeders.http_cache import http_cache
+        try:
+            this = http_cache(
+                log=log,
+                settings=settings,
+                fakeKey="break the code"
+            )
+            this.get()
+            assert False
+        except Exception as e:
+            assert True
+            print(str(e))
@@ -0,0 +1,90 @@
+from __future__ import print_function
+from builtins import str
+import os
+import unittest
+import shutil
+import yaml
+from marshallEngine.utKit import utKit
+from fundamentals import tools
+from os.path import expanduser
+home = expanduser("~")
+
+packageDirectory = utKit("").get_project_root()
+# settingsFile = packageDirectory + "/test_settings.yaml"
+settingsFile = home + "/git_repos/_misc_/settings/marshall/test_settings.yaml"
+
+su = tools(
+    arguments={"settingsFile": settingsFile},
+    docString=__doc__,
+    logLevel="DEBUG",
+    options_first=False,
+    projectName=None,
+    defaultSettingsFile=False
+)
+arguments, settings, log, dbConn = su.setup()
+
+# SETUP PATHS TO COMMON DIRECTORIES FOR TEST DATA
+moduleDirectory = os.path.dirname(__file__)
+pathToInputDir = moduleDirectory + "/input/"
+pathToOutputDir = moduleDirectory + "/output/"
+
+try:
+    shutil.rmtree(pathToOutputDir)
+except:
+    pass
+# COPY INPUT TO OUTPUT DIR
+shutil.copytree(pathToInputDir, pathToOutputDir)
+
+# Recursively create missing directories
+if not os.path.exists(pathToOutputDir):
+    os.makedirs(pathToOutputDir)
+
+
+class test_ingest_journal(unittest.TestCase):
+
+    def test_ingest_journal_function(self):
+
+        from marshallEngine.feeders.ingest_journal import ingest_journal
+        journal = ingest_journal(
+            log=log,
+            settings=settings,
+            name="fs_test_ingest_journal",
+            params={"withinLastDays": 3}
+        )
+        journal.complete("feeder survey import", artefacts={"rows": 10})
+
+        # A RESTARTED RUN RESUMES AFTER THE COMPLETED STAGE
+        journal = ingest_journal(
+            log=log,
+            settings=settings,
+            name="fs_test_ingest_journal",
+            params={"withinLastDays": 3}
+        )
+        assert journal.done("feeder survey import")
+        assert not journal.done("transientbucket sync")
+        assert journal.artefacts("feeder survey import")["rows"] == 10
+
+        # A RUN WITH DIFFERENT PARAMETERS STARTS FROM SCRATCH
+        journal = ingest_journal(
+            log=log,
+            settings=settings,
+            name="fs_test_ingest_journal",
+            params={"withinLastDays": 30}
+        )
+        assert not journal.done("feeder survey import")
+        journal.clear()
+
+    def test_ingest_journal_function_exception(self):
+
+        from marshallEngine.feeders.ingest_journal import ingest_journal
+        try:
+            this = ingest_journal(
+                log=log,
+                settings=settings,
+                fakeKey="break the code"
+            )
+            this.complete()
+            assert False
+        except Exception as e:
+            assert True
+            print(str(e))
@@ -0,0 +1,95 @@
+from __future__ import print_function
+from builtins import str
+import os
+import unittest
+import shutil
+import yaml
+from marshallEngine.utKit import utKit
+from fundamentals import tools
+from os.path import expanduser
+home = expanduser("~")
+
+packageDirectory = utKit("").get_project_root()
+# settingsFile = packageDirectory + "/test_settings.yaml"
+settingsFile = home + "/git_repos/_misc_/settings/marshall/test_settings.yaml"
+
+su = tools(
+    arguments={"settingsFile": settingsFile},
+    docString=__doc__,
+    logLevel="DEBUG",
+    options_first=False,
+    projectName=None,
+    defaultSettingsFile=False
+)
+arguments, settings, log, dbConn = su.setup()
+
+# SETUP PATHS TO COMMON DIRECTORIES FOR TEST DATA
+moduleDirectory = os.path.dirname(__file__)
+pathToInputDir = moduleDirectory + "/input/"
+pathToOutputDir = moduleDirectory + "/output/"
+
+try:
+    shutil.rmtree(pathToOutputDir)
+except:
+    pass
+# COPY INPUT TO OUTPUT DIR
+shutil.copytree(pathToInputDir, pathToOutputDir)
+
+# Recursively create missing directories
+if not os.path.exists(pathToOutputDir):
+    os.makedirs(pathToOutputDir)
+
+
+class test_name_match_index(unittest.TestCase):
+
+    def test_name_match_index_function(self):
+
+        from marshallEngine.feeders.name_match_index import get_name_match_index
+        index = get_name_match_index(
+            log=log,
+            dbConn=dbConn,
+            settings=settings
+        )
+        name = list(index.ids.keys())[0]
+        nameIds = index.lookup(names=[name.upper(), "not_a_transient_name"])
+        assert len(nameIds) == 1
+        print(nameIds)
+
+    def test_name_match_index_old_names(self):
+
+        from marshallEngine.feeders.name_match_index import get_name_match_index
+        from fundamentals.mysql import readquery
+        index = get_name_match_index(
+            log=log,
+            dbConn=dbConn,
+            settings=settings
+        )
+        # AN OLD NAME ONLY FOUND IN THE TRANSIENTBUCKET (ATEL NAMES ARE NOT
+        # AKAS) IS STILL MATCHED
+        rows = readquery(
+            log=log,
+            sqlQuery=u"""select name, transientBucketId from transientBucket where name like "atel_%" and dateCreated < NOW() - INTERVAL 1 MONTH limit 1""",
+            dbConn=dbConn
+        )
+        if not len(rows):
+            return
+        name = rows[0]["name"]
+        index.ids.pop(name.lower(), None)
+        nameIds = index.lookup(names=[name])
+        assert nameIds == [(name, rows[0]["transientBucketId"])]
+        assert name.lower() in index.ids
+
+    def test_name_match_index_function_exception(self):
+
+        from marshallEngine.feeders.name_match_index import name_match_index
+        try:
+            this = name_match_index(
+                log=log,
+                dbConn=dbConn,
+                fakeKey="break the code"
+            )
+            this.refresh()
+            assert False
+        except Exception as e:
+            assert True
+            print(str(e))
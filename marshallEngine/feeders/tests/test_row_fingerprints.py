@@ -0,0 +1,75 @@
+from __future__ import print_function
+from builtins import str
+import os
+import unittest
+import shutil
+import yaml
+from marshallEngine.utKit import utKit
+from fundamentals import tools
+from os.path import expanduser
+home = expanduser("~")
+
+packageDirectory = utKit("").get_project_root()
+# settingsFile = packageDirectory + "/test_settings.yaml"
+settingsFile = home + "/git_repos/_misc_/settings/marshall/test_settings.yaml"
+
+su = tools(
+    arguments={"settingsFile": settingsFile},
+    docString=__doc__,
+    logLevel="DEBUG",
+    options_first=False,
+    projectName=None,
+    defaultSettingsFile=False
+)
+arguments, settings, log, dbConn = su.setup()
+
+# SETUP PATHS TO COMMON DIRECTORIES FOR TEST DATA
+moduleDirectory = os.path.dirname(__file__)
+pathToInputDir = moduleDirectory + "/input/"
+pathToOutputDir = moduleDirectory + "/output/"
+
+try:
+    shutil.rmtree(pathToOutputDir)
+except:
+    pass
+# COPY INPUT TO OUTPUT DIR
+shutil.copytree(pathToInputDir, pathToOutputDir)
+
+# Recursively create missing directories
+if not os.path.exists(pathToOutputDir):
+    os.makedirs(pathToOutputDir)
+
+
+class test_row_fingerprints(unittest.TestCase):
+
+    def test_row_fingerprints_function(self):
+
+        from marshallEngine.feeders.row_fingerprints import row_fingerprints
+        index = row_fingerprints(
+            log=log,
+            settings=settings,
+            fsTableName="fs_test_row_fingerprints"
+        )
+        dictList = [{"candidateID": "TEST%s" % i, "mag": 18.5}
+                    for i in range(10)]
+        newRows, hashes = index.filter(dictList=dictList)
+        index.record(hashes=hashes)
+        dictList[0]["mag"] = 18.1
+        newRows, hashes = index.filter(dictList=dictList)
+        assert len(newRows) == 1
+        index.close()
+
+    def test_row_fingerprints_function_exception(self):
+
+        from marshallEngine.feeders.row_fingerprints import row_fingerprints
+        try:
+            this = row_fingerprints(
+                log=log,
+                settings=settings,
+                fakeKey="break the code"
+            )
+            this.filter()
+            assert False
+        except Exception as e:
+            assert True
+            print(str(e))
@@ -0,0 +1,93 @@
+from __future__ import print_function
+from builtins import str
+import os
+import unittest
+import shutil
+import yaml
+from marshallEngine.utKit import utKit
+from fundamentals import tools
+from os.path import expanduser
+home = expanduser("~")
+
+packageDirectory = utKit("").get_project_root()
+# settingsFile = packageDirectory + "/test_settings.yaml"
+settingsFile = home + "/git_repos/_misc_/settings/marshall/test_settings.yaml"
+
+su = tools(
+    arguments={"settingsFile": settingsFile},
+    docString=__doc__,
+    logLevel="DEBUG",
+    options_first=False,
+    projectName=None,
+    defaultSettingsFile=False
+)
+arguments, settings, log, dbConn = su.setup()
+
+# SETUP PATHS TO COMMON DIRECTORIES FOR TEST DATA
+moduleDirectory = os.path.dirname(__file__)
+pathToInputDir = moduleDirectory + "/input/"
+pathToOutputDir = moduleDirectory + "/output/"
+
+try:
+    shutil.rmtree(pathToOutputDir)
+except:
+    pass
+# COPY INPUT TO OUTPUT DIR
+shutil.copytree(pathToInputDir, pathToOutputDir)
+
+# Recursively create missing directories
+if not os.path.exists(pathToOutputDir):
+    os.makedirs(pathToOutputDir)
+
+
+class test_stamp_status_writer(unittest.TestCase):
+
+    def test_stamp_status_writer_function(self):
+
+        from marshallEngine.feeders.stamp_status_writer import stamp_status_writer
+        from fundamentals.mysql import readquery, writequery
+        rows = readquery(
+            log=log,
+            sqlQuery="select transientBucketId from pesstoObjects limit 1",
+            dbConn=dbConn
+        )
+        tid = rows[0]["transientBucketId"]
+        writequery(
+            log=log,
+            sqlQuery="update pesstoObjects set ps1_target_stamp = null where transientBucketId = %(tid)s" % locals(),
+            dbConn=dbConn
+        )
+
+        writer = stamp_status_writer(
+            log=log,
+            dbConn=dbConn,
+            stampFlagColumns={"subtracted": None, "target": "ps1_target_stamp",
+                              "reference": None, "triplet": None},
+            batchSize=1
+        )
+        # NULL -> 2 (DOES NOT EXIST) -> 3 (ALTERNATIVE ALSO MISSING) -> 1
+        for status, expected in [(0, None), (2, 2), (2, 3), (1, 1)]:
+            writer.add(transientBucketId=tid,
+                       imageType="target", status=status)
+            rows = readquery(
+                log=log,
+                sqlQuery="select ps1_target_stamp from pesstoObjects where transientBucketId = %(tid)s" % locals(),
+                dbConn=dbConn
+            )
+            assert rows[0]["ps1_target_stamp"] == expected
+        writer.close()
+
+    def test_stamp_status_writer_function_exception(self):
+
+        from marshallEngine.feeders.stamp_status_writer import stamp_status_writer
+        try:
+            this = stamp_status_writer(
+                log=log,
+                dbConn=dbConn,
+                stampFlagColumns={},
+                fakeKey="break the code"
+            )
+            assert False
+        except Exception as e:
+            assert True
+            print(str(e))
@@ -0,0 +1,86 @@
+from __future__ import print_function
+from builtins import str
+import os
+import unittest
+import shutil
+import yaml
+from marshallEngine.utKit import utKit
+from fundamentals import tools
+from os.path import expanduser
+home = expanduser("~")
+
+packageDirectory = utKit("").get_project_root()
+# settingsFile = packageDirectory + "/test_settings.yaml"
+settingsFile = home + "/git_repos/_misc_/settings/marshall/test_settings.yaml"
+
+su = tools(
+    arguments={"settingsFile": settingsFile},
+    docString=__doc__,
+    logLevel="DEBUG",
+    options_first=False,
+    projectName=None,
+    defaultSettingsFile=False
+)
+arguments, settings, log, dbConn = su.setup()
+
+# SETUP PATHS TO COMMON DIRECTORIES FOR TEST DATA
+moduleDirectory = os.path.dirname(__file__)
+pathToInputDir = moduleDirectory + "/input/"
+pathToOutputDir = moduleDirectory + "/output/"
+
+try:
+    shutil.rmtree(pathToOutputDir)
+except:
+    pass
+# COPY INPUT TO OUTPUT DIR
+shutil.copytree(pathToInputDir, pathToOutputDir)
+
+# Recursively create missing directories
+if not os.path.exists(pathToOutputDir):
+    os.makedirs(pathToOutputDir)
+
+
+class test_stamp_store(unittest.TestCase):
+
+    def test_store_stamp_function(self):
+
+        from marshallEngine.feeders.stamp_store import store_stamp
+        blobDirectory = pathToOutputDir + "/blobs"
+        paths = []
+        for tid in [1, 2]:
+            folder = pathToOutputDir + "/transients/%(tid)s" % locals()
+            os.makedirs(folder, exist_ok=True)
+            paths.append(folder + "/ps1_reference_stamp.jpeg")
+            blobPath = store_stamp(
+                log=log,
+                content=b"identical reference stamp",
+                pathToWriteFile=paths[-1],
+                blobDirectory=blobDirectory
+            )
+        # ONE BLOB SHARED BY BOTH TRANSIENTS
+        assert os.path.samefile(paths[0], paths[1])
+        assert os.stat(blobPath).st_nlink == 3
+
+        # REWRITING ONE STAMP LEAVES THE SHARED BLOB UNTOUCHED
+        store_stamp(
+            log=log,
+            content=b"a different stamp",
+            pathToWriteFile=paths[0]
+        )
+        with open(paths[1], "rb") as f:
+            assert f.read() == b"identical reference stamp"
+
+    def test_store_stamp_function_exception(self):
+
+        from marshallEngine.feeders.stamp_store import store_stamp
+        try:
+            this = store_stamp(
+                log=log,
+                content=b"stamp",
+                pathToWriteFile=pathToOutputDir + "/stamp.jpeg",
+                fakeKey="break the code"
+            )
+            assert False
+        except Exception as e:
+            assert True
+            print(str(e))
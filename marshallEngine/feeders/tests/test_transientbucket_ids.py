@@ -0,0 +1,74 @@
+from __future__ import print_function
+from builtins import str
+import os
+import unittest
+import shutil
+import yaml
+from marshallEngine.utKit import utKit
+from fundamentals import tools
+from os.path import expanduser
+home = expanduser("~")
+
+packageDirectory = utKit("").get_project_root()
+# settingsFile = packageDirectory + "/test_settings.yaml"
+settingsFile = home + "/git_repos/_misc_/settings/marshall/test_settings.yaml"
+
+su = tools(
+    arguments={"settingsFile": settingsFile},
+    docString=__doc__,
+    logLevel="DEBUG",
+    options_first=False,
+    projectName=None,
+    defaultSettingsFile=False
+)
+arguments, settings, log, dbConn = su.setup()
+
+# SETUP PATHS TO COMMON DIRECTORIES FOR TEST DATA
+moduleDirectory = os.path.dirname(__file__)
+pathToInputDir = moduleDirectory + "/input/"
+pathToOutputDir = moduleDirectory + "/output/"
+
+try:
+    shutil.rmtree(pathToOutputDir)
+except:
+    pass
+# COPY INPUT TO OUTPUT DIR
+shutil.copytree(pathToInputDir, pathToOutputDir)
+
+# Recursively create missing directories
+if not os.path.exists(pathToOutputDir):
+    os.makedirs(pathToOutputDir)
+
+
+class test_transientbucket_ids(unittest.TestCase):
+
+    def test_reserve_transientbucket_ids_function(self):
+
+        from marshallEngine.feeders.transientbucket_ids import reserve_transientbucket_ids
+        ids1 = reserve_transientbucket_ids(
+            log=log,
+            dbConn=dbConn,
+            count=5
+        )
+        ids2 = reserve_transientbucket_ids(
+            log=log,
+            dbConn=dbConn,
+            count=3
+        )
+        assert len(ids1) == 5 and len(ids2) == 3
+        assert not set(ids1) & set(ids2)
+        print(ids1, ids2)
+
+    def test_reserve_transientbucket_ids_function_exception(self):
+
+        from marshallEngine.feeders.transientbucket_ids import reserve_transientbucket_ids
+        try:
+            this = reserve_transientbucket_ids(
+                log=log,
+                dbConn=dbConn,
+                fakeKey="break the code"
+            )
+            assert False
+        except Exception as e:
+            assert True
+            print(str(e))
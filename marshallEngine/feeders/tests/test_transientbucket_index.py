@@ -0,0 +1,74 @@
+from __future__ import print_function
+from builtins import str
+import os
+import unittest
+import shutil
+import yaml
+from marshallEngine.utKit import utKit
+from fundamentals import tools
+from os.path import expanduser
+home = expanduser("~")
+
+packageDirectory = utKit("").get_project_root()
+# settingsFile = packageDirectory + "/test_settings.yaml"
+settingsFile = home + "/git_repos/_misc_/settings/marshall/test_settings.yaml"
+
+su = tools(
+    arguments={"settingsFile": settingsFile},
+    docString=__doc__,
+    logLevel="DEBUG",
+    options_first=False,
+    projectName=None,
+    defaultSettingsFile=False
+)
+arguments, settings, log, dbConn = su.setup()
+
+# SETUP PATHS TO COMMON DIRECTORIES FOR TEST DATA
+moduleDirectory = os.path.dirname(__file__)
+pathToInputDir = moduleDirectory + "/input/"
+pathToOutputDir = moduleDirectory + "/output/"
+
+try:
+    shutil.rmtree(pathToOutputDir)
+except:
+    pass
+# COPY INPUT TO OUTPUT DIR
+shutil.copytree(pathToInputDir, pathToOutputDir)
+
+# Recursively create missing directories
+if not os.path.exists(pathToOutputDir):
+    os.makedirs(pathToOutputDir)
+
+
+class test_transientbucket_index(unittest.TestCase):
+
+    def test_transientbucket_index_function(self):
+
+        from marshallEngine.feeders.transientbucket_index import get_transientbucket_index
+        index = get_transientbucket_index(
+            log=log,
+            dbConn=dbConn,
+            settings=settings
+        )
+        matchIndies, matches = index.match(
+            ra=[index.ras[0], 0.0],
+            dec=[index.decs[0], -89.0],
+            radiusArcsec=3.5
+        )
+        assert 0 in matchIndies
+        print(matches.list)
+
+    def test_transientbucket_index_function_exception(self):
+
+        from marshallEngine.feeders.transientbucket_index import transientbucket_index
+        try:
+            this = transientbucket_index(
+                log=log,
+                dbConn=dbConn,
+                fakeKey="break the code"
+            )
+            this.refresh()
+            assert False
+        except Exception as e:
+            assert True
+            print(str(e))
@@ -75,7 +75,7 @@ class data(basedata):
         self.log.debug('starting the ``ingest`` method')
 
         # UPDATE THE TNS SPECTRA TABLE WITH EXTRA INFOS
-        from fundamentals.mysql import writequery
+        from marshallEngine.commonutils.run_report import writequery
         sqlQuery = """CALL `update_tns_tables`();""" % locals()
         writequery(
             log=self.log,
@@ -123,13 +123,8 @@ class data(basedata):
         self.insert_into_transientBucket(importUnmatched=False)
 
         # ALSO MATCH NEW ASTRONOTES
-        sqlQuery = """CALL sync_marshall_feeder_survey_transientBucketId('astronotes_transients');""" % locals(
-        )
-        writequery(
-            log=self.log,
-            sqlQuery=sqlQuery,
-            dbConn=self.dbConn
-        )
+        self._feeder_survey_transientbucket_name_match_and_import(
+            fsTableName="astronotes_transients")
 
         # CLEAN UP TASKS TO MAKE THE TICKET UPDATE
         self.clean_up()
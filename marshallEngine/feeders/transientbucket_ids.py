@@ -0,0 +1,97 @@
+#!/usr/local/bin/python
+# encoding: utf-8
+"""
+*Reserve blocks of new transientBucketIds so feeder survey ingesters can run concurrently*
+
+:Author:
+    David Young
+"""
+from marshallEngine.commonutils.run_report import readquery, writequery
+import os
+os.environ['TERM'] = 'vt100'
+
+# SET ONCE THE SEQUENCE TABLE IS KNOWN TO EXIST (PER PROCESS)
+_sequenceReady = []
+
+
+def reserve_transientbucket_ids(
+        log,
+        dbConn,
+        count):
+    """*reserve a block of new, unique transientBucketIds*
+
+    IDs are handed out from the ``transientBucketId`` row of the ``marshall_id_sequences`` table. The reservation is a single atomic ``UPDATE``, so concurrent ingesters (even on different hosts) never receive the same IDs. The sequence never falls behind ``max(transientBucketId)``, so IDs created outside of the allocator are skipped over.
+
+    **Key Arguments**
+
+    - ``log`` -- logger
+    - ``dbConn`` -- the marshall database connection
+    - ``count`` -- the number of IDs to reserve
+
+
+    **Return**
+
+    - ``ids`` -- list of the reserved transientBucketIds
+
+
+    **Usage**
+
+    ```python
+    from marshallEngine.feeders.transientbucket_ids import reserve_transientbucket_ids
+    ids = reserve_transientbucket_ids(
+        log=log,
+        dbConn=dbConn,
+        count=len(unmatched)
+    )
+    ```
+    """
+    log.debug('starting the ``reserve_transientbucket_ids`` function')
+
+    if count < 1:
+        return []
+
+    if not _sequenceReady:
+        _create_sequence(log=log, dbConn=dbConn)
+        _sequenceReady.append(True)
+
+    # LAST_INSERT_ID(expr) IS CONNECTION-LOCAL, AND THE ROW LOCK TAKEN BY THE
+    # UPDATE SERIALISES CONCURRENT RESERVATIONS
+    sqlQuery = """UPDATE marshall_id_sequences SET nextId = LAST_INSERT_ID(GREATEST(nextId, (SELECT IFNULL(MAX(transientBucketId), 0) + 1 FROM transientBucket)) + %(count)s) WHERE sequenceName = 'transientBucketId';""" % locals()
+    writequery(
+        log=log,
+        sqlQuery=sqlQuery,
+        dbConn=dbConn
+    )
+    rows = readquery(
+        log=log,
+        sqlQuery="SELECT LAST_INSERT_ID() AS nextId",
+        dbConn=dbConn
+    )
+    firstId = rows[0]["nextId"] - count
+
+    log.debug('completed the ``reserve_transientbucket_ids`` function')
+    return list(range(firstId, firstId + count))
+
+
+def _create_sequence(
+        log,
+        dbConn):
+    """*create the ``marshall_id_sequences`` table and its transientBucketId row if they do not exist yet*
+    """
+    # BOTH STATEMENTS ARE NO-OPS IF ANOTHER INGESTER GOT THERE FIRST
+    sqlQueries = [
+        """CREATE TABLE IF NOT EXISTS `marshall_id_sequences` (
+          `sequenceName` varchar(45) NOT NULL,
+          `nextId` bigint(20) NOT NULL DEFAULT 1,
+          `dateLastModified` datetime DEFAULT current_timestamp() ON UPDATE current_timestamp(),
+          PRIMARY KEY (`sequenceName`)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;""",
+        """INSERT IGNORE INTO marshall_id_sequences (sequenceName, nextId) VALUES ('transientBucketId', 1)"""
+    ]
+    for sqlQuery in sqlQueries:
+        writequery(
+            log=log,
+            sqlQuery=sqlQuery,
+            dbConn=dbConn
+        )
+    return None
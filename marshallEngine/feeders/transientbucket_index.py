@@ -0,0 +1,324 @@
+#!/usr/local/bin/python
+# encoding: utf-8
+"""
+*An in-memory spatial index of the master transientBucket positions for crossmatching feeder survey sources*
+
+:Author:
+    David Young
+"""
+from marshallEngine.commonutils.run_report import readquery
+from fundamentals.renderer import list_of_dictionaries
+import numpy as np
+import threading
+import time
+import os
+os.environ['TERM'] = 'vt100'
+
+# ONE INDEX PER PROCESS AND DATABASE
+_indexes = {}
+_lock = threading.Lock()
+
+
+def get_transientbucket_index(
+        log,
+        dbConn,
+        settings=False):
+    """*get the in-memory transientBucket spatial index for this process, building it on first use and topping it up with new transients on every later call*
+
+    **Key Arguments**
+
+    - ``log`` -- logger
+    - ``dbConn`` -- the marshall database connection
+    - ``settings`` -- the settings dictionary
+
+
+    **Return**
+
+    - ``index`` -- a ``transientbucket_index`` object
+
+
+    **Usage**
+
+    ```python
+    from marshallEngine.feeders.transientbucket_index import get_transientbucket_index
+    index = get_transientbucket_index(
+        log=log,
+        dbConn=dbConn,
+        settings=settings
+    )
+    matchIndies, matches = index.match(
+        ra=raList,
+        dec=decList,
+        radiusArcsec=3.5
+    )
+    ```
+    """
+    dbSettings = settings and "database settings" in settings and settings[
+        "database settings"] or {}
+    key = (os.getpid(), dbSettings.get("host"), dbSettings.get("db"))
+    with _lock:
+        if key not in _indexes:
+            _indexes[key] = transientbucket_index(
+                log=log,
+                dbConn=dbConn
+            )
+        index = _indexes[key]
+        index.dbConn = dbConn
+        index.refresh()
+    return index
+
+
+class transientbucket_index(object):
+    """
+    *An in-memory spatial index of the ``masterIDFlag=1`` transientBucket positions*
+
+    The bulk of the positions are loaded once into an HTM ``Matcher`` tree. Transients added to the transientBucket after that are pulled in incrementally (by ``primaryKeyId``) and kept in a small side array that is searched by brute force, until it grows large enough to be worth rebuilding the tree. The whole index is rebuilt from scratch after ``maxAgeSeconds`` so merged or deleted transients drop out.
+
+    **Key Arguments**
+
+    - ``log`` -- logger
+    - ``dbConn`` -- the marshall database connection
+    - ``maxAgeSeconds`` -- rebuild the whole index once it is this old. Default *3600*
+
+    **Usage**
+
+    Use ``get_transientbucket_index`` rather than creating the index directly so it is only built once per process.
+
+    ```python
+    from marshallEngine.feeders.transientbucket_index import transientbucket_index
+    index = transientbucket_index(
+        log=log,
+        dbConn=dbConn
+    )
+    matchIndies, matches = index.match(
+        ra=raList,
+        dec=decList,
+        radiusArcsec=3.5
+    )
+    ```
+
+    """
+    # NUMBER OF primaryKeyIds TO LOOK BACK ON EACH REFRESH SO ROWS THAT HAVE
+    # THEIR masterIDFlag SET AFTER A LATER ROW ARE NOT MISSED
+    lookback = 50000
+    # REBUILD THE HTM TREE ONCE THE BRUTE-FORCE SIDE ARRAY GETS THIS BIG
+    maxSideArray = 5000
+    # MOST ELEMENTS IN A SIDE-ARRAY SEPARATION MATRIX
+    maxSeparations = 1000000
+
+    def __init__(
+            self,
+            log,
+            dbConn,
+            maxAgeSeconds=3600
+    ):
+        self.log = log
+        log.debug("instansiating a new 'transientbucket_index' object")
+        self.dbConn = dbConn
+        self.maxAgeSeconds = maxAgeSeconds
+        self.builtAt = 0
+
+        return None
+
+    def refresh(
+            self):
+        """*build the index if it is missing or stale, otherwise add any new master transientBucket positions*
+        """
+        self.log.debug('starting the ``refresh`` method')
+
+        if not self.builtAt or time.time() - self.builtAt > self.maxAgeSeconds:
+            self._build()
+            return None
+
+        lowWater = self.highWater - self.lookback
+        rows = self._read_positions(
+            sqlWhere="primaryKeyId > %(lowWater)s" % locals())
+        rows = [r for r in rows if r["primaryKeyId"] not in self.primaryKeyIds]
+        if not len(rows):
+            return None
+
+        self._add_rows(rows, side=True)
+        if len(self.sideRa) > self.maxSideArray:
+            self._build_tree()
+
+        self.log.debug('completed the ``refresh`` method')
+        return None
+
+    def match(
+            self,
+            ra,
+            dec,
+            radiusArcsec=3.5):
+        """*find the closest master transientBucket source within a radius of each coordinate*
+
+        Gives the same results as the HMpTy ``conesearch`` against the transientBucket with ``closest=True``, ``separations=True`` and ``sqlWhere="masterIDFlag=1"``.
+
+        **Key Arguments**
+
+        - ``ra`` -- list of RAs (decimal degrees)
+        - ``dec`` -- list of declinations (decimal degrees)
+        - ``radiusArcsec`` -- the match radius in arcsec. Default *3.5*
+
+
+        **Return**
+
+        - ``matchIndies`` -- the indices of the matched coordinates in the ``ra``/``dec`` lists
+        - ``matches`` -- a ``list_of_dictionaries`` of the matched transientBucket sources (``transientBucketId``, ``name``, ``raDeg``, ``decDeg`` and ``cmSepArcsec``)
+
+        """
+        self.log.debug('starting the ``match`` method')
+
+        ra = np.array(ra, dtype='f8')
+        dec = np.array(dec, dtype='f8')
+        radius = radiusArcsec / 3600.
+
+        # BEST MATCH SO FAR FOR EACH COORDINATE (SEPARATION IN DEGREES AND
+        # INDEX INTO THE COMBINED TREE + SIDE ARRAYS)
+        bestSep = np.full(ra.size, np.inf)
+        bestIndex = np.full(ra.size, -1, dtype=int)
+
+        if self.tree is not None and ra.size:
+            treeIndices, queryIndices, seps = self.tree.match(
+                ra=ra,
+                dec=dec,
+                radius=radius,
+                maxmatch=0
+            )
+            for t, q, s in zip(treeIndices, queryIndices, seps):
+                if s < bestSep[q]:
+                    bestSep[q] = s
+                    bestIndex[q] = t
+
+        if len(self.sideRa) and ra.size:
+            sideRa = np.array(self.sideRa, dtype='f8')
+            sideDec = np.array(self.sideDec, dtype='f8')
+            # SEARCH THE SIDE ARRAY A CHUNK OF COORDINATES AT A TIME SO THE
+            # SEPARATION MATRIX STAYS SMALL (ABOUT 8 MB PER ARRAY)
+            chunk = max(1, self.maxSeparations // sideRa.size)
+            for start in range(0, ra.size, chunk):
+                end = min(start + chunk, ra.size)
+                seps = _angular_separations(
+                    ra[start:end], dec[start:end], sideRa, sideDec)
+                closest = seps.argmin(axis=1)
+                closestSep = seps[np.arange(end - start), closest]
+                better = (closestSep <= radius) & (
+                    closestSep < bestSep[start:end])
+                bestSep[start:end][better] = closestSep[better]
+                bestIndex[start:end][better] = closest[better] + self.treeSize
+
+        matchIndies = np.where(bestIndex >= 0)[0]
+        matches = []
+        for q in matchIndies:
+            i = bestIndex[q]
+            matches.append({
+                "transientBucketId": self.transientBucketIds[i],
+                "name": self.names[i],
+                "raDeg": self.ras[i],
+                "decDeg": self.decs[i],
+                "cmSepArcsec": float(bestSep[q] * 3600.)
+            })
+
+        matches = list_of_dictionaries(
+            log=self.log,
+            listOfDictionaries=matches
+        )
+
+        self.log.debug('completed the ``match`` method')
+        return matchIndies, matches
+
+    def _build(
+            self):
+        """*load all master transientBucket positions and build the HTM tree*
+        """
+        self.log.debug('starting the ``_build`` method')
+
+        self.primaryKeyIds = set()
+        self.highWater = 0
+        self.transientBucketIds = []
+        self.names = []
+        self.ras = []
+        self.decs = []
+        self._add_rows(self._read_positions(), side=False)
+        self._build_tree()
+        self.builtAt = time.time()
+
+        self.log.debug('completed the ``_build`` method')
+        return None
+
+    def _build_tree(
+            self):
+        """*(re)build the HTM tree from all the positions loaded so far and empty the side array*
+        """
+        from HMpTy.htm import Matcher
+        self.treeSize = len(self.ras)
+        if self.treeSize:
+            self.tree = Matcher(
+                log=self.log,
+                ra=np.array(self.ras, dtype='f8'),
+                dec=np.array(self.decs, dtype='f8'),
+                depth=16,
+                convertToArray=False
+            )
+        else:
+            self.tree = None
+        self.sideRa = []
+        self.sideDec = []
+        return None
+
+    def _add_rows(
+            self,
+            rows,
+            side=True):
+        """*append transientBucket rows to the index (and the brute-force side array if ``side`` is True)*
+        """
+        for r in rows:
+            self.primaryKeyIds.add(r["primaryKeyId"])
+            self.transientBucketIds.append(r["transientBucketId"])
+            self.names.append(r["name"])
+            self.ras.append(r["raDeg"])
+            self.decs.append(r["decDeg"])
+            if r["primaryKeyId"] > self.highWater:
+                self.highWater = r["primaryKeyId"]
+        if side:
+            self.sideRa += [r["raDeg"] for r in rows]
+            self.sideDec += [r["decDeg"] for r in rows]
+        return None
+
+    def _read_positions(
+            self,
+            sqlWhere=False):
+        """*read master transientBucket positions from the database*
+        """
+        if sqlWhere:
+            sqlWhere = " and " + sqlWhere
+        else:
+            sqlWhere = ""
+        sqlQuery = u"""
+            select primaryKeyId, transientBucketId, name, raDeg, decDeg from transientBucket where masterIDFlag = 1 and raDeg is not null and decDeg is not null %(sqlWhere)s
+        """ % locals()
+        rows = readquery(
+            log=self.log,
+            sqlQuery=sqlQuery,
+            dbConn=self.dbConn,
+            quiet=False
+        )
+        return rows
+
+    # use the tab-trigger below for new method
+    # xt-class-method
+
+
+def _angular_separations(
+        ra1,
+        dec1,
+        ra2,
+        dec2):
+    """*the (N, M) array of angular separations (degrees) between two sets of coordinates (haversine, so accurate at arcsec scales)*
+    """
+    ra1 = np.radians(ra1)[:, None]
+    dec1 = np.radians(dec1)[:, None]
+    ra2 = np.radians(ra2)[None, :]
+    dec2 = np.radians(dec2)[None, :]
+    h = np.sin((dec2 - dec1) / 2.)**2 + np.cos(dec1) * \
+        np.cos(dec2) * np.sin((ra2 - ra1) / 2.)**2
+    return np.degrees(2. * np.arcsin(np.sqrt(np.clip(h, 0., 1.))))
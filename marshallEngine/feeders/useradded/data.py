@@ -13,7 +13,7 @@ os.environ['TERM'] = 'vt100'
 from fundamentals import tools
 from ..data import data as basedata
 from astrocalc.times import now
-from fundamentals.mysql import readquery
+from marshallEngine.commonutils.run_report import readquery
 from marshallEngine.housekeeping import update_transient_summaries
 
 
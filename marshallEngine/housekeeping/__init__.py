@@ -3,3 +3,5 @@
 """
 from __future__ import absolute_import
 from .update_transient_summaries import update_transient_summaries
+from .add_new_htm_ids import add_new_htm_ids
+from .stamp_blobs import tidy_stamp_blobs
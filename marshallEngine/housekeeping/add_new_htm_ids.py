@@ -0,0 +1,204 @@
+#!/usr/local/bin/python
+# encoding: utf-8
+"""
+*Add HTM IDs to the rows of a database table inserted since the last run*
+
+:Author:
+    David Young
+"""
+from marshallEngine.commonutils.run_report import readquery, writequery
+import numpy as np
+import os
+os.environ['TERM'] = 'vt100'
+
+# THE HTM MESHES ARE ONLY BUILT ONCE PER PROCESS
+_meshes = {}
+# TABLES ALREADY CHECKED FOR THEIR HTM COLUMNS (PER PROCESS)
+_readyTables = []
+
+
+def add_new_htm_ids(
+        log,
+        dbConn,
+        tableName="transientBucket",
+        primaryIdColumnName="primaryKeyId",
+        raColName="raDeg",
+        declColName="decDeg",
+        batchSize=50000,
+        lookback=10000,
+        maxPendingRows=200000):
+    """*add htm16/13/10 IDs and cartesian coordinates (cx, cy, cz) to the rows of a table inserted since the last run*
+
+    A high-water mark on the (auto-incrementing) primary key is kept per table in the ``marshall_htm_watermarks`` table, so the cost scales with the number of new rows rather than the size of the table. The last ``lookback`` primary keys below the mark are re-checked each run so rows from transactions that committed out of order are not missed. HTM IDs are calculated for a whole batch in one vectorised call and written with a single JOIN-based UPDATE. The table must already have the HTM and cartesian columns - it is never altered.
+
+    Rows without a valid position yet (a NULL position or a negative RA, e.g. Pan-STARRS RAs before they are corrected) are skipped but hold the high-water mark below them, so they are re-checked on the next run. A row still without a valid position once ``maxPendingRows`` newer rows have been read is given up on (as HMpTy's ``add_htm_ids_to_mysql_database_table`` does) so it cannot hold back the mark forever.
+
+    The first run on a table walks the whole table once (only rows without an ``htm16ID`` or ``cx`` are updated). To re-index every row use HMpTy's ``add_htm_ids_to_mysql_database_table`` with ``reindex=True``.
+
+    **Key Arguments**
+
+    - ``log`` -- logger
+    - ``dbConn`` -- the marshall database connection
+    - ``tableName`` -- the table to add HTM IDs to. Default *transientBucket*
+    - ``primaryIdColumnName`` -- the auto-incrementing primary key of the table. Default *primaryKeyId*
+    - ``raColName`` -- the RA column. Default *raDeg*
+    - ``declColName`` -- the declination column. Default *decDeg*
+    - ``batchSize`` -- the number of rows to read, index and update at a time. Default *50000*
+    - ``lookback`` -- the number of primary keys below the high-water mark to re-check. Default *10000*
+    - ``maxPendingRows`` -- give up waiting for a row's position once this many newer rows have been read. Default *200000*
+
+
+    **Return**
+
+    - ``updated`` -- the number of rows given HTM IDs
+
+
+    **Usage**
+
+    ```python
+    from marshallEngine.housekeeping import add_new_htm_ids
+    add_new_htm_ids(
+        log=log,
+        dbConn=dbConn,
+        tableName="transientBucket",
+        primaryIdColumnName="primaryKeyId"
+    )
+    ```
+    """
+    log.debug('starting the ``add_new_htm_ids`` function')
+
+    if tableName not in _readyTables:
+        _create_watermark_table(log=log, dbConn=dbConn)
+        _readyTables.append(tableName)
+
+    rows = readquery(
+        log=log,
+        sqlQuery="""SELECT lastId FROM marshall_htm_watermarks WHERE tableName = '%(tableName)s'""" % locals(),
+        dbConn=dbConn
+    )
+    if len(rows):
+        lastId = max(rows[0]["lastId"] - lookback, 0)
+    else:
+        lastId = 0
+        writequery(
+            log=log,
+            sqlQuery="""INSERT IGNORE INTO marshall_htm_watermarks (tableName, lastId) VALUES ('%(tableName)s', 0)""" % locals(),
+            dbConn=dbConn
+        )
+
+    if not len(_meshes):
+        from HMpTy import htm
+        for depth in (16, 13, 10):
+            _meshes[depth] = htm.HTM(depth)
+
+    updated = 0
+    # PRIMARY KEYS OF THE ROWS WAITING FOR A VALID POSITION
+    pending = []
+    while True:
+        sqlQuery = """SELECT `%(primaryIdColumnName)s` AS pid, `%(raColName)s` AS ra, `%(declColName)s` AS decl, htm16ID, cx FROM `%(tableName)s` WHERE `%(primaryIdColumnName)s` > %(lastId)s ORDER BY `%(primaryIdColumnName)s` LIMIT %(batchSize)s""" % locals()
+        batch = readquery(
+            log=log,
+            sqlQuery=sqlQuery,
+            dbConn=dbConn
+        )
+        if not len(batch):
+            break
+        lastId = batch[-1]["pid"]
+
+        # ONLY ROWS WITHOUT HTM IDS - THOSE WITHOUT A VALID POSITION ARE
+        # KEPT BACK FOR THE NEXT RUN
+        batch = [r for r in batch if r["htm16ID"] is None or r["cx"] is None]
+        pending += [r["pid"] for r in batch if r["ra"]
+                    is None or r["decl"] is None or r["ra"] < 0]
+        pending = [p for p in pending if lastId - p < maxPendingRows]
+        batch = [r for r in batch if r["ra"]
+                 is not None and r["decl"] is not None and r["ra"] >= 0]
+        if len(batch):
+            ra = np.array([r["ra"] for r in batch], dtype='f8')
+            dec = np.array([r["decl"] for r in batch], dtype='f8')
+            htmIds = [_meshes[d].lookup_id(ra, dec) for d in (16, 13, 10)]
+            cosDec = np.cos(np.radians(dec))
+            cx = np.cos(np.radians(ra)) * cosDec
+            cy = np.sin(np.radians(ra)) * cosDec
+            cz = np.sin(np.radians(dec))
+            manyValueList = [(int(r["pid"]), int(h16), int(h13), int(h10), float(x), float(y), float(z)) for r, h16, h13, h10, x, y, z in zip(
+                batch, htmIds[0], htmIds[1], htmIds[2], cx, cy, cz)]
+            _bulk_write_htm_ids(
+                log=log,
+                dbConn=dbConn,
+                tableName=tableName,
+                primaryIdColumnName=primaryIdColumnName,
+                manyValueList=manyValueList
+            )
+            updated += len(manyValueList)
+
+        # THE MARK NEVER PASSES A ROW STILL WAITING FOR ITS POSITION
+        if len(pending):
+            mark = min(pending) - 1
+        else:
+            mark = lastId
+        writequery(
+            log=log,
+            sqlQuery="""UPDATE marshall_htm_watermarks SET lastId = %(mark)s WHERE tableName = '%(tableName)s'""" % locals(),
+            dbConn=dbConn
+        )
+
+    log.debug('completed the ``add_new_htm_ids`` function')
+    return updated
+
+
+def _bulk_write_htm_ids(
+        log,
+        dbConn,
+        tableName,
+        primaryIdColumnName,
+        manyValueList):
+    """*write (primary key, htm16ID, htm13ID, htm10ID, cx, cy, cz) tuples to a table via a temporary staging table and a single JOIN-based UPDATE*
+    """
+    import random
+    from datetime import datetime
+    rand = random.randint(0, 10000)
+    tmpTable = datetime.now().strftime(f"tmp_htm_%Y%m%dt%H%M%S%f{rand}")
+
+    writequery(
+        log=log,
+        sqlQuery="""CREATE TEMPORARY TABLE %(tmpTable)s (pid BIGINT NOT NULL PRIMARY KEY, htm16ID BIGINT UNSIGNED, htm13ID INT, htm10ID INT, cx DOUBLE, cy DOUBLE, cz DOUBLE);""" % locals(),
+        dbConn=dbConn
+    )
+    writequery(
+        log=log,
+        sqlQuery="""INSERT INTO %(tmpTable)s (pid, htm16ID, htm13ID, htm10ID, cx, cy, cz) VALUES (%%s, %%s, %%s, %%s, %%s, %%s, %%s)""" % locals(),
+        dbConn=dbConn,
+        manyValueList=manyValueList
+    )
+    sqlQueries = [
+        """UPDATE `%(tableName)s` t JOIN %(tmpTable)s s ON t.`%(primaryIdColumnName)s` = s.pid SET t.htm16ID = s.htm16ID, t.htm13ID = s.htm13ID, t.htm10ID = s.htm10ID, t.cx = s.cx, t.cy = s.cy, t.cz = s.cz;""" % locals(),
+        """DROP TEMPORARY TABLE %(tmpTable)s;""" % locals()
+    ]
+    for sqlQuery in sqlQueries:
+        writequery(
+            log=log,
+            sqlQuery=sqlQuery,
+            dbConn=dbConn
+        )
+    return None
+
+
+def _create_watermark_table(
+        log,
+        dbConn):
+    """*create the ``marshall_htm_watermarks`` table if it does not exist yet*
+    """
+    # A NO-OP IF ANOTHER INGESTER HAS JUST CREATED THE TABLE
+    sqlQuery = """CREATE TABLE IF NOT EXISTS `marshall_htm_watermarks` (
+      `tableName` varchar(100) NOT NULL,
+      `lastId` bigint(20) NOT NULL DEFAULT 0,
+      `dateLastModified` datetime DEFAULT current_timestamp() ON UPDATE current_timestamp(),
+      PRIMARY KEY (`tableName`)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;"""
+    writequery(
+        log=log,
+        sqlQuery=sqlQuery,
+        dbConn=dbConn
+    )
+    return None
@@ -0,0 +1,104 @@
+#!/usr/local/bin/python
+# encoding: utf-8
+"""
+*Deduplicate the existing image stamp cache into the content-addressed blob store and prune blobs no stamp links to*
+
+:Author:
+    David Young
+"""
+from __future__ import print_function
+import time
+import os
+os.environ['TERM'] = 'vt100'
+
+
+def tidy_stamp_blobs(
+        log,
+        settings,
+        linkExisting=True,
+        limit=100000,
+        minAgeSeconds=3600):
+    """*link stamps cached before the blob store existed into it, and delete blobs that are no longer linked to any stamp*
+
+    New downloads are hard-linked into the blob store (``<cache-directory>/blobs``) as they are written, but stamps cached before that stay as plain files, and a blob whose stamps have all been re-downloaded or deleted is left with a link count of 1. This housekeeping step fixes both:
+
+    - **link existing** -- stamps in ``<cache-directory>/transients`` with a link count of 1 are hashed and replaced by a hard link to their blob (up to ``limit`` per run; stamps already linked are skipped, so a large cache is worked through over several runs)
+    - **prune** -- blobs with a link count of 1 (only the blob store itself refers to them) are deleted
+
+    Files modified in the last ``minAgeSeconds`` are left alone so stamps being downloaded at the same time are never touched.
+
+    **Key Arguments**
+
+    - ``log`` -- logger
+    - ``settings`` -- the settings dictionary
+    - ``linkExisting`` -- link stamps cached before the blob store existed. Default *True*
+    - ``limit`` -- the most stamps to link per run. Default *100000*
+    - ``minAgeSeconds`` -- ignore files modified more recently than this. Default *3600*
+
+
+    **Return**
+
+    - ``linked`` -- the number of stamps linked into the blob store
+    - ``pruned`` -- the number of unreferenced blobs deleted
+
+
+    **Usage**
+
+    ```python
+    from marshallEngine.housekeeping import tidy_stamp_blobs
+    linked, pruned = tidy_stamp_blobs(
+        log=log,
+        settings=settings
+    )
+    ```
+    """
+    log.debug('starting the ``tidy_stamp_blobs`` function')
+
+    from marshallEngine.feeders.stamp_store import store_stamp
+
+    if settings and "stamp blob store" in settings and not settings["stamp blob store"]:
+        return 0, 0
+
+    cacheDirectory = settings["cache-directory"]
+    blobDirectory = cacheDirectory + "/blobs"
+    cutoff = time.time() - minAgeSeconds
+
+    linked = 0
+    transientDirectory = cacheDirectory + "/transients"
+    if linkExisting and os.path.isdir(transientDirectory):
+        for transient in os.scandir(transientDirectory):
+            if linked >= limit:
+                break
+            if not transient.is_dir():
+                continue
+            for stamp in os.scandir(transient.path):
+                if not stamp.name.endswith("_stamp.jpeg") or not stamp.is_file():
+                    continue
+                info = stamp.stat()
+                if info.st_nlink > 1 or info.st_mtime > cutoff or not info.st_size:
+                    continue
+                with open(stamp.path, "rb") as f:
+                    content = f.read()
+                if store_stamp(
+                        log=log,
+                        content=content,
+                        pathToWriteFile=stamp.path,
+                        blobDirectory=blobDirectory):
+                    linked += 1
+
+    pruned = 0
+    if os.path.isdir(blobDirectory):
+        for root, dirs, files in os.walk(blobDirectory):
+            for name in files:
+                if not name.endswith(".jpeg"):
+                    continue
+                path = os.path.join(root, name)
+                info = os.stat(path)
+                if info.st_nlink == 1 and info.st_mtime < cutoff:
+                    os.remove(path)
+                    pruned += 1
+
+    print("%(linked)s existing stamps linked into the blob store and %(pruned)s unreferenced blobs removed" % locals())
+
+    log.debug('completed the ``tidy_stamp_blobs`` function')
+    return linked, pruned
@@ -0,0 +1,76 @@
+from __future__ import print_function
+from builtins import str
+import os
+import unittest
+import shutil
+import yaml
+from marshallEngine.utKit import utKit
+from fundamentals import tools
+from os.path import expanduser
+home = expanduser("~")
+
+packageDirectory = utKit("").get_project_root()
+# settingsFile = packageDirectory + "/test_settings.yaml"
+settingsFile = home + "/git_repos/_misc_/settings/marshall/test_settings.yaml"
+
+su = tools(
+    arguments={"settingsFile": settingsFile},
+    docString=__doc__,
+    logLevel="DEBUG",
+    options_first=False,
+    projectName=None,
+    defaultSettingsFile=False
+)
+arguments, settings, log, dbConn = su.setup()
+
+# SETUP PATHS TO COMMON DIRECTORIES FOR TEST DATA
+moduleDirectory = os.path.dirname(__file__)
+pathToInputDir = moduleDirectory + "/input/"
+pathToOutputDir = moduleDirectory + "/output/"
+
+try:
+    shutil.rmtree(pathToOutputDir)
+except:
+    pass
+# COPY INPUT TO OUTPUT DIR
+shutil.copytree(pathToInputDir, pathToOutputDir)
+
+# Recursively create missing directories
+if not os.path.exists(pathToOutputDir):
+    os.makedirs(pathToOutputDir)
+
+
+class test_add_new_htm_ids(unittest.TestCase):
+
+    def test_add_new_htm_ids_function(self):
+
+        from marshallEngine.housekeeping import add_new_htm_ids
+        updated = add_new_htm_ids(
+            log=log,
+            dbConn=dbConn,
+            tableName="transientBucket",
+            primaryIdColumnName="primaryKeyId"
+        )
+        print(updated)
+        # A SECOND RUN HAS NOTHING LEFT TO DO
+        updated = add_new_htm_ids(
+            log=log,
+            dbConn=dbConn,
+            tableName="transientBucket",
+            primaryIdColumnName="primaryKeyId"
+        )
+        assert updated == 0
+
+    def test_add_new_htm_ids_function_exception(self):
+
+        from marshallEngine.housekeeping import add_new_htm_ids
+        try:
+            this = add_new_htm_ids(
+                log=log,
+                dbConn=dbConn,
+                fakeKey="break the code"
+            )
+            assert False
+        except Exception as e:
+            assert True
+            print(str(e))
@@ -0,0 +1,92 @@
+from __future__ import print_function
+from builtins import str
+import os
+import unittest
+import shutil
+import yaml
+from marshallEngine.utKit import utKit
+from fundamentals import tools
+from os.path import expanduser
+home = expanduser("~")
+
+packageDirectory = utKit("").get_project_root()
+# settingsFile = packageDirectory + "/test_settings.yaml"
+settingsFile = home + "/git_repos/_misc_/settings/marshall/test_settings.yaml"
+
+su = tools(
+    arguments={"settingsFile": settingsFile},
+    docString=__doc__,
+    logLevel="DEBUG",
+    options_first=False,
+    projectName=None,
+    defaultSettingsFile=False
+)
+arguments, settings, log, dbConn = su.setup()
+
+# SETUP PATHS TO COMMON DIRECTORIES FOR TEST DATA
+moduleDirectory = os.path.dirname(__file__)
+pathToInputDir = moduleDirectory + "/input/"
+pathToOutputDir = moduleDirectory + "/output/"
+
+try:
+    shutil.rmtree(pathToOutputDir)
+except:
+    pass
+# COPY INPUT TO OUTPUT DIR
+shutil.copytree(pathToInputDir, pathToOutputDir)
+
+# Recursively create missing directories
+if not os.path.exists(pathToOutputDir):
+    os.makedirs(pathToOutputDir)
+
+
+class test_stamp_blobs(unittest.TestCase):
+
+    def test_tidy_stamp_blobs_function(self):
+
+        from marshallEngine.housekeeping import tidy_stamp_blobs
+        import time
+        testSettings = dict(settings)
+        testSettings["cache-directory"] = pathToOutputDir + "/stamp_cache"
+        paths = []
+        for tid in [1, 2, 3]:
+            folder = testSettings["cache-directory"] + \
+                "/transients/%(tid)s" % locals()
+            os.makedirs(folder, exist_ok=True)
+            paths.append(folder + "/ps1_reference_stamp.jpeg")
+            with open(paths[-1], "wb") as f:
+                f.write(b"identical reference stamp")
+            old = time.time() - 7200
+            os.utime(paths[-1], (old, old))
+
+        linked, pruned = tidy_stamp_blobs(
+            log=log,
+            settings=testSettings
+        )
+        assert linked == 3
+        # THE THREE STAMPS AND THEIR BLOB ARE NOW ONE FILE
+        assert os.stat(paths[0]).st_nlink == 4
+
+        # ONCE THE STAMPS ARE GONE THE BLOB IS PRUNED
+        for p in paths:
+            os.remove(p)
+        linked, pruned = tidy_stamp_blobs(
+            log=log,
+            settings=testSettings,
+            minAgeSeconds=0
+        )
+        assert (linked, pruned) == (0, 1)
+
+    def test_tidy_stamp_blobs_function_exception(self):
+
+        from marshallEngine.housekeeping import tidy_stamp_blobs
+        try:
+            this = tidy_stamp_blobs(
+                log=log,
+                settings=settings,
+                fakeKey="break the code"
+            )
+            assert False
+        except Exception as e:
+            assert True
+            print(str(e))
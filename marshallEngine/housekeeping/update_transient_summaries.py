@@ -7,13 +7,9 @@
     David Young
 """
 from __future__ import print_function
-from HMpTy.mysql import add_htm_ids_to_mysql_database_table
 import numpy as np
-from astrocalc.distances import converter
 from fundamentals.mysql import insert_list_of_dictionaries_into_database_tables
-from astropy.coordinates import SkyCoord
-from astropy import units as u
-from fundamentals.mysql import writequery, readquery
+from marshallEngine.commonutils.run_report import writequery, readquery
 from fundamentals import tools
 from builtins import zip
 from builtins import str
@@ -210,6 +206,10 @@ class update_transient_summaries(object):
         if not total:
             return
 
+        # ASTROPY IS ONLY IMPORTED WHEN THERE ARE COORDINATES TO CONVERT
+        from astropy.coordinates import SkyCoord
+        from astropy import units as u
+
         if total > 100:
             print(
                 """%(total)s transients need updated - updating the next 100""" % locals())
@@ -277,6 +277,8 @@ class update_transient_summaries(object):
         """
         self.log.debug('starting the ``_add_distances`` method')
 
+        from astrocalc.distances import converter
+
         extra = ""
         if self.transientBucketId:
             thisId = self.transientBucketId
@@ -339,6 +341,8 @@ class update_transient_summaries(object):
         """
         self.log.debug('starting the ``_update_htm_columns`` method')
 
+        from HMpTy.mysql import add_htm_ids_to_mysql_database_table
+
         add_htm_ids_to_mysql_database_table(
             raColName="raDeg",
             declColName="decDeg",
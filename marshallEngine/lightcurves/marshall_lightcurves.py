@@ -7,18 +7,10 @@
     David Young
 """
 from __future__ import print_function
-from numpy.polynomial.chebyshev import chebfit, chebval
 import math
-from matplotlib.backends.backend_pdf import PdfPages
-import matplotlib.ticker as mtick
-import matplotlib.ticker as ticker
-import matplotlib.pyplot as plt
-from matplotlib import dates
-import matplotlib as mpl
 import warnings
 import numpy as np
-from astrocalc.times import conversions, now
-from fundamentals.mysql import database
+from marshallEngine.commonutils import get_db_connection
 from fundamentals.mysql import readquery, writequery
 from fundamentals import fmultiprocess
 from fundamentals import tools
@@ -31,7 +23,6 @@ import os
 os.environ['TERM'] = 'vt100'
 # SUPPRESS MATPLOTLIB WARNINGS
 warnings.filterwarnings("ignore")
-mpl.use('Agg')
 
 
 class marshall_lightcurves(object):
@@ -240,6 +231,16 @@ class marshall_lightcurves(object):
         """
         self.log.debug('starting the ``_create_lightcurve_plot_file`` method')
 
+        # MATPLOTLIB AND ASTROCALC ARE ONLY IMPORTED WHEN A PLOT IS MADE
+        import matplotlib as mpl
+        mpl.use('Agg')
+        from matplotlib import dates
+        import matplotlib.pyplot as plt
+        import matplotlib.ticker as ticker
+        import matplotlib.ticker as mtick
+        from numpy.polynomial.chebyshev import chebfit, chebval
+        from astrocalc.times import conversions, now
+
         # CONVERTER TO CONVERT MJD TO DATE
         converter = conversions(
             log=self.log
@@ -656,13 +657,14 @@ def _plot_one(
     """
     log.debug('starting the ``_plot_one`` method')
 
-    # MULTIPROCESSING NEEDS ONE CONNECTION PER PROCESS
+    # MULTIPROCESSING NEEDS ONE CONNECTION PER PROCESS - REUSE THIS POOL
+    # WORKER'S PERSISTENT CONNECTION
     sys.stdout.write("\x1b[1A\x1b[2K")
     print("updating LC for transient %(transientBucketId)s" % locals())
-    dbConn = database(
+    dbConn = get_db_connection(
         log=log,
         dbSettings=settings["database settings"]
-    ).connect()
+    )
 
     # LC OBJECT
     lc = marshall_lightcurves(
@@ -5,3 +5,5 @@ from __future__ import absolute_import
 from .panstarrs_location_stamps import panstarrs_location_stamps
 from .soxs_scheduler import soxs_scheduler
 from .lvk_tagger import lvk_tagger
+from .import_all import import_all
+from .ingest_daemon import ingest_daemon
@@ -0,0 +1,187 @@
+#!/usr/bin/env python
+# encoding: utf-8
+"""
+*Import the data and images of every configured feeder survey concurrently*
+
+:Author:
+    David Young
+"""
+from __future__ import print_function
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from fundamentals import tools
+from builtins import object
+import time
+import sys
+import os
+os.environ['TERM'] = 'vt100'
+
+# THE SURVEYS IMPORTED IF THE ``import-all surveys`` SETTING IS NOT GIVEN
+defaultSurveys = ["atlas", "panstarrs", "ztf", "tns", "useradded", "atels"]
+
+
+class import_all(object):
+    """
+    *import the data and images of every configured feeder survey concurrently, each survey in its own process with its own database connection*
+
+    The steps shared between surveys (the transientBucket sync, observation date updates and transient summaries) are serialised with MySQL named locks, everything else (downloads, feeder survey table imports and image caching) runs in parallel.
+
+    **Key Arguments**
+
+    - ``log`` -- logger
+    - ``settings`` -- the settings dictionary
+    - ``withinLastDays`` -- import transient detections from the last N days. Default *30*
+    - ``drainBacklog`` -- crossmatch the full backlog of un-ingested feeder survey rows. Default *False*
+
+    **Usage**
+
+    The surveys to import can be set with the ``import-all surveys`` setting (a list of survey names).
+
+    ```python
+    from marshallEngine.services import import_all
+    importer = import_all(
+        log=log,
+        settings=settings,
+        withinLastDays=30
+    )
+    timings = importer.run()
+    ```
+    """
+
+    def __init__(
+            self,
+            log,
+            settings=False,
+            withinLastDays=30,
+            drainBacklog=False
+    ):
+        self.log = log
+        log.debug("instantiating a new 'import_all' object")
+        self.settings = settings
+        self.withinLastDays = withinLastDays
+        self.drainBacklog = drainBacklog
+
+        if settings and "import-all surveys" in settings and settings["import-all surveys"]:
+            self.surveys = settings["import-all surveys"]
+        else:
+            self.surveys = defaultSurveys
+
+        return None
+
+    def run(self):
+        """
+        *run the imports of all the surveys and print a per-survey timing table*
+
+        **Return**
+
+        - ``timings`` -- list of dictionaries, one per survey, with the ingest, image-cache and total times and the import status
+        """
+        self.log.debug('starting the ``run`` method')
+
+        timings = []
+        with ProcessPoolExecutor(max_workers=len(self.surveys)) as executor:
+            futures = {executor.submit(
+                _import_survey,
+                log=self.log,
+                settings=self.settings,
+                survey=survey,
+                withinLastDays=self.withinLastDays,
+                drainBacklog=self.drainBacklog
+            ): survey for survey in self.surveys}
+            for f in as_completed(futures):
+                survey = futures[f]
+                try:
+                    timings.append(f.result())
+                except Exception as e:
+                    self.log.error(
+                        "the %(survey)s import failed: %(e)s" % locals())
+                    timings.append({
+                        "survey": survey,
+                        "status": "failed: %(e)s" % locals()
+                    })
+
+        # KEEP THE TABLE IN THE ORDER THE SURVEYS WERE REQUESTED
+        order = {s: i for i, s in enumerate(self.surveys)}
+        timings.sort(key=lambda t: order[t["survey"]])
+
+        from tabulate import tabulate
+        columns = ["survey", "ingest (s)", "images (s)", "total (s)", "status"]
+        table = [[t.get(c) for c in columns] for t in timings]
+        print(tabulate(table, headers=columns, floatfmt=".1f"))
+
+        self.log.debug('completed the ``run`` method')
+        return timings
+
+    # use the tab-trigger below for new method
+    # xt-class-method
+
+
+def _import_survey(
+        log,
+        settings,
+        survey,
+        withinLastDays,
+        drainBacklog=False):
+    """*ingest the data and cache the images of a single survey (run in its own process)*
+
+    **Key Arguments**
+
+    - ``log`` -- logger
+    - ``settings`` -- the settings dictionary
+    - ``survey`` -- the name of the survey
+    - ``withinLastDays`` -- import transient detections from the last N days
+    - ``drainBacklog`` -- crossmatch the full backlog of un-ingested feeder survey rows
+
+
+    **Return**
+
+    - ``timing`` -- dictionary of the survey name, the ingest, image-cache and total times (sec) and the import status
+    """
+    from marshallEngine.commonutils import get_db_connection
+    from marshallEngine.feeders.survey_feeders import get_survey_feeders
+    from marshallEngine.commonutils.run_report import run_report, stage
+
+    # EACH PROCESS NEEDS ITS OWN DATABASE CONNECTION (KEPT OPEN FOR THE NEXT
+    # SURVEY RUN BY THIS WORKER)
+    dbConn = get_db_connection(
+        log=log,
+        dbSettings=settings["database settings"]
+    )
+
+    timing = {"survey": survey}
+    start = time.time()
+    report = run_report(
+        log=log,
+        settings=settings,
+        name=survey
+    ).start()
+    try:
+        data, images = get_survey_feeders(survey)
+        with stage("ingest"):
+            ingester = data(
+                log=log,
+                settings=settings,
+                dbConn=dbConn
+            )
+            ingester.drainBacklog = drainBacklog
+            ingester.ingest(withinLastDays=withinLastDays)
+        timing["ingest (s)"] = time.time() - start
+
+        imageStart = time.time()
+        with stage("image cache"):
+            cacher = images(
+                log=log,
+                settings=settings,
+                dbConn=dbConn
+            ).cache(limit=3000)
+        timing["images (s)"] = time.time() - imageStart
+        timing["status"] = "ok"
+    except Exception as e:
+        # REPORT THE FAILURE IN THE TIMING TABLE RATHER THAN KILLING THE RUN
+        log.error("the %(survey)s import failed: %(e)s" % locals())
+        timing["status"] = "failed: %(e)s" % locals()
+    finally:
+        timing["total (s)"] = time.time() - start
+        report.finish()
+        dbConn.commit()
+
+    return timing
@@ -0,0 +1,314 @@
+#!/usr/bin/env python
+# encoding: utf-8
+"""
+*A long-running ingest daemon that schedules the survey imports, image caching and lightcurve updates in one warm process*
+
+:Author:
+    David Young
+"""
+from __future__ import print_function
+from marshallEngine.services.import_all import defaultSurveys
+from builtins import object
+import random
+import signal
+import threading
+import time
+import os
+os.environ['TERM'] = 'vt100'
+
+# MINUTES BETWEEN RUNS OF EACH STEP IF THE ``daemon schedule`` SETTING DOES
+# NOT GIVE ONE
+defaultIntervals = {
+    "ingest": 15,
+    "images": 30,
+    "lightcurves": 10,
+    "location stamps": 60
+}
+
+
+class ingest_daemon(object):
+    """
+    *run the survey ingests, image caching, lightcurve updates and PanSTARRS location stamps on their own schedules, forever, in a single process*
+
+    Everything expensive to set up is kept warm between cycles: the interpreter and its imports, the settings and logger, the persistent database connection, the transientBucket spatial and name indexes, the fs column maps and the HTTP sessions. Tasks run one at a time; each is scheduled ``interval`` minutes after its last run started, give or take a random ``daemon jitter`` fraction of the interval, so the surveys drift apart rather than all hitting the database together.
+
+    Each task holds a MySQL named lock while it runs (``marshall_daemon_<task>``, or the ``marshall_transient_summaries`` lock for the lightcurve updates). If another daemon (or any process holding the same lock) is already running the task it is skipped until its next slot rather than queued.
+
+    **Key Arguments**
+
+    - ``log`` -- logger
+    - ``settings`` -- the settings dictionary
+    - ``withinLastDays`` -- import transient detections from the last N days. Default *30*
+    - ``drainBacklog`` -- crossmatch the full backlog of un-ingested feeder survey rows. Default *False*
+
+    **Usage**
+
+    The surveys are set with the ``import-all surveys`` setting and the intervals (minutes) with the ``daemon schedule`` setting:
+
+    ```yaml
+    daemon schedule:
+        ingest: 15
+        images: 30
+        lightcurves: 10
+        location stamps: 60
+        atlas:
+            ingest: 5
+    daemon jitter: 0.1
+    ```
+
+    ```python
+    from marshallEngine.services import ingest_daemon
+    daemon = ingest_daemon(
+        log=log,
+        settings=settings,
+        withinLastDays=3
+    )
+    daemon.run()
+    ```
+    """
+    # LONGEST SLEEP BETWEEN CHECKS FOR DUE TASKS (SEC)
+    maxSleep = 60
+
+    def __init__(
+            self,
+            log,
+            settings=False,
+            withinLastDays=30,
+            drainBacklog=False
+    ):
+        self.log = log
+        log.debug("instantiating a new 'ingest_daemon' object")
+        self.settings = settings
+        self.withinLastDays = withinLastDays
+        self.drainBacklog = drainBacklog
+        self.stopping = threading.Event()
+
+        if settings and "import-all surveys" in settings and settings["import-all surveys"]:
+            self.surveys = settings["import-all surveys"]
+        else:
+            self.surveys = defaultSurveys
+        if settings and "daemon jitter" in settings and settings["daemon jitter"] is not None:
+            self.jitter = float(settings["daemon jitter"])
+        else:
+            self.jitter = 0.1
+
+        self.tasks = self._build_schedule()
+
+        return None
+
+    def run(
+            self,
+            cycles=False):
+        """
+        *run due tasks until stopped (SIGINT/SIGTERM finish the task in hand, then exit)*
+
+        **Key Arguments**
+
+        - ``cycles`` -- stop after this many tasks have been run or skipped. Default *False* (run forever)
+
+        **Return**
+
+        - ``history`` -- list of dictionaries of the task name, start time, duration (sec) and status of every task run or skipped
+        """
+        self.log.debug('starting the ``run`` method')
+
+        if threading.current_thread() is threading.main_thread():
+            for s in (signal.SIGINT, signal.SIGTERM):
+                signal.signal(s, self._handle_signal)
+
+        history = []
+        while not self.stopping.is_set():
+            task = min(self.tasks, key=lambda t: t["nextRun"])
+            wait = task["nextRun"] - time.time()
+            if wait > 0:
+                self.stopping.wait(min(wait, self.maxSleep))
+                continue
+
+            history.append(self._run_task(task))
+            task["nextRun"] = task["lastRun"] + \
+                self._jittered(task["interval"])
+
+            if cycles and len(history) >= cycles:
+                break
+
+        self.log.debug('completed the ``run`` method')
+        return history
+
+    def stop(
+            self):
+        """*ask the daemon to exit once the task in hand is finished*
+        """
+        self.stopping.set()
+        return None
+
+    def _handle_signal(
+            self,
+            signum,
+            frame):
+        """*stop cleanly on SIGINT/SIGTERM*
+        """
+        print("Stopping the marshall daemon after the current task")
+        self.stop()
+        return None
+
+    def _build_schedule(
+            self):
+        """*the list of tasks with their intervals (sec) and first run times (staggered by the jitter)*
+        """
+        schedule = self.settings and "daemon schedule" in self.settings and self.settings[
+            "daemon schedule"] or {}
+
+        def interval(step, survey=False):
+            minutes = defaultIntervals[step]
+            if step in schedule and schedule[step] is not None:
+                minutes = schedule[step]
+            if survey and isinstance(schedule.get(survey), dict) and step in schedule[survey]:
+                minutes = schedule[survey][step]
+            return float(minutes) * 60.
+
+        tasks = []
+        for survey in self.surveys:
+            for step in ("ingest", "images"):
+                tasks.append({
+                    "name": "%(survey)s %(step)s" % locals(),
+                    "survey": survey,
+                    "step": step,
+                    "interval": interval(step, survey)
+                })
+        for step in ("lightcurves", "location stamps"):
+            tasks.append({
+                "name": step,
+                "survey": False,
+                "step": step,
+                "interval": interval(step)
+            })
+
+        now = time.time()
+        for t in tasks:
+            t["nextRun"] = now + random.uniform(0, self.jitter * t["interval"])
+            t["lastRun"] = None
+        return tasks
+
+    def _jittered(
+            self,
+            interval):
+        """*the interval (sec) +/- a random jitter fraction*
+        """
+        return interval * (1. + random.uniform(-self.jitter, self.jitter))
+
+    def _run_task(
+            self,
+            task):
+        """*run a single task under its named lock, recording (but surviving) any failure*
+
+        **Key Arguments**
+
+        - ``task`` -- the task dictionary
+
+        **Return**
+
+        - ``record`` -- dictionary of the task name, start time, duration (sec) and status
+        """
+        self.log.debug('starting the ``_run_task`` method')
+
+        from marshallEngine.commonutils import get_db_connection, mysql_lock, lock_held
+        from marshallEngine.commonutils.run_report import run_report, stage
+
+        name = task["name"]
+        task["lastRun"] = time.time()
+        record = {"task": name, "started": task["lastRun"]}
+
+        if task["step"] == "lightcurves":
+            lockName = "marshall_transient_summaries"
+        else:
+            lockName = "marshall_daemon_" + name.replace(" ", "_")
+
+        dbConn = None
+        report = None
+        try:
+            # THE PERSISTENT CONNECTION IS HEALTH-CHECKED AND RECONNECTED IF THE
+            # SERVER HAS DROPPED IT BETWEEN CYCLES
+            dbConn = get_db_connection(
+                log=self.log,
+                dbSettings=self.settings["database settings"]
+            )
+            with mysql_lock(log=self.log, dbConn=dbConn, lockName=lockName, timeout=0):
+                print("Running the `%(name)s` task" % locals())
+                report = run_report(
+                    log=self.log,
+                    settings=self.settings,
+                    name=name.replace(" ", "_")
+                ).start()
+                with stage(task["step"]):
+                    self._run_step(task=task, dbConn=dbConn)
+            record["status"] = "ok"
+        except lock_held as e:
+            if e.lockName != lockName:
+                # A LOCK TAKEN INSIDE THE TASK TIMED OUT
+                self.log.error("the %(name)s task failed: %(e)s" % locals())
+                record["status"] = "failed: %(e)s" % locals()
+            else:
+                # ANOTHER PROCESS IS RUNNING THE TASK - TRY AGAIN AT THE NEXT
+                # SLOT
+                self.log.info(
+                    "skipping the %(name)s task - it is already running elsewhere" % locals())
+                print("Skipping the `%(name)s` task - it is already running elsewhere" % locals())
+                record["status"] = "skipped"
+        except Exception as e:
+            self.log.error("the %(name)s task failed: %(e)s" % locals())
+            record["status"] = "failed: %(e)s" % locals()
+        finally:
+            if report is not None:
+                report.finish()
+            try:
+                dbConn.commit()
+            except Exception:
+                pass
+
+        record["seconds"] = time.time() - record["started"]
+
+        self.log.debug('completed the ``_run_task`` method')
+        return record
+
+    def _run_step(
+            self,
+            task,
+            dbConn):
+        """*run the work of a single task*
+        """
+        step = task["step"]
+        if step in ("ingest", "images"):
+            from marshallEngine.feeders.survey_feeders import get_survey_feeders
+            data, images = get_survey_feeders(task["survey"])
+            if step == "ingest":
+                ingester = data(
+                    log=self.log,
+                    settings=self.settings,
+                    dbConn=dbConn
+                )
+                ingester.drainBacklog = self.drainBacklog
+                ingester.ingest(withinLastDays=self.withinLastDays)
+            else:
+                cacher = images(
+                    log=self.log,
+                    settings=self.settings,
+                    dbConn=dbConn
+                ).cache(limit=3000)
+        elif step == "lightcurves":
+            from marshallEngine.housekeeping import update_transient_summaries
+            updater = update_transient_summaries(
+                log=self.log,
+                settings=self.settings,
+                dbConn=dbConn
+            ).update()
+        elif step == "location stamps":
+            from marshallEngine.services import panstarrs_location_stamps
+            ps_stamp = panstarrs_location_stamps(
+                log=self.log,
+                settings=self.settings,
+                dbConn=dbConn
+            ).get()
+        return None
+
+    # use the tab-trigger below for new method
+    # xt-class-method
@@ -12,8 +12,6 @@ import os
 os.environ['TERM'] = 'vt100'
 from fundamentals import tools
 from fundamentals.mysql import readquery, writequery
-from panstamps.downloader import downloader
-from panstamps.image import image
 
 
 class panstarrs_location_stamps(object):
@@ -69,6 +67,11 @@ class panstarrs_location_stamps(object):
         """
         self.log.debug('starting the ``get`` method')
 
+        # PANSTAMPS (AND ITS IMAGING DEPENDENCIES) ARE ONLY IMPORTED WHEN
+        # STAMPS ARE FETCHED
+        from panstamps.downloader import downloader
+        from panstamps.image import image
+
         # FOR A SINGLE TRANSIENT
         if self.transientId:
             transientId = self.transientId
@@ -0,0 +1,74 @@
+from __future__ import print_function
+from builtins import str
+import os
+import unittest
+import shutil
+import unittest
+import yaml
+from marshallEngine.utKit import utKit
+from fundamentals import tools
+from os.path import expanduser
+home = expanduser("~")
+
+packageDirectory = utKit("").get_project_root()
+# settingsFile = packageDirectory + "/test_settings.yaml"
+settingsFile = home + "/git_repos/_misc_/settings/marshall/test_settings.yaml"
+
+su = tools(
+    arguments={"settingsFile": settingsFile},
+    docString=__doc__,
+    logLevel="DEBUG",
+    options_first=False,
+    projectName=None,
+    defaultSettingsFile=False
+)
+arguments, settings, log, dbConn = su.setup()
+
+# SETUP PATHS TO COMMON DIRECTORIES FOR TEST DATA
+moduleDirectory = os.path.dirname(__file__)
+pathToInputDir = moduleDirectory + "/input/"
+pathToOutputDir = moduleDirectory + "/output/"
+
+try:
+    shutil.rmtree(pathToOutputDir)
+except:
+    pass
+# COPY INPUT TO OUTPUT DIR
+shutil.copytree(pathToInputDir, pathToOutputDir)
+
+# Recursively create missing directories
+if not os.path.exists(pathToOutputDir):
+    os.makedirs(pathToOutputDir)
+
+
+# xt-setup-unit-testing-files-and-folders
+# xt-utkit-refresh-database
+
+class test_import_all(unittest.TestCase):
+
+    def test_import_all_function(self):
+
+        from marshallEngine.services import import_all
+        importer = import_all(
+            log=log,
+            settings=settings,
+            withinLastDays=3
+        )
+        importer.surveys = ["useradded", "atels"]
+        timings = importer.run()
+        assert len(timings) == 2
+
+    def test_import_all_function_exception(self):
+
+        from marshallEngine.services import import_all
+        try:
+            this = import_all(
+                log=log,
+                settings=settings,
+                fakeKey="break the code"
+            )
+            this.run()
+            assert False
+        except Exception as e:
+            assert True
+            print(str(e))
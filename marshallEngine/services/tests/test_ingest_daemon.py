@@ -0,0 +1,75 @@
+from __future__ import print_function
+from builtins import str
+import os
+import unittest
+import shutil
+import unittest
+import yaml
+from marshallEngine.utKit import utKit
+from fundamentals import tools
+from os.path import expanduser
+home = expanduser("~")
+
+packageDirectory = utKit("").get_project_root()
+# settingsFile = packageDirectory + "/test_settings.yaml"
+settingsFile = home + "/git_repos/_misc_/settings/marshall/test_settings.yaml"
+
+su = tools(
+    arguments={"settingsFile": settingsFile},
+    docString=__doc__,
+    logLevel="DEBUG",
+    options_first=False,
+    projectName=None,
+    defaultSettingsFile=False
+)
+arguments, settings, log, dbConn = su.setup()
+
+# SETUP PATHS TO COMMON DIRECTORIES FOR TEST DATA
+moduleDirectory = os.path.dirname(__file__)
+pathToInputDir = moduleDirectory + "/input/"
+pathToOutputDir = moduleDirectory + "/output/"
+
+try:
+    shutil.rmtree(pathToOutputDir)
+except:
+    pass
+# COPY INPUT TO OUTPUT DIR
+shutil.copytree(pathToInputDir, pathToOutputDir)
+
+# Recursively create missing directories
+if not os.path.exists(pathToOutputDir):
+    os.makedirs(pathToOutputDir)
+
+
+# xt-setup-unit-testing-files-and-folders
+# xt-utkit-refresh-database
+
+class test_ingest_daemon(unittest.TestCase):
+
+    def test_ingest_daemon_function(self):
+
+        from marshallEngine.services import ingest_daemon
+        daemon = ingest_daemon(
+            log=log,
+            settings=settings,
+            withinLastDays=3
+        )
+        daemon.surveys = ["useradded"]
+        daemon.tasks = daemon._build_schedule()
+        history = daemon.run(cycles=2)
+        assert len(history) == 2
+
+    def test_ingest_daemon_function_exception(self):
+
+        from marshallEngine.services import ingest_daemon
+        try:
+            this = ingest_daemon(
+                log=log,
+                settings=settings,
+                fakeKey="break the code"
+            )
+            this.run(cycles=1)
+            assert False
+        except Exception as e:
+            assert True
+            print(str(e))
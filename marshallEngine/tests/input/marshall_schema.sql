@@ -1367,6 +1367,36 @@ CREATE TABLE `marshall_fs_column_map` (
 ) ENGINE=InnoDB  DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
 /*!40101 SET character_set_client = @saved_cs_client */;
 
+--
+-- Table structure for table `marshall_htm_watermarks`
+--
+
+DROP TABLE IF EXISTS `marshall_htm_watermarks`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!40101 SET character_set_client = utf8 */;
+CREATE TABLE `marshall_htm_watermarks` (
+  `tableName` varchar(100) NOT NULL,
+  `lastId` bigint(20) NOT NULL DEFAULT 0,
+  `dateLastModified` datetime DEFAULT current_timestamp() ON UPDATE current_timestamp(),
+  PRIMARY KEY (`tableName`)
+) ENGINE=InnoDB  DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
+--
+-- Table structure for table `marshall_id_sequences`
+--
+
+DROP TABLE IF EXISTS `marshall_id_sequences`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!40101 SET character_set_client = utf8 */;
+CREATE TABLE `marshall_id_sequences` (
+  `sequenceName` varchar(45) NOT NULL,
+  `nextId` bigint(20) NOT NULL DEFAULT 1,
+  `dateLastModified` datetime DEFAULT current_timestamp() ON UPDATE current_timestamp(),
+  PRIMARY KEY (`sequenceName`)
+) ENGINE=InnoDB  DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
 --
 -- Table structure for table `marshall_sources`
 --
@@ -0,0 +1,110 @@
+from __future__ import print_function
+from builtins import str
+import os
+import unittest
+import shutil
+import yaml
+from marshallEngine.utKit import utKit
+from fundamentals import tools
+from os.path import expanduser
+import subprocess
+import time
+import json
+import sys
+home = expanduser("~")
+
+packageDirectory = utKit("").get_project_root()
+#settingsFile = packageDirectory + "/test_settings.yaml"
+settingsFile = home + "/git_repos/_misc_/settings/marshall/test_settings.yaml"
+
+su = tools(
+    arguments={"settingsFile": settingsFile},
+    docString=__doc__,
+    logLevel="DEBUG",
+    options_first=False,
+    projectName=None,
+    defaultSettingsFile=False
+)
+arguments, settings, log, dbConn = su.setup()
+
+# SETUP PATHS TO COMMON DIRECTORIES FOR TEST DATA
+moduleDirectory = os.path.dirname(__file__)
+pathToInputDir = moduleDirectory + "/input/"
+pathToOutputDir = moduleDirectory + "/output/"
+
+try:
+    shutil.rmtree(pathToOutputDir)
+except:
+    pass
+# COPY INPUT TO OUTPUT DIR
+shutil.copytree(pathToInputDir, pathToOutputDir)
+
+# Recursively create missing directories
+if not os.path.exists(pathToOutputDir):
+    os.makedirs(pathToOutputDir)
+
+# STARTUP BUDGETS (SEC) - SCALE WITH THE MARSHALL_STARTUP_BUDGET_SCALE
+# ENVIRONMENT VARIABLE ON SLOW MACHINES
+budgetScale = float(os.environ.get("MARSHALL_STARTUP_BUDGET_SCALE", 1))
+helpBudget = 1.5 * budgetScale
+firstQueryBudget = 4.0 * budgetScale
+
+# MODULES NO SUBCOMMAND SHOULD IMPORT UNTIL IT NEEDS THEM
+heavyModules = ["matplotlib", "astropy", "panstamps"]
+
+# RUN A SUBCOMMAND IN A FRESH INTERPRETER AND REPORT THE TIME TO ITS FIRST
+# DATABASE QUERY (AND THE HEAVY MODULES LOADED BY THEN)
+firstQueryScript = """
+import time
+t0 = time.time()
+import os, sys, json
+from fundamentals import mysql
+def first_query(*args, **kwargs):
+    heavy = [m for m in %(heavyModules)r if m in sys.modules]
+    print(json.dumps({"seconds": time.time() - t0, "heavy": heavy}))
+    sys.stdout.flush()
+    os._exit(0)
+mysql.readquery = mysql.writequery = first_query
+from docopt import docopt
+from marshallEngine import cl_utils
+cl_utils.main(docopt(cl_utils.__doc__, %(command)r))
+"""
+
+
+def time_first_query(command):
+    script = firstQueryScript % {
+        "heavyModules": heavyModules, "command": command}
+    output = subprocess.run([sys.executable, "-c", script],
+                            capture_output=True, text=True, timeout=120).stdout
+    return json.loads(output.strip().split("\n")[-1])
+
+
+class test_startup_time(unittest.TestCase):
+
+    def test_help_startup_time(self):
+
+        times = []
+        for i in range(3):
+            start = time.time()
+            subprocess.run([sys.executable, "-m", "marshallEngine.cl_utils",
+                            "--help"], capture_output=True, timeout=60)
+            times.append(time.time() - start)
+        print(times)
+        assert min(times) < helpBudget
+
+    def test_refresh_time_to_first_query(self):
+
+        result = time_first_query(
+            ["refresh", "1", "-s", settingsFile])
+        print(result)
+        assert result["seconds"] < firstQueryBudget
+        assert not result["heavy"]
+
+    def test_package_imports_stay_light(self):
+
+        for package in ["marshallEngine", "marshallEngine.commonutils", "marshallEngine.lightcurves", "marshallEngine.housekeeping", "marshallEngine.services"]:
+            script = "import sys, %(package)s; print([m for m in %(heavyModules)r if m in sys.modules])" % {
+                "package": package, "heavyModules": heavyModules}
+            output = subprocess.run([sys.executable, "-c", script],
+                                    capture_output=True, text=True, timeout=60).stdout
+            assert output.strip() == "[]", (package, output)